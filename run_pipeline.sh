@@ -26,7 +26,7 @@ CLEANUP_CHOICE=${CLEANUP_CHOICE:-n}
 if [[ "$CLEANUP_CHOICE" == "j" || "$CLEANUP_CHOICE" == "J" ]]; then
     rm -f src/titanbot/strategy/configs/config_*.json
     rm -f artifacts/results/last_optimizer_run.json
-    rm -f artifacts/db/optuna_studies_smc.db
+    rm -f artifacts/db/optuna_studies_smc.db artifacts/db/optuna_studies_smc.db-wal artifacts/db/optuna_studies_smc.db-shm artifacts/db/optuna_studies_smc.journal
     rm -rf data/cache/
     echo -e "${GREEN}✔ Kompletter Neustart — Configs, Optimizer-Ergebnis, Optuna-DB und Cache gelöscht.${NC}"
 else
@@ -86,6 +86,12 @@ def run_backtest_for_config(cfg, start_date, end_date, start_capital, warmup_dat
         if not symbol or not tf:
             return None
         smc_p['_timeframe'] = tf
+        # SMC-Disk-Cache, wenn per TITANBOT_SMC_CACHE=1 eingeschaltet (Skripte sehen oft dieselben Kerzen)
+        from titanbot.strategy.smc_cache import default_cache
+        smc_cache = default_cache()
+        if smc_cache is not None:
+            smc_p['symbol'] = symbol
+            smc_p['_smc_cache'] = smc_cache
         label = f"{symbol} {tf}"
         ctx = _quiet() if silent else contextlib.nullcontext()
         with ctx:
@@ -6,18 +6,30 @@ import numpy as np
 import json
 import sys
 from tqdm import tqdm
-import ta
 import math
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from titanbot.utils.exchange import Exchange
-from titanbot.strategy.smc_engine import SMCEngine, Bias
-from titanbot.strategy.trade_logic import get_titan_signal
+from titanbot.utils.candle_store import CandleStore
+from titanbot.utils.indicators import compute_indicators
+from titanbot.utils.jit import njit, JIT_ENABLED
+from titanbot.strategy.smc_engine import Bias, smc_columns
+from titanbot.strategy.smc_index import SMCStructureIndex
+from titanbot.strategy.smc_cache import process_dataframe_cached
+from titanbot.strategy.trade_logic import compile_signal_params, titan_signal
+from titanbot.strategy.signal_table import CandidateSignalTable
 
 secrets_cache = None
 
+# Handelskosten und Positionsgrenzen der Backtests
+FEE_PCT            = 0.05 / 100   # 0.05% pro Seite (Bitget)
+SLIPPAGE_ENTRY_PCT = 0.05 / 100   # 0.05% Entry (SMC-Limit-Orders, konservativ)
+SLIPPAGE_EXIT_PCT  = 0.05 / 100   # 0.05% Exit  (Market-Order SL/TP)
+MIN_NOTIONAL_USDT  = 5.0
+MAX_NOTIONAL_USDT  = 1000000
+
 _TF_SECONDS = {300: '5m', 900: '15m', 1800: '30m', 3600: '1h',
                7200: '2h', 14400: '4h', 21600: '6h', 86400: '1d'}
 
@@ -57,16 +69,16 @@ def _resolve_ambiguous_exit(fine_slice, sl_price, tp_price, side):
     """
     if fine_slice is None or fine_slice.empty:
         return None, None
-    for _, bar in fine_slice.iterrows():
+    for high, low in zip(fine_slice['high'].tolist(), fine_slice['low'].tolist()):
         if side == 'long':
-            if bar['low'] <= sl_price:
+            if low <= sl_price:
                 return sl_price, 'sl'
-            if bar['high'] >= tp_price:
+            if high >= tp_price:
                 return tp_price, 'tp'
         else:
-            if bar['high'] >= sl_price:
+            if high >= sl_price:
                 return sl_price, 'sl'
-            if bar['low'] <= tp_price:
+            if low <= tp_price:
                 return tp_price, 'tp'
     return None, None
 
@@ -131,6 +143,263 @@ class LazyFineData:
         return combined.loc[(combined.index >= start_ts) & (combined.index < end_ts)]
 
 
+@njit
+def _scan_position(highs, lows, closes, start, is_long, entry_price, notional_value,
+                   capital, stop_loss, take_profit, peak_capital, max_drawdown_pct, equity_out, end=-1):
+    """
+    Offene Position ab Kerze start vorspulen: erste Kerze mit Liquidation
+    (Mark-to-Market <= 0) oder SL/TP-Berührung suchen. Für alle Kerzen davor
+    Equity (equity_out[j]) und Peak/Drawdown wie im Backtest-Loop fortschreiben.
+    end: höchstens bis vor diese Kerze scannen (-1 = bis zum Ende).
+    Rückgabe: (Ereignis-Kerze oder end bzw. len(closes), peak_capital, max_drawdown_pct)
+    """
+    pnl_mult = 1 if is_long else -1
+    if end < 0:
+        end = len(closes)
+    for j in range(start, end):
+        mtm_equity = capital + notional_value * (closes[j] / entry_price - 1) * pnl_mult
+        if mtm_equity <= 0:
+            return j, peak_capital, max_drawdown_pct
+        if is_long:
+            hit = lows[j] <= stop_loss or highs[j] >= take_profit
+        else:
+            hit = highs[j] >= stop_loss or lows[j] <= take_profit
+        if hit:
+            return j, peak_capital, max_drawdown_pct
+        equity_out[j] = mtm_equity
+        peak_capital = max(peak_capital, mtm_equity)
+        if peak_capital > 0:
+            drawdown = (peak_capital - mtm_equity) / peak_capital
+            max_drawdown_pct = max(max_drawdown_pct, drawdown)
+    return end, peak_capital, max_drawdown_pct
+
+
+# Felder je Variante und Checkpoint in _simulate_risk_batch (cp_out flach: (checkpoint * K + k) * 4 + Feld)
+_CP_FIELDS = 4  # pnl_pct, trades_count, win_rate, max_drawdown_pct
+
+
+@njit
+def _simulate_risk_batch(highs, lows, closes, atrs, sig_side, sig_level, start_bar, first_bar, start_capital,
+                         rr, atr_mult, min_sl_pct, sl_buffer_pct, risk_pct, costs,
+                         capital, peak, max_dd, trades, wins, active,
+                         pos_side, entry, stop, target, notional, exit_override, use_fine,
+                         checkpoints, cp_next, cp_out):
+    """
+    Backtest-Loop von run_smc_backtest() für K Risiko-Varianten in einem Durchlauf über
+    die Kerzen ab first_bar (Zustand je Variante in den Arrays, in-place fortgeschrieben).
+    sig_side: 1 buy / -1 sell / 0 je Kerze, sig_level: Struktur-Level für den SL (NaN = keins).
+    costs: (fee_pct, slippage_entry_pct, slippage_exit_pct, min_notional, max_notional).
+    Rückgabe: -1 wenn fertig, sonst die Kerze, an der eine Variante SL und TP zugleich
+    berührt und use_fine gesetzt ist — der Aufrufer löst sie per Fein-Daten auf
+    (exit_override[k], NaN = SL-Fallback) und ruft ab dieser Kerze erneut auf.
+    """
+    n_bars = len(closes)
+    n_var = len(rr)
+    fee_pct, slip_entry, slip_exit, min_notional, max_notional = costs[0], costs[1], costs[2], costs[3], costs[4]
+    for i in range(first_bar, n_bars):
+        # Zwischenstände vor Kerze i (nur laufende Varianten, wie run_smc_backtest)
+        while cp_next[0] < len(checkpoints) and i >= checkpoints[cp_next[0]]:
+            base = cp_next[0] * n_var
+            for k in range(n_var):
+                if active[k]:
+                    o = (base + k) * 4
+                    cp_out[o] = (capital[k] - start_capital) / start_capital * 100 if start_capital > 0 else 0.0
+                    cp_out[o + 1] = trades[k]
+                    cp_out[o + 2] = wins[k] / trades[k] * 100 if trades[k] > 0 else 0.0
+                    cp_out[o + 3] = max_dd[k]
+            cp_next[0] += 1
+        if i < start_bar:
+            continue
+
+        if use_fine:
+            for k in range(n_var):
+                if active[k] and pos_side[k] != 0 and exit_override[k] != exit_override[k]:
+                    if pos_side[k] > 0:
+                        both = lows[i] <= stop[k] and highs[i] >= target[k]
+                    else:
+                        both = highs[i] >= stop[k] and lows[i] <= target[k]
+                    if both:
+                        return i
+
+        for k in range(n_var):
+            if not active[k]:
+                continue
+            side = pos_side[k]
+            mtm_equity = capital[k]
+            if side != 0:
+                mtm_equity = capital[k] + notional[k] * (closes[i] / entry[k] - 1) * side
+                if mtm_equity <= 0:
+                    # Liquidation
+                    trades[k] += 1
+                    capital[k] = 0.0
+                    max_dd[k] = 1.0
+                    pos_side[k] = 0
+                    active[k] = False
+                    exit_override[k] = np.nan
+                    continue
+            peak[k] = max(peak[k], mtm_equity)
+            if peak[k] > 0:
+                max_dd[k] = max(max_dd[k], (peak[k] - mtm_equity) / peak[k])
+
+            closed_this_bar = False
+            if side != 0:
+                if side > 0:
+                    sl_hit = lows[i] <= stop[k]
+                    tp_hit = highs[i] >= target[k]
+                else:
+                    sl_hit = highs[i] >= stop[k]
+                    tp_hit = lows[i] <= target[k]
+                exit_price = 0.0
+                if sl_hit and tp_hit:
+                    exit_price = stop[k]
+                    if use_fine and exit_override[k] == exit_override[k]:
+                        exit_price = exit_override[k]
+                    exit_override[k] = np.nan
+                elif sl_hit:
+                    exit_price = stop[k]
+                elif tp_hit:
+                    exit_price = target[k]
+                if exit_price:
+                    pnl_pct = (exit_price / entry[k] - 1) if side > 0 else (1 - exit_price / entry[k])
+                    pnl_usd = notional[k] * pnl_pct
+                    net_trade_cost = notional[k] * fee_pct * 2 + notional[k] * (slip_entry + slip_exit)
+                    capital[k] += (pnl_usd - net_trade_cost)
+                    if capital[k] <= 0:
+                        # Position bleibt offen und wird am Ende wie in run_smc_backtest geschlossen
+                        capital[k] = 0.0
+                        active[k] = False
+                        continue
+                    if (pnl_usd - net_trade_cost) > 0:
+                        wins[k] += 1
+                    trades[k] += 1
+                    pos_side[k] = 0
+                    closed_this_bar = True
+
+            if pos_side[k] != 0 or closed_this_bar or capital[k] <= 0 or sig_side[i] == 0:
+                continue
+            entry_price = closes[i]
+            current_atr = atrs[i]
+            if current_atr != current_atr or current_atr <= 0:
+                continue
+            sl_distance = 0.0
+            level = sig_level[i]
+            if level == level and level != 0:
+                if sig_side[i] > 0:
+                    sl_price = level - entry_price * sl_buffer_pct[k]
+                    if sl_price < entry_price:
+                        sl_distance = entry_price - sl_price
+                else:
+                    sl_price = level + entry_price * sl_buffer_pct[k]
+                    if sl_price > entry_price:
+                        sl_distance = sl_price - entry_price
+            if sl_distance <= 0:
+                sl_distance = max(current_atr * atr_mult[k], entry_price * min_sl_pct[k])
+            sl_distance = max(sl_distance, entry_price * 0.001)
+            if sl_distance <= 0:
+                continue
+            sl_pct = sl_distance / entry_price
+            if sl_pct <= 1e-6:
+                continue
+            target_notional = capital[k] * risk_pct[k] / sl_pct
+            if target_notional < min_notional:
+                target_notional = min_notional
+            final_notional = min(target_notional, max_notional)
+            if final_notional < min_notional:
+                continue
+            pos_side[k] = sig_side[i]
+            entry[k] = entry_price
+            if sig_side[i] > 0:
+                stop[k] = entry_price - sl_distance
+                target[k] = entry_price + sl_distance * rr[k]
+            else:
+                stop[k] = entry_price + sl_distance
+                target[k] = entry_price - sl_distance * rr[k]
+            notional[k] = final_notional
+    return -1
+
+
+def _compute_htf_bias(data, smc_params):
+    """
+    Swing-Bias der höheren Timeframe: (HTF-Open-Zeiten, Bias je HTF-Kerze).
+    Leere Listen wenn kein HTF definiert ist oder zu wenig Daten vorliegen.
+    """
+    _tf = smc_params.get('_timeframe') or _infer_timeframe(data.index)
+    _htf_rule_key = _HTF_MAP.get(_tf)
+    _pd_rule = _PD_RESAMPLE.get(_htf_rule_key) if _htf_rule_key else None
+    if _pd_rule:
+        try:
+            htf_data = data[['open', 'high', 'low', 'close']].resample(_pd_rule).agg(
+                {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
+            ).dropna()
+            if len(htf_data) >= 20:
+                _htf_results = process_dataframe_cached(
+                    htf_data, {'swingsLength': 10, 'closeTrails': False}, smc_params.get('_smc_cache'),
+                    smc_params.get('symbol'), _htf_rule_key)
+                return (list(htf_data.index),
+                        [Bias(code) for code in _htf_results['bar_arrays']['swing_bias'].tolist()])
+        except Exception as _e:
+            print(f"WARNUNG: HTF Bias Vorberechnung fehlgeschlagen: {_e}")
+    return [], []
+
+
+def _market_bias_per_bar(timestamps, htf_bias_times, htf_bias_values):
+    """HTF-Bias je Kerze: letzter abgeschlossener HTF-Balken (bisect - 2), sonst NEUTRAL."""
+    biases = []
+    for timestamp in timestamps:
+        _pos = bisect.bisect_right(htf_bias_times, timestamp) - 2
+        biases.append(htf_bias_values[_pos] if _pos >= 0 else Bias.NEUTRAL)
+    return biases
+
+
+def _ensure_indicators(data, smc_params, start_capital):
+    """
+    ATR/ADX/volume_ma ergänzen (sofern nicht vorberechnet) und Warmup-NaN-Zeilen entfernen.
+    Rückgabe: (data, None) oder (None, Ergebnis-Dict für den Abbruch).
+    """
+    # Wenn ATR/ADX/volume_ma schon vorberechnet in den Daten (vom Optimizer),
+    # überspringen wir die teure Neuberechnung pro Trial.
+    adx_period = smc_params.get('adx_period', 14)
+    volume_ma_period = smc_params.get('volume_ma_period', 20)
+
+    try:
+        missing = [col for col in ('atr', 'adx', 'volume_ma') if col not in data.columns or data[col].isna().all()]
+        if 'adx' in missing:
+            missing += ['adx_pos', 'adx_neg']
+        if missing:
+            for col, values in compute_indicators(data, adx_period, volume_ma_period, columns=missing).items():
+                data[col] = values
+
+        # Ohne NaN-Zeilen bleibt data unverändert — vorberechnete (ggf. read-only) Daten werden nur gelesen
+        if data['atr'].isna().any() or data['adx'].isna().any():
+            data = data.dropna(subset=['atr', 'adx'])
+
+        if data.empty:
+            return None, {"total_pnl_pct": -100, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
+    except Exception as e:
+        print(f"FEHLER bei Indikator-Berechnung: {e}")
+        return None, {"total_pnl_pct": -999, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
+    return data, None
+
+
+def _get_signal_table(tables, structure_index, smc_params, data, timestamps, columns):
+    """
+    CandidateSignalTable je (smc_lookback, adx_period, volume_ma_period, timeframe), in tables
+    gecacht (None = nicht cachen). columns: opens, highs, lows, closes, pd_pcts, pd_zones,
+    bsl_sweeps, ssl_sweeps, volumes, volume_mas, adxs, adx_poss, adx_negs (Listen je Kerze).
+    """
+    smc_lookback = smc_params.get('smc_lookback', 300)
+    table_key = (smc_lookback, smc_params.get('adx_period', 14), smc_params.get('volume_ma_period', 20),
+                 smc_params.get('_timeframe'))
+    signal_table = tables.get(table_key) if tables is not None else None
+    if signal_table is None:
+        htf_times, htf_values = _compute_htf_bias(data, smc_params)
+        signal_table = CandidateSignalTable(structure_index, smc_lookback, *columns,
+                                            _market_bias_per_bar(timestamps, htf_times, htf_values))
+        if tables is not None:
+            signal_table = tables.setdefault(table_key, signal_table)
+    return signal_table
+
+
 def _get_fine_slice(fine_data, start_ts, end_ts):
     if fine_data is None:
         return None
@@ -139,32 +408,47 @@ def _get_fine_slice(fine_data, start_ts, end_ts):
     return fine_data.loc[(fine_data.index >= start_ts) & (fine_data.index < end_ts)]
 
 
-# --- load_data Funktion bleibt unverändert ---
 def load_data(symbol, timeframe, start_date_str, end_date_str):
+    """
+    OHLCV-Kerzen [start, end] aus dem spaltenweisen Kerzen-Cache (data/cache/candles,
+    siehe utils/candle_store.py). Nachgeladen werden nur die Lücken im Cache: fehlender
+    Anfang, fehlende Kerzen mittendrin und das Ende ab der letzten gespeicherten Kerze.
+    """
     global secrets_cache
     data_dir = os.path.join(PROJECT_ROOT, 'data')
     cache_dir = os.path.join(data_dir, 'cache')
     symbol_filename = symbol.replace('/', '-').replace(':', '-')
     cache_file = os.path.join(cache_dir, f"{symbol_filename}_{timeframe}.csv")
+    store = CandleStore(os.path.join(cache_dir, 'candles'))
     try:
         if not os.path.exists(data_dir): os.makedirs(data_dir); print(f"Info: Verzeichnis '{data_dir}' erstellt.")
         os.makedirs(cache_dir, exist_ok=True)
     except OSError as e: print(f"FATAL: Konnte Cache-Verzeichnis '{cache_dir}' nicht erstellen: {e}"); return pd.DataFrame()
 
+    # Alter CSV-Cache → einmalig in den Kerzen-Cache übernehmen
     if os.path.exists(cache_file):
         try:
-            data = pd.read_csv(cache_file, index_col='timestamp', parse_dates=True)
-            data_start = data.index.min(); data_end = data.index.max()
-            req_start = pd.to_datetime(start_date_str, utc=True); req_end = pd.to_datetime(end_date_str, utc=True)
-            if data_start <= req_start and data_end >= req_end:
-                return data.loc[req_start:req_end]
-            else: print(f"Info: Cache für {symbol} {timeframe} nicht aktuell/vollständig. Lade neu.")
+            store.migrate_csv(cache_file, symbol, timeframe)
+            print(f"Info: CSV-Cache für {symbol} {timeframe} in den Kerzen-Cache übernommen.")
         except Exception as e:
-            print(f"WARNUNG: Fehler beim Lesen der Cache-Datei '{cache_file}': {e}. Lade neu.");
+            print(f"WARNUNG: Fehler beim Migrieren der Cache-Datei '{cache_file}': {e}. Lade neu.");
             try: os.remove(cache_file)
             except OSError: pass
 
-    print(f"Starte Download für {symbol} ({timeframe}) von der Börse...")
+    req_start = pd.to_datetime(start_date_str, utc=True); req_end = pd.to_datetime(end_date_str, utc=True)
+    replace = store.manifest(symbol, timeframe) is None
+    try:
+        gaps = store.missing_ranges(symbol, timeframe, req_start, req_end)
+    except Exception as e:
+        print(f"WARNUNG: Fehler beim Lesen des Kerzen-Caches für {symbol} {timeframe}: {e}. Lade neu.")
+        gaps, replace = [(req_start.value, req_end.value + 1)], True
+    if not gaps:
+        return store.read(symbol, timeframe, req_start, req_end)
+
+    if replace:
+        print(f"Starte Download für {symbol} ({timeframe}) von der Börse...")
+    else:
+        print(f"Info: Cache für {symbol} {timeframe} unvollständig. Lade {len(gaps)} fehlende(n) Bereich(e) nach.")
     try:
         if secrets_cache is None:
             with open(os.path.join(PROJECT_ROOT, 'secret.json'), "r") as f: secrets_cache = json.load(f)
@@ -174,53 +458,68 @@ def load_data(symbol, timeframe, start_date_str, end_date_str):
         exchange = Exchange(api_setup)
         if not exchange.markets:
             print("FEHLER: Exchange konnte nicht initialisiert werden."); return pd.DataFrame()
-        full_data = exchange.fetch_historical_ohlcv(symbol, timeframe, start_date_str, end_date_str)
-        if not full_data.empty:
-            try:
-                full_data.to_csv(cache_file);
-                req_start_dt = pd.to_datetime(start_date_str, utc=True); req_end_dt = pd.to_datetime(end_date_str, utc=True)
-                return full_data.loc[req_start_dt:req_end_dt]
-            except Exception as e_save:
-                print(f"FEHLER beim Speichern der Cache-Datei '{cache_file}': {e_save}")
-                req_start_dt = pd.to_datetime(start_date_str, utc=True); req_end_dt = pd.to_datetime(end_date_str, utc=True)
-                return full_data.loc[req_start_dt:req_end_dt]
-        else: return pd.DataFrame()
+
+        # Jede Lücke inkl. der Kerze dahinter laden: kommt die mit, ist die Lücke vollständig abgefragt
+        parts, fetched = [], []
+        for gap_start, gap_end in gaps:
+            part = exchange.fetch_ohlcv_range(symbol, timeframe, gap_start // 1_000_000, gap_end // 1_000_000)
+            if not part.empty:
+                parts.append(part)
+                fetched.append((gap_start, part.index[-1].value))
+        if not parts:
+            return pd.DataFrame() if replace else store.read(symbol, timeframe, req_start, req_end)
+        new_data = pd.concat(parts)
+
+        try:
+            if replace:
+                store.write(symbol, timeframe, new_data)
+            else:
+                store.merge(symbol, timeframe, new_data)
+            # Was jetzt noch fehlt und vor der letzten gelieferten Kerze liegt, hat die Börse nicht
+            empty = [gap for gap in store.missing_ranges(symbol, timeframe, req_start, req_end)
+                     if any(start <= gap[0] and gap[1] <= last for start, last in fetched)]
+            if empty:
+                store.merge(symbol, timeframe, new_data.iloc[:0], empty_ranges=empty)
+        except Exception as e_save:
+            print(f"FEHLER beim Speichern des Kerzen-Caches für {symbol} {timeframe}: {e_save}")
+            combined = new_data if replace else pd.concat([store.read(symbol, timeframe, req_start, req_end), new_data])
+            combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+            return combined.loc[req_start:req_end]
+        return store.read(symbol, timeframe, req_start, req_end)
     except FileNotFoundError: print(f"FEHLER: secret.json nicht gefunden."); return pd.DataFrame()
     except KeyError: print("FEHLER: API-Keys in secret.json nicht gefunden."); return pd.DataFrame()
     except Exception as e: print(f"FEHLER beim Daten-Download: {e}"); import traceback; traceback.print_exc(); return pd.DataFrame()
 
 
-def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=False, bar_index_offset=0, backtest_start_date=None, fine_data=None):
+def smc_structures_for_chart(smc_results, data):
+    """OBs, FVGs und Events eines process_dataframe()-Ergebnisses für Chart/Report ('smc_structures')."""
+    if pd.api.types.is_datetime64_any_dtype(data.index):
+        data_times = data.sort_index().index.astype(np.int64).tolist()
+    else:
+        data_times = list(range(len(data)))
+    return {
+        'order_blocks': smc_results['all_swing_obs'] + smc_results['all_internal_obs'],
+        'fair_value_gaps': smc_results['all_fvgs'],
+        'events': smc_results['events'],
+        'data_times': data_times,
+    }
+
+
+def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=False, bar_index_offset=0, backtest_start_date=None, fine_data=None,
+                     checkpoint_bars=(), on_checkpoint=None):
+    """
+    checkpoint_bars/on_checkpoint: Zwischenstände für Multi-Fidelity-Pruning im Optimizer.
+    Vor Kerze checkpoint_bars[k] wird on_checkpoint(k, stats) mit dem bisherigen Stand
+    aufgerufen (stats: bar, pnl_pct, trades_count, win_rate, max_drawdown_pct); eine
+    Exception aus dem Callback (z.B. optuna.TrialPruned) bricht den Backtest ab.
+    """
     if data.empty or len(data) < 15:
         return {"total_pnl_pct": -100, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
 
     # --- Indikator-Berechnungen ---
-    # Wenn ATR/ADX/volume_ma schon vorberechnet in den Daten (vom Optimizer),
-    # überspringen wir die teure Neuberechnung pro Trial.
-    adx_period = smc_params.get('adx_period', 14)
-    volume_ma_period = smc_params.get('volume_ma_period', 20)
-
-    try:
-        if 'atr' not in data.columns or data['atr'].isna().all():
-            atr_indicator = ta.volatility.AverageTrueRange(high=data['high'], low=data['low'], close=data['close'], window=14)
-            data['atr'] = atr_indicator.average_true_range()
-
-        if 'adx' not in data.columns or data['adx'].isna().all():
-            adx_indicator = ta.trend.ADXIndicator(high=data['high'], low=data['low'], close=data['close'], window=adx_period)
-            data['adx'] = adx_indicator.adx()
-            data['adx_pos'] = adx_indicator.adx_pos()
-            data['adx_neg'] = adx_indicator.adx_neg()
-
-        if 'volume_ma' not in data.columns or data['volume_ma'].isna().all():
-            data['volume_ma'] = data['volume'].rolling(window=volume_ma_period).mean()
-
-        data.dropna(subset=['atr', 'adx'], inplace=True)
-
-        if data.empty:
-            return {"total_pnl_pct": -100, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
-    except Exception as e:
-        print(f"FEHLER bei Indikator-Berechnung: {e}")
-        return {"total_pnl_pct": -999, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0, "end_capital": start_capital}
+    data, failed = _ensure_indicators(data, smc_params, start_capital)
+    if failed is not None:
+        return failed
     
     # --- Parameter und SMC-Engine Setup ---
     risk_reward_ratio = risk_params.get('risk_reward_ratio', 1.5)
@@ -231,60 +530,40 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
     atr_multiplier_sl = risk_params.get('atr_multiplier_sl', 2.0)
     min_sl_pct = risk_params.get('min_sl_pct', 0.5) / 100.0
     structure_sl_buffer_pct = risk_params.get('structure_sl_buffer_pct', 0.2) / 100.0
-    fee_pct            = 0.05 / 100   # 0.05% pro Seite (Bitget)
-    slippage_entry_pct = 0.05 / 100   # 0.05% Entry (SMC-Limit-Orders, konservativ)
-    slippage_exit_pct  = 0.05 / 100   # 0.05% Exit  (Market-Order SL/TP)
+    fee_pct            = FEE_PCT
+    slippage_entry_pct = SLIPPAGE_ENTRY_PCT
+    slippage_exit_pct  = SLIPPAGE_EXIT_PCT
 
-    absolute_max_notional_value = 1000000
+    absolute_max_notional_value = MAX_NOTIONAL_USDT
 
     # SMC-Engine — nutze vorberechnete Ergebnisse wenn vorhanden (Optimizer-Cache)
     precomputed = smc_params.get('_precomputed_smc')
     if precomputed is not None:
         smc_results   = precomputed['smc_results']
         smc_structures = precomputed['smc_structures']
+        structure_index = precomputed.get('structure_index')
     else:
-        engine = SMCEngine(settings=smc_params)
-        smc_results = engine.process_dataframe(data[['open', 'high', 'low', 'close']].copy())
-        smc_structures = {
-            'order_blocks': engine.swingOrderBlocks + engine.internalOrderBlocks,
-            'fair_value_gaps': engine.fairValueGaps,
-            'events': engine.event_log,
-            'data_times': engine.times,
-        }
-
-    # SMC-Spalten (P/D, Sweep-State) in Haupt-Dataframe übertragen
-    enriched_df = smc_results.get('enriched_df')
-    if enriched_df is not None:
-        for col in enriched_df.columns:
-            if col.startswith('smc_'):
-                data[col] = enriched_df[col].values
+        # Optionaler Disk-Cache (smc_params['_smc_cache'], siehe smc_cache.py)
+        smc_results = process_dataframe_cached(
+            data, smc_params, smc_params.get('_smc_cache'),
+            smc_params.get('symbol'), smc_params.get('_timeframe') or smc_params.get('timeframe'))
+        smc_structures = smc_structures_for_chart(smc_results, data)
+        structure_index = None
+    if structure_index is None:
+        structure_index = SMCStructureIndex(smc_results)
+
+    # SMC-Spalten (P/D, Sweep-State) — lokal statt in data geschrieben, damit der
+    # Aufrufer (Optimizer-Trials) keine Kopie seiner Daten übergeben muss
+    smc_cols = smc_columns(smc_results)
 
     # --- HTF Bias Vorberechnung (kein Look-Ahead: bisect auf HTF-Open-Zeiten) ---
+    # Mit Optimizer-Cache wird die Signal-Tabelle genutzt (HTF-Bias steckt schon darin).
     use_mtf_filter = smc_params.get('use_mtf_filter', False)
+    use_signal_table = precomputed is not None
     htf_bias_times  = []  # list[pd.Timestamp]
     htf_bias_values = []  # list[Bias]
-    if use_mtf_filter:
-        _tf = smc_params.get('_timeframe') or _infer_timeframe(data.index)
-        _htf_rule_key = _HTF_MAP.get(_tf)
-        _pd_rule = _PD_RESAMPLE.get(_htf_rule_key) if _htf_rule_key else None
-        if _pd_rule:
-            try:
-                htf_data = data[['open', 'high', 'low', 'close']].resample(_pd_rule).agg(
-                    {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'}
-                ).dropna()
-                if len(htf_data) >= 20:
-                    _htf_engine = SMCEngine(settings={'swingsLength': 10, 'closeTrails': False})
-                    _htf_results = _htf_engine.process_dataframe(htf_data.copy())
-                    _htf_states = _htf_results.get('bar_states', [])
-                    for _ts, _st in zip(htf_data.index, _htf_states):
-                        _bs = _st.get('swing_bias', '')
-                        _bias = (Bias.BULLISH if _bs == 'bullish'
-                                 else Bias.BEARISH if _bs == 'bearish'
-                                 else Bias.NEUTRAL)
-                        htf_bias_times.append(_ts)
-                        htf_bias_values.append(_bias)
-            except Exception as _e:
-                print(f"WARNUNG: HTF Bias Vorberechnung fehlgeschlagen: {_e}")
+    if use_mtf_filter and not use_signal_table:
+        htf_bias_times, htf_bias_values = _compute_htf_bias(data, smc_params)
 
     current_capital = start_capital
     peak_capital = start_capital
@@ -298,6 +577,8 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
     equity_curve = []
 
     params_for_logic = {"strategy": smc_params, "risk": risk_params}
+    signal_params = compile_signal_params(params_for_logic)
+    smc_lookback = smc_params.get('smc_lookback', 300)
 
     # Warmup-Grenze: Kerzen vor diesem Zeitpunkt werden für SMC-Strukturen
     # genutzt aber erzeugen keine Trades (Equity bleibt unverändert).
@@ -306,19 +587,87 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
     # Kerzendauer fuer die Intrabar-Fein-Aufloesung (siehe _resolve_ambiguous_exit)
     coarse_duration = data.index[1] - data.index[0] if len(data.index) >= 2 else None
 
+    # Spalten einmalig als Python-Listen: der Loop arbeitet auf Skalaren statt
+    # pro Kerze eine pandas-Series (iterrows/iloc) zu erzeugen.
+    # Fehlende Spalten bekommen den Default der Signal-Logik.
+    timestamps = data.index.tolist()
+    n_bars = len(timestamps)
+
+    def _column(col, default):
+        if col in smc_cols:
+            return np.asarray(smc_cols[col]).tolist()
+        return data[col].tolist() if col in data.columns else [default] * n_bars
+
+    opens, highs, lows, closes = (data[col].tolist() for col in ('open', 'high', 'low', 'close'))
+    atrs = data['atr'].tolist()
+    volumes, volume_mas = _column('volume', 0), _column('volume_ma', np.nan)
+    adxs, adx_poss, adx_negs = _column('adx', np.nan), _column('adx_pos', np.nan), _column('adx_neg', np.nan)
+    pd_pcts, pd_zones = _column('smc_pd_pct', 0.5), _column('smc_pd_zone', 'equilibrium')
+    bsl_sweeps, ssl_sweeps = _column('smc_recent_bsl_sweep', False), _column('smc_recent_ssl_sweep', False)
+
+    # Kandidaten-Signaltabelle: einmal pro Cache-Eintrag aufgebaut, pro Trial nur Masken
+    signal_table = None
+    if use_signal_table:
+        signal_table = _get_signal_table(
+            precomputed.setdefault('signal_tables', {}), structure_index, smc_params, data, timestamps,
+            (opens, highs, lows, closes, pd_pcts, pd_zones, bsl_sweeps, ssl_sweeps,
+             volumes, volume_mas, adxs, adx_poss, adx_negs))
+        table_sides, table_rows = signal_table.signals(signal_params)
+
+    # Eingaben für _scan_position: float64-Arrays für den kompilierten Kernel,
+    # sonst die Listen (schnellere Einzelzugriffe in reinem Python)
+    if JIT_ENABLED:
+        scan_highs, scan_lows, scan_closes = (np.asarray(col, dtype=np.float64) for col in (highs, lows, closes))
+        scan_equity = np.zeros(n_bars)
+    else:
+        scan_highs, scan_lows, scan_closes = highs, lows, closes
+        scan_equity = [0.0] * n_bars
+    skip_until = 0
+    checkpoints = sorted(checkpoint_bars) if on_checkpoint is not None else []
+    next_checkpoint = 0
+
     # --- Backtest Loop ---
-    for i, (timestamp, current_candle) in enumerate(data.iterrows()):
+    for i, timestamp in enumerate(timestamps):
+        while next_checkpoint < len(checkpoints) and i >= checkpoints[next_checkpoint]:
+            on_checkpoint(next_checkpoint, {
+                'bar': i,
+                'pnl_pct': (current_capital - start_capital) / start_capital * 100 if start_capital > 0 else 0,
+                'trades_count': trades_count,
+                'win_rate': wins_count / trades_count * 100 if trades_count > 0 else 0,
+                'max_drawdown_pct': max_drawdown_pct,
+            })
+            next_checkpoint += 1
+        if i < skip_until: continue
         if current_capital <= 0: break
 
         # Warmup-Phase: kein Trading, SMC-Strukturen werden aufgebaut
         if bt_start_ts and timestamp < bt_start_ts:
             continue
 
+        # Offene Position: Kerzen ohne SL/TP/Liquidation im Kernel vorspulen,
+        # die Ereignis-Kerze selbst läuft normal durch den Loop. Nicht über den
+        # nächsten Checkpoint hinaus — dessen Drawdown darf keine späteren Kerzen enthalten.
+        if position:
+            event_bar, peak_capital, max_drawdown_pct = _scan_position(
+                scan_highs, scan_lows, scan_closes, i, position['side'] == 'long',
+                position['entry_price'], position['notional_value'], float(current_capital),
+                position['stop_loss'], position['take_profit'],
+                float(peak_capital), float(max_drawdown_pct), scan_equity,
+                checkpoints[next_checkpoint] if next_checkpoint < len(checkpoints) else -1)
+            if event_bar > i:
+                equities = scan_equity[i:event_bar]
+                if JIT_ENABLED:
+                    equities = equities.tolist()
+                equity_curve.extend({'timestamp': ts, 'equity': eq}
+                                    for ts, eq in zip(timestamps[i:event_bar], equities))
+                skip_until = event_bar
+                continue
+
         # Mark-to-Market: unrealisierter P&L der offenen Position
         unrealized_pnl = 0.0
         if position:
             pnl_mult = 1 if position['side'] == 'long' else -1
-            unrealized_pnl = position['notional_value'] * (current_candle['close'] / position['entry_price'] - 1) * pnl_mult
+            unrealized_pnl = position['notional_value'] * (closes[i] / position['entry_price'] - 1) * pnl_mult
 
         mtm_equity = current_capital + unrealized_pnl
 
@@ -345,11 +694,11 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
             exit_price = None
             sl, tp = position['stop_loss'], position['take_profit']
             if position['side'] == 'long':
-                sl_hit = current_candle['low'] <= sl
-                tp_hit = current_candle['high'] >= tp
+                sl_hit = lows[i] <= sl
+                tp_hit = highs[i] >= tp
             else:
-                sl_hit = current_candle['high'] >= sl
-                tp_hit = current_candle['low'] <= tp
+                sl_hit = highs[i] >= sl
+                tp_hit = lows[i] <= tp
 
             if sl_hit and tp_hit:
                 # Beide Level in derselben Kerze moeglich -- Reihenfolge unklar
@@ -403,46 +752,39 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
 
         # --- Einstiegs-Logik (max. 1 Trade pro Kerze) ---
         if not position and not closed_this_bar and current_capital > 0:
-            prev_candle = data.iloc[i-1] if i > 0 else None
-
-            # Per-Bar HTF Bias: letzter abgeschlossener HTF-Balken (bisect - 2)
-            market_bias = Bias.NEUTRAL
-            if use_mtf_filter and htf_bias_times:
-                _pos = bisect.bisect_right(htf_bias_times, timestamp) - 2
-                if _pos >= 0:
-                    market_bias = htf_bias_values[_pos]
-
-            # Per-Bar gefilterte SMC-Strukturen (kein Look-Ahead-Bias):
-            # Nur OBs/FVGs die zum Zeitpunkt von Bar i bereits gebildet wurden,
-            # noch nicht mitigiert waren und innerhalb des Live-Bot-Fensters
-            # (letzte 300 Kerzen) liegen — identisch zu fetch_recent_ohlcv(limit=300).
-            _smc_window = smc_params.get('smc_lookback', 300)
-            _window_start = i - _smc_window
-            _all_int_obs   = smc_results.get('all_internal_obs', [])
-            _all_swing_obs = smc_results.get('all_swing_obs', [])
-            _all_fvgs      = smc_results.get('all_fvgs', [])
-            bar_smc = {
-                'unmitigated_internal_obs': [
-                    ob for ob in _all_int_obs
-                    if _window_start <= ob.bar_index <= i and (ob.mitigated_bar == -1 or ob.mitigated_bar > i)
-                ],
-                'unmitigated_swing_obs': [
-                    ob for ob in _all_swing_obs
-                    if _window_start <= ob.bar_index <= i and (ob.mitigated_bar == -1 or ob.mitigated_bar > i)
-                ],
-                'unmitigated_fvgs': [
-                    fvg for fvg in _all_fvgs
-                    if _window_start <= fvg.start_bar_index <= i and (fvg.mitigated_bar == -1 or fvg.mitigated_bar > i)
-                ],
-                'liquidity_levels': smc_results.get('liquidity_levels', []),
-                'enriched_df': smc_results.get('enriched_df'),
-            }
-
-            side, _, signal_context = get_titan_signal(bar_smc, current_candle, params=params_for_logic, market_bias=market_bias, prev_candle=prev_candle)
+            if signal_table is not None:
+                side, signal_context = None, None
+                if table_sides[i]:
+                    side = 'buy' if table_sides[i] > 0 else 'sell'
+                    signal_context = signal_table.context(table_rows[i])
+            else:
+                # Per-Bar HTF Bias: letzter abgeschlossener HTF-Balken (bisect - 2)
+                market_bias = Bias.NEUTRAL
+                if use_mtf_filter and htf_bias_times:
+                    _pos = bisect.bisect_right(htf_bias_times, timestamp) - 2
+                    if _pos >= 0:
+                        market_bias = htf_bias_values[_pos]
+
+                # Per-Bar gefilterte SMC-Strukturen (kein Look-Ahead-Bias):
+                # Nur OBs/FVGs die zum Zeitpunkt von Bar i bereits gebildet wurden,
+                # noch nicht mitigiert waren und innerhalb des Live-Bot-Fensters
+                # (letzte 300 Kerzen) liegen — identisch zu fetch_recent_ohlcv(limit=300).
+                # Abfrage über den Intervall-Index statt Full-Scan aller Strukturen.
+                bar_smc = structure_index.query(i, smc_lookback)
+
+                side, _, signal_context = titan_signal(
+                    signal_params, opens[i], highs[i], lows[i], closes[i],
+                    bar_smc['unmitigated_fvgs'], bar_smc['unmitigated_internal_obs'], bar_smc['unmitigated_swing_obs'],
+                    market_bias,
+                    pd_pct=pd_pcts[i], pd_zone=pd_zones[i],
+                    recent_bsl_sweep=bsl_sweeps[i], recent_ssl_sweep=ssl_sweeps[i],
+                    volume=volumes[i], volume_ma=volume_mas[i],
+                    adx=adxs[i], adx_pos=adx_poss[i], adx_neg=adx_negs[i],
+                )
 
             if side:
-                entry_price = current_candle['close']
-                current_atr = current_candle.get('atr')
+                entry_price = closes[i]
+                current_atr = atrs[i]
                 if pd.isna(current_atr) or current_atr <= 0: continue
 
                 # --- SL: Struktur-basiert (wie Live-Bot), dann ATR-Fallback ---
@@ -480,7 +822,6 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
                 if sl_pct <= 1e-6: continue
 
                 target_notional = risk_amount_usd / sl_pct
-                MIN_NOTIONAL_USDT = 5.0
                 if target_notional < MIN_NOTIONAL_USDT:
                     target_notional = MIN_NOTIONAL_USDT
                 eff_leverage = target_notional / current_capital
@@ -501,8 +842,7 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
 
     # --- Offene Position am Backtest-Ende schließen (letzter bekannter Schlusskurs) ---
     if position and len(data) > 0:
-        last_candle = data.iloc[-1]
-        last_price = last_candle['close']
+        last_price = closes[-1]
         pnl_pct = (last_price / position['entry_price'] - 1) if position['side'] == 'long' else (1 - last_price / position['entry_price'])
         pnl_usd = position['notional_value'] * pnl_pct
         total_fees = position['notional_value'] * fee_pct * 2
@@ -554,3 +894,160 @@ def run_smc_backtest(data, smc_params, risk_params, start_capital=1000, verbose=
         "equity_curve": equity_curve,  # NEU: Für Visualisierung
         "smc_structures": smc_structures  # NEU: OBs, FVGs, Events für Chart
     }
+
+
+def run_smc_backtest_batch(data, smc_params, risk_params_list, start_capital=1000, backtest_start_date=None,
+                           fine_data=None, checkpoint_bars=()):
+    """
+    run_smc_backtest() für K Risiko-Parametersätze auf demselben Signalstrom.
+
+    Die Signale hängen nur von smc_params ab; die Risiko-Parameter (risk_reward_ratio,
+    atr_multiplier_sl, min_sl_pct, structure_sl_buffer_pct, risk_per_trade_pct)
+    bestimmen nur SL/TP und Positionsgröße. Die Signale werden daher einmal aus der
+    Kandidaten-Signaltabelle gelesen, die K Equity-Pfade laufen in einem Durchlauf über
+    die Kerzen (_simulate_risk_batch). Hebel-Grenzen ändern den PnL nicht (nur die Margin).
+
+    Rückgabe: Liste mit einem Dict je Risiko-Satz (total_pnl_pct, trades_count, win_rate,
+    max_drawdown_pct, end_capital — identisch zu run_smc_backtest, aber ohne trades_list/
+    equity_curve/smc_structures) plus 'checkpoints': Stats je erreichtem checkpoint_bars-Eintrag
+    (wie on_checkpoint in run_smc_backtest; endet, wenn die Variante vorher ausgestoppt wurde).
+    """
+    n_var = len(risk_params_list)
+    if data.empty or len(data) < 15:
+        return [{"total_pnl_pct": -100, "trades_count": 0, "win_rate": 0, "max_drawdown_pct": 1.0,
+                 "end_capital": start_capital, "checkpoints": []} for _ in range(n_var)]
+    data, failed = _ensure_indicators(data, smc_params, start_capital)
+    if failed is not None:
+        return [dict(failed, checkpoints=[]) for _ in range(n_var)]
+
+    precomputed = smc_params.get('_precomputed_smc')
+    if precomputed is not None:
+        smc_results = precomputed['smc_results']
+        structure_index = precomputed.get('structure_index')
+        tables = precomputed.setdefault('signal_tables', {})
+    else:
+        smc_results = process_dataframe_cached(
+            data, smc_params, smc_params.get('_smc_cache'),
+            smc_params.get('symbol'), smc_params.get('_timeframe') or smc_params.get('timeframe'))
+        structure_index = None
+        tables = None
+    if structure_index is None:
+        structure_index = SMCStructureIndex(smc_results)
+    smc_cols = smc_columns(smc_results)
+
+    timestamps = data.index.tolist()
+    n_bars = len(timestamps)
+
+    def _column(col, default):
+        if col in smc_cols:
+            return np.asarray(smc_cols[col]).tolist()
+        return data[col].tolist() if col in data.columns else [default] * n_bars
+
+    opens, highs, lows, closes = (data[col].tolist() for col in ('open', 'high', 'low', 'close'))
+    signal_table = _get_signal_table(
+        tables, structure_index, smc_params, data, timestamps,
+        (opens, highs, lows, closes, _column('smc_pd_pct', 0.5), _column('smc_pd_zone', 'equilibrium'),
+         _column('smc_recent_bsl_sweep', False), _column('smc_recent_ssl_sweep', False),
+         _column('volume', 0), _column('volume_ma', np.nan),
+         _column('adx', np.nan), _column('adx_pos', np.nan), _column('adx_neg', np.nan)))
+    signal_params = compile_signal_params({"strategy": smc_params, "risk": risk_params_list[0] if n_var else {}})
+    table_sides, table_rows = signal_table.signals(signal_params)
+
+    # Signalstrom: Seite und SL-Struktur-Level je Kerze (level_low für Longs, level_high für Shorts)
+    sig_level = np.full(n_bars, np.nan)
+    for i in np.flatnonzero(table_sides).tolist():
+        context = signal_table.context(table_rows[i])
+        level = context.get('level_low') if table_sides[i] > 0 else context.get('level_high')
+        if level:
+            sig_level[i] = level
+
+    def _risk(key, default, scale=1.0):
+        return np.array([rp.get(key, default) / scale for rp in risk_params_list], dtype=np.float64)
+
+    rr, atr_mult = _risk('risk_reward_ratio', 1.5), _risk('atr_multiplier_sl', 2.0)
+    min_sl_pct, sl_buffer_pct = _risk('min_sl_pct', 0.5, 100.0), _risk('structure_sl_buffer_pct', 0.2, 100.0)
+    risk_pct = _risk('risk_per_trade_pct', 1.0, 100.0)
+    costs = np.array([FEE_PCT, SLIPPAGE_ENTRY_PCT, SLIPPAGE_EXIT_PCT, MIN_NOTIONAL_USDT, MAX_NOTIONAL_USDT],
+                     dtype=np.float64)
+
+    capital, peak = np.full(n_var, float(start_capital)), np.full(n_var, float(start_capital))
+    max_dd = np.zeros(n_var)
+    trades, wins = np.zeros(n_var, dtype=np.int64), np.zeros(n_var, dtype=np.int64)
+    active = np.ones(n_var, dtype=np.bool_)
+    pos_side = np.zeros(n_var, dtype=np.int64)
+    entry, stop, target, notional = (np.zeros(n_var) for _ in range(4))
+    exit_override = np.full(n_var, np.nan)
+    checkpoints = np.array(sorted(checkpoint_bars), dtype=np.int64)
+    cp_next = np.zeros(1, dtype=np.int64)
+    cp_out = np.full(len(checkpoints) * n_var * _CP_FIELDS, np.nan)
+
+    start_bar = 0
+    if backtest_start_date:
+        start_bar = int(data.index.searchsorted(pd.Timestamp(backtest_start_date, tz='UTC')))
+    coarse_duration = data.index[1] - data.index[0]
+    use_fine = fine_data is not None
+    high_arr, low_arr, close_arr = (np.asarray(col, dtype=np.float64) for col in (highs, lows, closes))
+    atr_arr = data['atr'].to_numpy(dtype=np.float64)
+    sig_side = np.asarray(table_sides, dtype=np.int64)
+
+    bar = 0
+    while True:
+        bar = _simulate_risk_batch(high_arr, low_arr, close_arr, atr_arr, sig_side, sig_level, start_bar, bar,
+                                   float(start_capital), rr, atr_mult, min_sl_pct, sl_buffer_pct, risk_pct, costs,
+                                   capital, peak, max_dd, trades, wins, active,
+                                   pos_side, entry, stop, target, notional, exit_override, use_fine,
+                                   checkpoints, cp_next, cp_out)
+        if bar < 0:
+            break
+        # SL und TP in derselben Kerze: Reihenfolge per Fein-Daten (sonst SL-first)
+        fine_slice = _get_fine_slice(fine_data, timestamps[bar], timestamps[bar] + coarse_duration)
+        for k in range(n_var):
+            if not active[k] or pos_side[k] == 0 or not np.isnan(exit_override[k]):
+                continue
+            if pos_side[k] > 0:
+                both_hit = lows[bar] <= stop[k] and highs[bar] >= target[k]
+            else:
+                both_hit = highs[bar] >= stop[k] and lows[bar] <= target[k]
+            if both_hit:
+                exit_price, _ = _resolve_ambiguous_exit(fine_slice, stop[k], target[k],
+                                                        'long' if pos_side[k] > 0 else 'short')
+                exit_override[k] = stop[k] if exit_price is None else exit_price
+
+    results = []
+    cp_stats = cp_out.reshape(len(checkpoints), n_var, _CP_FIELDS) if n_var else cp_out
+    for k in range(n_var):
+        current_capital = float(capital[k])
+        trades_count, wins_count = int(trades[k]), int(wins[k])
+        drawdown_max = float(max_dd[k])
+        # Offene Position am Ende schließen (letzter Schlusskurs) — wie run_smc_backtest
+        if pos_side[k] != 0:
+            last_price = closes[-1]
+            pnl_pct = (last_price / entry[k] - 1) if pos_side[k] > 0 else (1 - last_price / entry[k])
+            pnl_usd = notional[k] * pnl_pct
+            net_pnl = pnl_usd - notional[k] * FEE_PCT * 2 - notional[k] * (SLIPPAGE_ENTRY_PCT + SLIPPAGE_EXIT_PCT)
+            current_capital += net_pnl
+            if current_capital <= 0:
+                current_capital = 0
+            elif net_pnl > 0:
+                wins_count += 1
+            trades_count += 1
+            mtm_equity = max(0.0, current_capital)
+            peak_capital = max(float(peak[k]), mtm_equity)
+            if peak_capital > 0:
+                drawdown_max = max(drawdown_max, (peak_capital - mtm_equity) / peak_capital)
+        checkpoint_stats = []
+        for c, cp_bar in enumerate(checkpoints.tolist()):
+            pnl, n_trades, win_rate, dd = cp_stats[c, k].tolist()
+            if pnl != pnl:
+                break
+            checkpoint_stats.append({'bar': max(cp_bar, 0), 'pnl_pct': pnl, 'trades_count': int(n_trades),
+                                     'win_rate': win_rate, 'max_drawdown_pct': dd})
+        results.append({
+            "total_pnl_pct": ((current_capital - start_capital) / start_capital) * 100 if start_capital > 0 else 0,
+            "trades_count": trades_count,
+            "win_rate": (wins_count / trades_count * 100) if trades_count > 0 else 0,
+            "max_drawdown_pct": drawdown_max,
+            "end_capital": max(0, current_capital),
+            "checkpoints": checkpoint_stats,
+        })
+    return results
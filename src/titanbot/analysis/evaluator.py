@@ -53,7 +53,7 @@ def evaluate_dataset(data: pd.DataFrame, timeframe: str):
     try:
         # Lasse die SMC-Engine laufen, um Events zu finden
         engine = SMCEngine(settings={'swingsLength': 20}) # Kurze Länge für Event-Findung
-        results = engine.process_dataframe(data.copy())
+        results = engine.process_dataframe(data, bar_state_format='arrays')
         event_count = len(results.get('events', []))
         
         # Berechne Events pro 1000 Kerzen
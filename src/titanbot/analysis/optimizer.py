@@ -17,8 +17,11 @@ warnings.filterwarnings('ignore', category=UserWarning, module='keras')
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
-from titanbot.analysis.backtester import load_data, run_smc_backtest, FINE_TF_MAP, LazyFineData
+from titanbot.analysis.backtester import load_data, run_smc_backtest, run_smc_backtest_batch, smc_structures_for_chart, FINE_TF_MAP, LazyFineData
 from titanbot.analysis.evaluator import evaluate_dataset
+from titanbot.utils.frame_bundle import publish_frame, attach_frame
+from titanbot.utils.indicators import INDICATOR_COLUMNS, compute_indicators
+from titanbot.strategy.smc_cache import SMCDiskCache, default_cache, process_dataframe_cached
 
 optuna.logging.set_verbosity(optuna.logging.WARNING)
 
@@ -27,7 +30,15 @@ TF_LOOKBACK_DAYS = {'5m': 60, '15m': 60, '30m': 365, '1h': 365,
                     '2h': 730, '4h': 730, '6h': 730, '1d': 1095}
 
 import math
+import queue
+import shutil
+import sqlite3
+import tempfile
+import time
+import multiprocessing
+from multiprocessing.connection import wait as _wait_sentinels
 import threading as _threading
+from dataclasses import dataclass
 
 HISTORICAL_DATA = None
 FINE_DATA = None  # feinere Kerzen fuer SL/TP-Intrabar-Reihenfolgen-Aufloesung (oraclebot-Muster)
@@ -42,6 +53,10 @@ _SMC_TRAIN_CACHE: dict = {}
 _SMC_TRAIN_CACHE_LOCK = _threading.Lock()
 _SMC_TEST_CACHE: dict = {}
 _SMC_TEST_CACHE_LOCK  = _threading.Lock()
+SMC_DISK_CACHE = None  # SMCDiskCache oder None (aus)
+TRAIN_CHUNKS = 4        # Train-Abschnitte für trial.report (1 = kein Zwischen-Pruning)
+PRUNER = 'hyperband'
+RISK_BATCH = 1          # Trials je ask/tell-Batch mit gemeinsamen Strategie-Parametern (1 = study.optimize)
 
 CONFIG_SUFFIX = ""
 MAX_DRAWDOWN_CONSTRAINT = 0.30
@@ -60,17 +75,15 @@ def _get_smc_precomputed(cache, cache_lock, data, smc_params):
     with cache_lock:
         _precomputed = cache.get(_cache_key)
     if _precomputed is None:
-        from titanbot.strategy.smc_engine import SMCEngine as _SMCEng
-        _eng = _SMCEng(settings=smc_params)
-        _smc_res = _eng.process_dataframe(data[['open', 'high', 'low', 'close']].copy())
+        from titanbot.strategy.smc_index import SMCStructureIndex
+        # Optionaler Disk-Cache (--smc_cache / TITANBOT_SMC_CACHE=1): überlebt Tasks und Runs
+        _smc_res = process_dataframe_cached(data, smc_params, SMC_DISK_CACHE,
+                                            smc_params.get('symbol'), smc_params.get('timeframe'))
         _precomputed = {
             'smc_results': _smc_res,
-            'smc_structures': {
-                'order_blocks': _eng.swingOrderBlocks + _eng.internalOrderBlocks,
-                'fair_value_gaps': _eng.fairValueGaps,
-                'events': _eng.event_log,
-                'data_times': _eng.times,
-            },
+            'smc_structures': smc_structures_for_chart(_smc_res, data),
+            # Intervall-Index der Strukturen: einmal pro Cache-Key, von allen Trials geteilt
+            'structure_index': SMCStructureIndex(_smc_res),
         }
         # smc_results already contains all_swing_obs/all_internal_obs/all_fvgs
         # (added by SMCEngine.process_dataframe) — no extra storage needed
@@ -79,7 +92,101 @@ def _get_smc_precomputed(cache, cache_lock, data, smc_params):
     return _precomputed
 
 
-def objective(trial):
+# Vom Optimizer gesuchte Parameter (Namen wie in objective / config_*.json)
+_STRATEGY_SEARCH_KEYS = ('swingsLength', 'ob_mitigation', 'use_adx_filter', 'adx_threshold', 'liquidity_lookback',
+                         'min_fvg_size_pct', 'min_ob_quality', 'max_ob_touches', 'use_mtf_filter')
+_RISK_SEARCH_KEYS = ('risk_reward_ratio', 'min_leverage', 'max_leverage', 'atr_multiplier_sl',
+                     'trailing_stop_activation_rr', 'trailing_stop_callback_rate_pct')
+
+
+def _trial_data(df):
+    """
+    Daten für einen Trial-Backtest. Mit vorberechneten Indikatoren liest
+    run_smc_backtest die Daten nur — dann keine Kopie pro Trial (und im
+    Prozess-Modus bleiben die read-only Bundle-Views geteilt).
+    """
+    if all(col in df.columns for col in INDICATOR_COLUMNS):
+        return df
+    return df.copy()
+
+
+def _train_progress_score(stats, min_trades):
+    """
+    Zwischenwert für trial.report(): Composite Score (ohne Test-Teil) auf dem
+    bisherigen Train-Stand. Nur innerhalb desselben Schritts vergleichbar.
+    """
+    pnl, dd, trades = stats['pnl_pct'], stats['max_drawdown_pct'], stats['trades_count']
+    score = math.log1p(max(0, pnl)) / max(dd * 100, 1.0)
+    trade_ratio = trades / max(min_trades, 1)
+    trade_bonus = math.log1p(trades) * 6.0 + math.log1p(max(0, trade_ratio - 1.0)) * 3.0
+    wr_bonus = max(0.0, (stats['win_rate'] - 40.0) / 10.0)
+    return score + trade_bonus + wr_bonus
+
+
+def _make_pruner(name: str, n_chunks: int):
+    """Optuna-Pruner für --pruner; Ressource = Anzahl Train-Abschnitte."""
+    if name == 'none' or n_chunks <= 1:
+        return optuna.pruners.NopPruner()
+    if name == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+    return optuna.pruners.HyperbandPruner(min_resource=1, max_resource=n_chunks, reduction_factor=3)
+
+
+# Storage-Angaben sind Strings (picklebar für spawn-Worker); _make_storage() baut daraus die Storage
+_JOURNAL_PREFIX = 'journal:'
+
+
+def _storage_spec(backend: str, db_dir: str) -> str:
+    """
+    sqlite: gemeinsame SQLite-DB im WAL-Modus (Leser blockieren Schreiber nicht mehr).
+    journal: Optuna-JournalStorage auf einer append-only Log-Datei — Trials werden als
+    Log-Einträge angehängt statt in DB-Transaktionen unter einem globalen Schreib-Lock.
+    """
+    os.makedirs(db_dir, exist_ok=True)
+    if backend == 'journal':
+        return _JOURNAL_PREFIX + os.path.join(db_dir, 'optuna_studies_smc.journal')
+    db_file = os.path.join(db_dir, 'optuna_studies_smc.db')
+    _enable_sqlite_wal(db_file)
+    return f"sqlite:///{db_file}?timeout=60"
+
+
+def _enable_sqlite_wal(db_file: str):
+    """journal_mode=WAL wird in der DB-Datei gespeichert und gilt damit für alle Verbindungen."""
+    try:
+        con = sqlite3.connect(db_file, timeout=60)
+        try:
+            con.execute('PRAGMA journal_mode=WAL')
+        finally:
+            con.close()
+    except sqlite3.Error as e:
+        print(f"Warnung: WAL-Modus für {db_file} nicht aktivierbar ({e}).")
+
+
+def _make_storage(spec: str):
+    """Optuna-Storage zu einer Angabe aus _storage_spec() (RDB-URLs gehen unverändert an Optuna)."""
+    if spec.startswith(_JOURNAL_PREFIX):
+        from optuna.storages import JournalStorage
+        from optuna.storages.journal import JournalFileBackend
+        return JournalStorage(JournalFileBackend(spec[len(_JOURNAL_PREFIX):]))
+    return spec
+
+
+def _saved_config_params(config_path: str) -> dict:
+    """Trial-Parameter aus einer gespeicherten config_*.json (für enqueue_trial), sonst {}."""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    params = {}
+    for section, keys in (('strategy', _STRATEGY_SEARCH_KEYS), ('risk', _RISK_SEARCH_KEYS)):
+        values = config.get(section, {})
+        params.update({key: values[key] for key in keys if key in values})
+    return params
+
+
+def _suggest_params(trial):
+    """Suchraum: (smc_params, risk_params) eines Trials."""
     smc_params = {
         'swingsLength': trial.suggest_int('swingsLength', 15, 60),
         'ob_mitigation': trial.suggest_categorical('ob_mitigation', ['High/Low', 'Close']),
@@ -107,32 +214,54 @@ def objective(trial):
         'trailing_stop_activation_rr': trial.suggest_float('trailing_stop_activation_rr', 1.0, 3.5),
         'trailing_stop_callback_rate_pct': trial.suggest_float('trailing_stop_callback_rate_pct', 0.5, 2.5),
     }
+    return smc_params, risk_params
 
-    # Proportionale Mindest-Trades: MIN_TRADES_PER_YEAR skaliert auf die tatsächliche Datenlänge
+
+def _min_trades():
+    """Proportionale Mindest-Trades: MIN_TRADES_PER_YEAR skaliert auf die tatsächliche Datenlänge."""
     train_days = max(1, (TRAIN_DATA.index[-1] - TRAIN_DATA.index[0]).days)
     test_days  = max(1, (TEST_DATA.index[-1]  - TEST_DATA.index[0]).days)
     min_train_trades = max(2, int(MIN_TRADES_PER_YEAR * train_days / 365))
     min_test_trades  = max(1, int(MIN_TRADES_PER_YEAR * test_days  / 365))
+    return min_train_trades, min_test_trades
 
-    # ── STUFE 1: TRAIN-Backtest (70% der Daten) — leichtes Pruning ──────────
-    smc_params['_precomputed_smc'] = _get_smc_precomputed(
-        _SMC_TRAIN_CACHE, _SMC_TRAIN_CACHE_LOCK, TRAIN_DATA, smc_params)
 
-    train_result = run_smc_backtest(TRAIN_DATA.copy(), smc_params, risk_params, START_CAPITAL, verbose=False, fine_data=FINE_DATA)
+def _train_checkpoints(n_chunks):
+    return [len(TRAIN_DATA) * k // n_chunks for k in range(1, n_chunks)]
+
+
+def _check_train_checkpoint(trial, step, stats, min_train_trades):
+    """Zwischenstand nach Train-Abschnitt step an den Pruner melden; TrialPruned wenn aussichtslos."""
+    # Max-DD wächst nur — Überschreitung schon im Abschnitt ist endgültig
+    if stats['max_drawdown_pct'] > MAX_DRAWDOWN_CONSTRAINT:
+        raise optuna.exceptions.TrialPruned()
+    fraction = stats['bar'] / len(TRAIN_DATA)
+    trial.report(_train_progress_score(stats, min_train_trades * fraction), step + 1)
+    if trial.should_prune():
+        raise optuna.exceptions.TrialPruned()
+
+
+def _check_train_result(trial, train_result, min_train_trades, n_chunks):
+    """Train-Gates und letzter Pruner-Schritt; Rückgabe (train_pnl, train_dd, train_trades)."""
     train_pnl    = train_result.get('total_pnl_pct', -1000)
     train_dd     = train_result.get('max_drawdown_pct', 1.0)
     train_trades = train_result.get('trades_count', 0)
 
     if train_trades < min_train_trades or train_dd > MAX_DRAWDOWN_CONSTRAINT:
         raise optuna.exceptions.TrialPruned()
+    if n_chunks > 1:
+        trial.report(_train_progress_score({'pnl_pct': train_pnl, 'max_drawdown_pct': train_dd,
+                                            'trades_count': train_trades,
+                                            'win_rate': train_result.get('win_rate', 0)}, min_train_trades),
+                     n_chunks)
+        if trial.should_prune():
+            raise optuna.exceptions.TrialPruned()
+    return train_pnl, train_dd, train_trades
 
-    # ── STUFE 2: TEST-Backtest (30% der Daten) — strenges Pruning ───────────
-    smc_params['_precomputed_smc'] = _get_smc_precomputed(
-        _SMC_TEST_CACHE, _SMC_TEST_CACHE_LOCK, TEST_DATA, smc_params)
 
-    test_result  = run_smc_backtest(
-        TEST_DATA.copy(), smc_params, risk_params, START_CAPITAL,
-        verbose=False, bar_index_offset=TRAIN_SPLIT_IDX, fine_data=FINE_DATA)
+def _score_trial(trial, train, test_result, min_test_trades):
+    """Test-Gates, kombinierter Score und User-Attribute; Rückgabe des Scores."""
+    train_pnl, train_dd, _ = train
     test_pnl     = test_result.get('total_pnl_pct', -1000)
     test_dd      = test_result.get('max_drawdown_pct', 1.0)
     test_trades  = test_result.get('trades_count', 0)
@@ -166,8 +295,757 @@ def objective(trial):
 
     return final_score
 
+
+def objective(trial):
+    smc_params, risk_params = _suggest_params(trial)
+    min_train_trades, min_test_trades = _min_trades()
+
+    # ── STUFE 1: TRAIN-Backtest (70% der Daten) — leichtes Pruning ──────────
+    smc_params['_precomputed_smc'] = _get_smc_precomputed(
+        _SMC_TRAIN_CACHE, _SMC_TRAIN_CACHE_LOCK, TRAIN_DATA, smc_params)
+
+    # Multi-Fidelity: Zwischenstände nach jedem Train-Abschnitt an den Pruner melden
+    n_chunks = max(1, TRAIN_CHUNKS)
+
+    def _train_checkpoint(step, stats):
+        _check_train_checkpoint(trial, step, stats, min_train_trades)
+
+    train_result = run_smc_backtest(
+        _trial_data(TRAIN_DATA), smc_params, risk_params, START_CAPITAL, verbose=False, fine_data=FINE_DATA,
+        checkpoint_bars=_train_checkpoints(n_chunks),
+        on_checkpoint=_train_checkpoint if n_chunks > 1 else None)
+    train = _check_train_result(trial, train_result, min_train_trades, n_chunks)
+
+    # ── STUFE 2: TEST-Backtest (30% der Daten) — strenges Pruning ───────────
+    smc_params['_precomputed_smc'] = _get_smc_precomputed(
+        _SMC_TEST_CACHE, _SMC_TEST_CACHE_LOCK, TEST_DATA, smc_params)
+
+    test_result  = run_smc_backtest(
+        _trial_data(TEST_DATA), smc_params, risk_params, START_CAPITAL,
+        verbose=False, bar_index_offset=TRAIN_SPLIT_IDX, fine_data=FINE_DATA)
+    return _score_trial(trial, train, test_result, min_test_trades)
+
+
+def objective_batch(trials: list) -> list:
+    """
+    objective() für mehrere Trials (ask/tell). Trials mit identischen Strategie-Parametern
+    teilen sich den Signalstrom: ihre Risiko-Varianten laufen gemeinsam durch
+    run_smc_backtest_batch() — erst Train für alle, dann Test für die nicht geprunten.
+    Rückgabe je Trial: Score oder die Exception (TrialPruned bzw. Fehler).
+    """
+    min_train_trades, min_test_trades = _min_trades()
+    n_chunks = max(1, TRAIN_CHUNKS)
+    outcomes = [None] * len(trials)
+    groups = {}
+    for pos, trial in enumerate(trials):
+        smc_params, risk_params = _suggest_params(trial)
+        groups.setdefault(tuple(sorted(smc_params.items())), []).append((pos, trial, risk_params))
+
+    for key, members in groups.items():
+        smc_params = dict(key)
+        try:
+            smc_params['_precomputed_smc'] = _get_smc_precomputed(
+                _SMC_TRAIN_CACHE, _SMC_TRAIN_CACHE_LOCK, TRAIN_DATA, smc_params)
+            train_results = run_smc_backtest_batch(
+                _trial_data(TRAIN_DATA), smc_params, [risk for _, _, risk in members], START_CAPITAL,
+                fine_data=FINE_DATA, checkpoint_bars=_train_checkpoints(n_chunks) if n_chunks > 1 else ())
+            survivors = []
+            for (pos, trial, risk_params), train_result in zip(members, train_results):
+                try:
+                    for step, stats in enumerate(train_result['checkpoints']):
+                        _check_train_checkpoint(trial, step, stats, min_train_trades)
+                    train = _check_train_result(trial, train_result, min_train_trades, n_chunks)
+                    survivors.append((pos, trial, risk_params, train))
+                except optuna.exceptions.TrialPruned as e:
+                    outcomes[pos] = e
+            if not survivors:
+                continue
+
+            smc_params['_precomputed_smc'] = _get_smc_precomputed(
+                _SMC_TEST_CACHE, _SMC_TEST_CACHE_LOCK, TEST_DATA, smc_params)
+            test_results = run_smc_backtest_batch(
+                _trial_data(TEST_DATA), smc_params, [risk for _, _, risk, _ in survivors], START_CAPITAL,
+                fine_data=FINE_DATA)
+            for (pos, trial, _, train), test_result in zip(survivors, test_results):
+                try:
+                    outcomes[pos] = _score_trial(trial, train, test_result, min_test_trades)
+                except optuna.exceptions.TrialPruned as e:
+                    outcomes[pos] = e
+        except Exception as e:
+            for pos, _, _ in members:
+                if outcomes[pos] is None:
+                    outcomes[pos] = e
+    return outcomes
+
+
+def _optimize_batched(study, n_trials: int, batch_size: int, callbacks=(), max_total_trials: int = None):
+    """
+    ask/tell-Schleife für --risk_batch: je Batch ein Strategie-Parametersatz (vom Sampler)
+    und batch_size Trials, deren Risiko-Parameter der Sampler bei festen Strategie-Parametern
+    zieht (enqueue_trial mit Teil-Parametern). objective_batch() wertet sie gemeinsam aus.
+    max_total_trials: wie MaxTrialsCallback der Worker (alle Trials der Study, inkl. laufender).
+    """
+    done = 0
+    while done < n_trials:
+        size = min(batch_size, n_trials - done)
+        if max_total_trials is not None:
+            size = min(size, max_total_trials - len(study.get_trials(deepcopy=False)))
+            if size <= 0:
+                break
+        first = study.ask()
+        _suggest_params(first)
+        fixed = {key: first.params[key] for key in _STRATEGY_SEARCH_KEYS if key in first.params}
+        trials = [first]
+        for _ in range(size - 1):
+            study.enqueue_trial(fixed)
+            trials.append(study.ask())
+
+        error = None
+        for trial, outcome in zip(trials, objective_batch(trials)):
+            if isinstance(outcome, optuna.exceptions.TrialPruned):
+                frozen = study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+            elif isinstance(outcome, Exception):
+                frozen = study.tell(trial, state=optuna.trial.TrialState.FAIL)
+                error = error or outcome
+            else:
+                frozen = study.tell(trial, outcome)
+            for callback in callbacks:
+                callback(study, frozen)
+        if error is not None:
+            raise error
+        done += size
+
+
+class _ProgressReporter:
+    """
+    Fortschritt eines Tasks: PROGRESS-Zeile in logs/optimizer_output.log, Status-JSON
+    und ASCII-Fortschrittsbalken. Im Thread-Modus als Optuna-Callback nach jedem Trial,
+    im Prozess-Modus per poll() mit den Trial-Meldungen der Worker (siehe
+    _TrialQueueCallback) — so schreibt immer nur ein Prozess Log und Status.
+    Zähler und bester Trial werden inkrementell aus den gemeldeten Trials geführt,
+    die Storage wird dafür nicht erneut gelesen (prior_best: bester Trial früherer
+    Runs als (value, number, test_pnl)).
+    Laufen mehrere Paare gleichzeitig, teilen sich ihre Reporter ein board (Dict):
+    das Status-JSON enthält dann zusätzlich alle Paare unter 'pairs', und der
+    Balken wird zeilenweise statt per \r gedruckt.
+    """
+
+    def __init__(self, symbol, timeframe, n_trials, progress_log, status_file, start_time,
+                 board: dict = None, prior_best: tuple = None):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.n_trials = n_trials
+        self.progress_log = progress_log
+        self.status_file = status_file
+        self.start_time = start_time
+        self.board = board
+        self.trials_done = 0               # in diesem Run abgeschlossene Trials (inkl. pruned/failed)
+        self._best = prior_best            # (value, number, test_pnl) des besten COMPLETE-Trials
+        self._max_test_pnl = prior_best[2] if prior_best else None  # Monotones Maximum (für Anzeige)
+        self._lock = _threading.Lock()     # Thread-Modus: Callbacks aus mehreren Jobs
+        self._last_bar_time = 0.0          # Throttle für ASCII-Fortschrittsbalken
+        self._bar_final_printed = False    # verhindert Doppeldruck der letzten Zeile (parallele Jobs)
+
+    def write_line(self, line: str):
+        ts = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        try:
+            with open(self.progress_log, 'a', encoding='utf-8') as pf:
+                pf.write(f"{ts} {line}\n")
+        except Exception:
+            pass
+
+    def write_status(self, status: dict):
+        if self.board is not None:
+            self.board[f"{self.symbol} ({self.timeframe})"] = status
+            status = {**status, 'pairs': dict(self.board)}
+        try:
+            os.makedirs(os.path.dirname(self.status_file), exist_ok=True)
+            with open(self.status_file, 'w', encoding="utf-8") as sf:
+                json.dump(status, sf, indent=2)
+        except Exception:
+            pass
+
+    def observe(self, number, state, value, test_pnl):
+        """Einen abgeschlossenen Trial zählen und den besten Trial fortschreiben."""
+        self.trials_done += 1
+        if state == optuna.trial.TrialState.COMPLETE and value is not None:
+            if self._best is None or value > self._best[0]:
+                self._best = (value, number, test_pnl)
+        if test_pnl is not None and (self._max_test_pnl is None or test_pnl > self._max_test_pnl):
+            self._max_test_pnl = test_pnl
+
+    def __call__(self, study_obj, trial_obj):
+        # Called after each trial (including pruned/complete)
+        with self._lock:
+            self.observe(trial_obj.number, trial_obj.state, trial_obj.value, trial_obj.user_attrs.get('test_pnl'))
+            self.report()
+
+    def poll(self, events: list):
+        """Prozess-Modus: Meldungen der Worker übernehmen; berichtet nur, wenn Trials fertig wurden."""
+        if not events:
+            return
+        for event in events:
+            self.observe(*event)
+        self.report()
+
+    def report(self):
+        try:
+            trials_done = min(self.trials_done, self.n_trials)
+            trials_total = self.n_trials
+            best_val, best_no, best_test_pnl_cb = (round(self._best[0], 4), self._best[1], self._best[2]) \
+                if self._best else (None, None, None)
+
+            elapsed = int(time.time() - self.start_time)
+            line = f"PROGRESS symbol={self.symbol} timeframe={self.timeframe} trials={trials_done}/{trials_total} best_test_pnl={best_test_pnl_cb} best_trial={best_no} elapsed_s={elapsed}"
+            self.write_line(line)
+
+            status = {
+                'status': 'running',
+                'symbol': self.symbol,
+                'timeframe': self.timeframe,
+                'trials_done': trials_done,
+                'trials_total': trials_total,
+                'best_value': best_val,
+                'best_test_pnl': best_test_pnl_cb,
+                'best_trial_no': best_no,
+                'started_at': datetime.fromtimestamp(self.start_time, timezone.utc).isoformat().replace('+00:00', 'Z'),
+                'last_update': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+            }
+            self.write_status(status)
+
+            # ASCII-Fortschrittsbalken (alle 5 Sek. oder beim letzten Trial)
+            now_t = time.time()
+            is_done = trials_done >= trials_total
+            if is_done and self._bar_final_printed:
+                return  # parallele Jobs: finalen Druck nur einmal
+            if now_t - self._last_bar_time >= 5.0 or is_done:
+                self._last_bar_time = now_t
+                bar_width = 25
+                pct = min(trials_done / trials_total, 1.0) if trials_total > 0 else 0
+                filled = int(bar_width * pct)
+                bar = '█' * filled + '░' * (bar_width - filled)
+                sym_short = self.symbol.split('/')[0]
+                best_str = f"{self._max_test_pnl:+.2f}%" if self._max_test_pnl is not None else "---"
+                line = f"  [{bar}] {sym_short}/{self.timeframe}  {trials_done:>4}/{trials_total}  ({pct*100:5.1f}%)  Best Test-PnL: {best_str}  {elapsed}s"
+                # \r überschreibt dieselbe Zeile; Leerzeichen am Ende löschen Reste
+                if self.board is not None:
+                    print(line, flush=True)  # mehrere Paare: kein gegenseitiges Überschreiben
+                else:
+                    print(f"\r{line:<80}", end='\n' if is_done else '', flush=True)
+                if is_done:
+                    self._bar_final_printed = True
+        except Exception:
+            pass
+
+
+# Modul-Globals, die objective() liest — werden an jeden Worker-Prozess übergeben
+_WORKER_STATE_KEYS = (
+    'TRAIN_DATA', 'TEST_DATA', 'TRAIN_SPLIT_IDX', 'FINE_DATA', 'CURRENT_SYMBOL', 'CURRENT_TIMEFRAME',
+    'MAX_DRAWDOWN_CONSTRAINT', 'MIN_WIN_RATE_CONSTRAINT', 'MIN_PNL_CONSTRAINT', 'START_CAPITAL',
+    'OPTIM_MODE', 'MIN_TRADES_PER_YEAR', 'SMC_DISK_CACHE', 'TRAIN_CHUNKS', 'PRUNER', 'RISK_BATCH',
+)
+
+
+# Diese Globals gehen als memory-mapped Bundle statt als Pickle an die Worker
+_SHARED_FRAME_KEYS = ('TRAIN_DATA', 'TEST_DATA')
+
+
+class _TrialQueueCallback:
+    """Worker-Callback: meldet jeden abgeschlossenen Trial an den Elternprozess (_ProgressReporter.observe)."""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __call__(self, study_obj, trial_obj):
+        self.queue.put((trial_obj.number, trial_obj.state, trial_obj.value, trial_obj.user_attrs.get('test_pnl')))
+
+
+def _optimize_worker(worker_state: dict, frame_handles: dict, storage_spec: str, study_name: str, max_trials: int,
+                     progress_queue=None):
+    """
+    Einstiegspunkt eines Worker-Prozesses (--parallel processes).
+    Übernimmt Settings als Modul-Globals, hängt Train/Test-Daten (inkl. vorberechneter
+    Indikatoren) zero-copy aus dem Bundle ein und zieht Trials aus der gemeinsamen
+    Study, bis diese max_trials Trials (inkl. laufender) hat.
+    SMC-Caches baut jeder Worker für sich auf.
+    """
+    globals().update(worker_state)
+    for key, handle in frame_handles.items():
+        globals()[key] = attach_frame(handle)
+    progress = [_TrialQueueCallback(progress_queue)] if progress_queue is not None else []
+    # Der Pruner wird nicht in der Storage gespeichert — jeder Worker baut ihn selbst
+    study = optuna.load_study(study_name=study_name, storage=_make_storage(storage_spec),
+                              pruner=_make_pruner(PRUNER, TRAIN_CHUNKS))
+    if RISK_BATCH > 1:
+        _optimize_batched(study, max_trials, RISK_BATCH, callbacks=progress, max_total_trials=max_trials)
+    else:
+        callbacks = [optuna.study.MaxTrialsCallback(max_trials, states=None)] + progress
+        study.optimize(objective, n_trials=max_trials, callbacks=callbacks, show_progress_bar=False)
+
+
+class _WorkerGroup:
+    """
+    Worker-Prozesse auf einer Study (spawn — kein Fork eines Prozesses mit offener
+    Storage-Verbindung). add() startet Worker ohne zu blockieren, auch zu einer
+    laufenden Study; der Aufrufer wartet auf sentinels(), holt die Trial-Meldungen
+    mit drain() ab und räumt mit close() auf.
+    """
+
+    def __init__(self, worker_state: dict, frames: dict, storage_spec: str, study_name: str, max_trials: int):
+        self.worker_state = {key: val for key, val in worker_state.items() if key not in _SHARED_FRAME_KEYS}
+        self.storage_spec = storage_spec
+        self.study_name = study_name
+        self.max_trials = max_trials
+        self.procs = []
+        self._mp_ctx = multiprocessing.get_context('spawn')
+        self.queue = self._mp_ctx.Queue()
+        self.bundle_dir = tempfile.mkdtemp(prefix='titanbot_optuna_')
+        self.frame_handles = {key: publish_frame(frames[key], os.path.join(self.bundle_dir, key.lower()))
+                              for key in _SHARED_FRAME_KEYS}
+
+    def add(self, n_workers: int):
+        for _ in range(n_workers):
+            p = self._mp_ctx.Process(target=_optimize_worker,
+                                     args=(self.worker_state, self.frame_handles, self.storage_spec,
+                                           self.study_name, self.max_trials, self.queue),
+                                     daemon=True)
+            p.start()
+            self.procs.append(p)
+
+    def sentinels(self) -> list:
+        return [p.sentinel for p in self.procs if p.is_alive()]
+
+    def done(self) -> bool:
+        return not any(p.is_alive() for p in self.procs)
+
+    def drain(self) -> list:
+        """Bisher gemeldete Trials als (number, state, value, test_pnl), ohne zu blockieren."""
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        """Beendet übrige Worker, löscht das Daten-Bundle; RuntimeError bei fehlgeschlagenen Workern."""
+        for p in self.procs:
+            if p.is_alive():
+                p.terminate()
+            if p.pid is not None:
+                p.join()
+        shutil.rmtree(self.bundle_dir, ignore_errors=True)
+        self.queue.close()
+        failed = [p.exitcode for p in self.procs if p.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{len(failed)} von {len(self.procs)} Worker-Prozessen fehlgeschlagen (Exit-Codes {failed})")
+
+
+def _run_worker_processes(n_workers: int, storage_spec: str, study_name: str, max_trials: int,
+                          reporter, poll_interval: float = 2.0):
+    """
+    Startet n_workers Prozesse auf derselben Study mit dem Zustand der Modul-Globals
+    und meldet den Fortschritt, bis alle fertig sind.
+    """
+    state = {key: globals()[key] for key in _WORKER_STATE_KEYS}
+    group = _WorkerGroup(state, state, storage_spec, study_name, max_trials)
+    try:
+        group.add(n_workers)
+        done = False
+        while not done:
+            _wait_sentinels(group.sentinels(), timeout=poll_interval)
+            done = group.done()
+            reporter.poll(group.drain())
+    finally:
+        group.close()
+
+
+@dataclass
+class PairContext:
+    """
+    Zustand eines Paares (Daten, Split, Study) — statt Modul-Globals pro Task,
+    damit mehrere Paare gleichzeitig laufen können. activate() setzt die Globals,
+    die objective() im eigenen Prozess liest; worker_state() liefert sie für die
+    Worker-Prozesse.
+    """
+    symbol: str
+    timeframe: str
+    historical_data: object
+    train_data: object
+    test_data: object
+    train_split_idx: int
+    fine_data: object = None
+    study_name: str = ''
+    trials_in_db: int = 0      # alle Zustände — Basis für MaxTrialsCallback der Worker
+    prior_best: tuple = None   # (value, number, test_pnl) des besten Trials früherer Runs
+
+    @property
+    def cost(self) -> int:
+        """Aufwandsschätzung für die Reihenfolge: ein Trial skaliert mit der Kerzenzahl."""
+        return len(self.historical_data)
+
+    def worker_state(self) -> dict:
+        """Paar-spezifische Globals von objective() (Settings-Globals ergänzt der Aufrufer)."""
+        return {
+            'TRAIN_DATA': self.train_data, 'TEST_DATA': self.test_data, 'TRAIN_SPLIT_IDX': self.train_split_idx,
+            'FINE_DATA': self.fine_data, 'CURRENT_SYMBOL': self.symbol, 'CURRENT_TIMEFRAME': self.timeframe,
+        }
+
+    def activate(self):
+        """Paar für objective() im eigenen Prozess aktivieren (Thread-Modus: ein Paar nach dem anderen)."""
+        globals().update(self.worker_state(), HISTORICAL_DATA=self.historical_data)
+        # SMC-Caches gehören zu den Daten des vorherigen Paares
+        with _SMC_TRAIN_CACHE_LOCK:
+            _SMC_TRAIN_CACHE.clear()
+        with _SMC_TEST_CACHE_LOCK:
+            _SMC_TEST_CACHE.clear()
+
+    def release(self):
+        """Daten nach dem Export freigeben (bei vielen Paaren bleibt sonst alles im Speicher)."""
+        self.historical_data = self.train_data = self.test_data = self.fine_data = None
+
+
+def _prepare_pair(symbol: str, timeframe: str, start_date: str, end_date: str):
+    """
+    Daten laden, Indikatoren vorberechnen, 70/30 splitten und Datenqualität prüfen.
+    Gibt (PairContext, None) zurück oder (None, Summary-Eintrag) wenn das Paar übersprungen wird.
+    """
+    print(f"\n===== Optimiere: {symbol} ({timeframe}) =====")
+    # Per-Paar Lookback: wenn --start_date auto, berechne Startdatum je Timeframe
+    if start_date.lower() == 'auto':
+        pair_lookback = TF_LOOKBACK_DAYS.get(timeframe, 365)
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        pair_start_date = (end_dt - timedelta(days=pair_lookback)).strftime('%Y-%m-%d')
+        print(f"Datenbereich: {pair_lookback} Tage ({pair_start_date} bis {end_date})")
+    else:
+        pair_start_date = start_date
+    historical_data = load_data(symbol, timeframe, pair_start_date, end_date)
+
+    if historical_data.empty:
+        print("Keine Daten geladen. Überspringe.")
+        return None, {'symbol': symbol, 'timeframe': timeframe, 'status': 'no_data'}
+
+    fine_tf = FINE_TF_MAP.get(timeframe)
+    fine_data = LazyFineData(symbol, fine_tf) if fine_tf else None
+
+    # Indikatoren einmalig vorberechnen — ATR/ADX/volume_ma sind trial-unabhängig
+    # (adx_period=14 ist fix, volume_ma_period=20 ist fix)
+    try:
+        for col, values in compute_indicators(historical_data, adx_period=14, volume_ma_period=20).items():
+            historical_data[col] = values
+        print(f"Indikatoren vorberechnet (ATR/ADX/volume_ma) — werden pro Trial wiederverwendet.")
+    except Exception as _e:
+        print(f"Warnung: Indikator-Vorberechnung fehlgeschlagen ({_e}), wird pro Trial berechnet.")
+
+    # 70/30 Walk-Forward Split
+    train_split_idx = int(len(historical_data) * 0.70)
+    train_data = historical_data.iloc[:train_split_idx].copy()
+    test_data  = historical_data.iloc[train_split_idx:].copy()
+    train_from = train_data.index[0].strftime('%Y-%m-%d')
+    train_to   = train_data.index[-1].strftime('%Y-%m-%d')
+    test_from  = test_data.index[0].strftime('%Y-%m-%d')
+    test_to    = test_data.index[-1].strftime('%Y-%m-%d')
+    print(f"WFV-Split: Train={len(train_data)} Kerzen (70%) [{train_from} → {train_to}], Test={len(test_data)} Kerzen (30%) [{test_from} → {test_to}]")
+    _train_days = max(1, (train_data.index[-1] - train_data.index[0]).days)
+    _test_days  = max(1, (test_data.index[-1]  - test_data.index[0]).days)
+    _min_tr = max(2, int(MIN_TRADES_PER_YEAR * _train_days / 365))
+    _min_te = max(1, int(MIN_TRADES_PER_YEAR * _test_days  / 365))
+    print(f"Mindest-Trades: Train >={_min_tr} ({_train_days}d @ {MIN_TRADES_PER_YEAR}/Jahr), Test >={_min_te} ({_test_days}d)")
+
+    print("\n--- Bewertung der Datensatz-Qualität ---")
+    evaluation = evaluate_dataset(historical_data.copy(), timeframe)
+    print(f"Note: {evaluation['score']} / 10\n" + "\n".join(evaluation['justification']) + "\n----------------------------------------")
+    if evaluation['score'] < 3:
+        print(f"Datensatz-Qualität zu gering. Überspringe Optimierung.")
+        return None, {'symbol': symbol, 'timeframe': timeframe, 'status': 'bad_data', 'score': evaluation['score']}
+
+    ctx = PairContext(symbol, timeframe, historical_data, train_data, test_data, train_split_idx, fine_data,
+                      study_name=f"smc_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}_{OPTIM_MODE}")
+    return ctx, None
+
+
+def _open_study(ctx: PairContext, storage_spec: str, warm_start: bool = True):
+    """
+    Study des Paares anlegen/laden, Trial-Zähler und bisher besten Trial in ctx setzen
+    und ggf. den Warm-Start einreihen. Einziger vollständiger Trial-Scan vor dem Export.
+    """
+    study = optuna.create_study(storage=_make_storage(storage_spec), study_name=ctx.study_name, direction="maximize",
+                                load_if_exists=True, pruner=_make_pruner(PRUNER, TRAIN_CHUNKS))
+    trials = study.get_trials(deepcopy=False)
+    ctx.trials_in_db = len(trials)
+    complete = [t for t in trials if t.state == optuna.trial.TrialState.COMPLETE and t.value is not None]
+    if complete:
+        best = max(complete, key=lambda t: t.value)
+        ctx.prior_best = (best.value, best.number, best.user_attrs.get('test_pnl'))
+
+    # Warm-Start: zuletzt gespeicherte Config des Paares als ersten Trial einreihen
+    config_path = os.path.join(PROJECT_ROOT, 'src', 'titanbot', 'strategy', 'configs',
+                               f'config_{create_safe_filename(ctx.symbol, ctx.timeframe)}{CONFIG_SUFFIX}.json')
+    warm_params = _saved_config_params(config_path) if warm_start else {}
+    if warm_params:
+        study.enqueue_trial(warm_params, skip_if_exists=True)
+        print(f"Warm-Start {ctx.symbol} ({ctx.timeframe}): gespeicherte Config als Trial eingereiht ({os.path.basename(config_path)}).")
+    return study
+
+
+def _schedule_order(contexts: list) -> list:
+    """Längste Paare zuerst — die kurzen füllen am Ende die frei werdenden Kerne auf."""
+    return sorted(contexts, key=lambda ctx: ctx.cost, reverse=True)
+
+
+def _workers_for_next_pair(free_cpus: int, pairs_waiting: int, n_trials: int) -> int:
+    """
+    Worker für das nächste (längste wartende) Paar: die freien Kerne werden auf die
+    wartenden Paare verteilt, aufgerundet — das längere Paar bekommt den Rest.
+    """
+    share = -(-free_cpus // max(1, pairs_waiting))
+    return max(1, min(share, free_cpus, n_trials))
+
+
+def _open_trials(reporter: "_ProgressReporter", group: "_WorkerGroup", n_trials: int) -> int:
+    """Trials eines Paares, die noch kein Worker bearbeitet (jeder lebende Worker hat höchstens einen)."""
+    return n_trials - reporter.trials_done - len(group.sentinels())
+
+
+def _run_pairs(contexts: list, storage_spec: str, n_trials: int, cpu_budget: int, parallel: str = 'processes',
+               jobs: int = 1, warm_start: bool = True, progress_log: str = None, status_file: str = None,
+               poll_interval: float = 2.0):
+    """
+    Scheduler über alle Paare. Liefert (ctx, study, error) je Paar, sobald es fertig ist.
+
+    processes: Paare längste zuerst, bis zu cpu_budget Worker-Prozesse gleichzeitig über
+    alle Paare; jedes Paar hat seine eigene Study und sein eigenes Daten-Bundle. Werden
+    Kerne frei und wartet kein Paar mehr, bekommt das laufende Paar mit den meisten offenen
+    Trials zusätzliche Worker auf seiner Study. threads / cpu_budget 1: ein Paar nach dem anderen
+    im eigenen Prozess (Optuna n_jobs=jobs).
+    """
+    pending = _schedule_order(contexts)
+    settings = {key: globals()[key] for key in _WORKER_STATE_KEYS}
+    board = {} if parallel == 'processes' and cpu_budget > 1 and len(pending) > 1 else None
+
+    def new_reporter(ctx):
+        return _ProgressReporter(ctx.symbol, ctx.timeframe, n_trials, progress_log, status_file, time.time(),
+                                 board=board, prior_best=ctx.prior_best)
+
+    def error_status(reporter, ctx, e):
+        print(f"FEHLER während Optuna optimize ({ctx.symbol} {ctx.timeframe}): {e}")
+        reporter.write_line(f"ERROR symbol={ctx.symbol} timeframe={ctx.timeframe} error={e}")
+        reporter.write_status({'status': 'error', 'symbol': ctx.symbol, 'timeframe': ctx.timeframe, 'error': str(e),
+                               'last_update': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')})
+
+    if parallel != 'processes' or cpu_budget <= 1:
+        for ctx in pending:
+            ctx.activate()
+            study = _open_study(ctx, storage_spec, warm_start)
+            reporter = new_reporter(ctx)
+            try:
+                if RISK_BATCH > 1:
+                    _optimize_batched(study, n_trials, RISK_BATCH, callbacks=[reporter])
+                else:
+                    study.optimize(objective, n_trials=n_trials, n_jobs=jobs, callbacks=[reporter], show_progress_bar=False)
+            except Exception as e_opt:
+                error_status(reporter, ctx, e_opt)
+                yield ctx, study, str(e_opt)
+                continue
+            yield ctx, study, None
+        return
+
+    running = []  # (ctx, study, reporter, group)
+    try:
+        while pending or running:
+            busy = sum(len(group.sentinels()) for _, _, _, group in running)
+            free = cpu_budget - busy
+            while pending and free > 0:
+                ctx = pending.pop(0)
+                n_workers = _workers_for_next_pair(free, len(pending) + 1, n_trials)
+                study = _open_study(ctx, storage_spec, warm_start)
+                reporter = new_reporter(ctx)
+                group = _WorkerGroup({**settings, **ctx.worker_state()}, ctx.worker_state(), storage_spec,
+                                     ctx.study_name, ctx.trials_in_db + n_trials)
+                print(f"Starte {n_workers} Worker-Prozesse für {ctx.symbol} ({ctx.timeframe}) "
+                      f"(Study '{ctx.study_name}', {ctx.cost} Kerzen).")
+                running.append((ctx, study, reporter, group))
+                group.add(n_workers)
+                free -= n_workers
+
+            sentinels = [s for _, _, _, group in running for s in group.sentinels()]
+            if sentinels:
+                _wait_sentinels(sentinels, timeout=poll_interval)
+            for entry in list(running):
+                ctx, study, reporter, group = entry
+                done = group.done()  # vor drain(): Meldungen eines gerade beendeten Workers nicht verlieren
+                reporter.poll(group.drain())
+                if not done:
+                    continue
+                running.remove(entry)
+                try:
+                    group.close()
+                except RuntimeError as e:
+                    error_status(reporter, ctx, e)
+                    yield ctx, study, str(e)
+                    continue
+                yield ctx, study, None
+
+            if not pending and running:
+                # Nachzügler beschleunigen: freie Kerne an das Paar mit den meisten offenen Trials
+                free = cpu_budget - sum(len(group.sentinels()) for _, _, _, group in running)
+                ctx, study, reporter, group = max(running, key=lambda r: _open_trials(r[2], r[3], n_trials))
+                extra = min(free, _open_trials(reporter, group, n_trials))
+                if extra > 0:
+                    group.add(extra)
+    finally:
+        for _, _, _, group in running:
+            try:
+                group.close()
+            except RuntimeError:
+                pass
+
+
+def _export_best_config(ctx: PairContext, study) -> dict:
+    """Beste Konfiguration eines Paares exportieren (Smart-Save); gibt den Task-Eintrag der Run-Summary zurück."""
+    symbol, timeframe = ctx.symbol, ctx.timeframe
+    valid_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
+    if not valid_trials:
+        print(f"\n❌ FEHLER: Für {symbol} ({timeframe}) konnte keine Konfiguration gefunden werden.")
+        return {'symbol': symbol, 'timeframe': timeframe, 'status': 'no_valid_trials'}
+
+    best_trial = max(valid_trials, key=lambda t: t.value)
+    best_params = best_trial.params
+
+    config_dir = os.path.join(PROJECT_ROOT, 'src', 'titanbot', 'strategy', 'configs')
+    os.makedirs(config_dir, exist_ok=True)
+    config_output_path = os.path.join(config_dir, f'config_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}.json')
+
+    strategy_config = {
+        'swingsLength': best_params['swingsLength'],
+        'ob_mitigation': best_params['ob_mitigation'],
+        'use_adx_filter': best_params['use_adx_filter'],
+        'adx_period': best_params.get('adx_period', 14),
+        'adx_threshold': best_params.get('adx_threshold', 25),
+        'use_pd_filter': best_params.get('use_pd_filter', True),
+        'use_liquidity_sweep_filter': best_params.get('use_liquidity_sweep_filter', True),
+        'liquidity_lookback': best_params.get('liquidity_lookback', 20),
+        'min_fvg_size_pct': round(best_params.get('min_fvg_size_pct', 0.05), 4),
+        'min_ob_quality': round(best_params.get('min_ob_quality', 0.2), 3),
+        'max_ob_touches': best_params.get('max_ob_touches', 1),
+        'use_rejection_candle': best_params.get('use_rejection_candle', True),
+        'use_mtf_filter': best_params.get('use_mtf_filter', False),
+        'volume_ma_period': 20,
+    }
+
+    risk_config = {
+        'margin_mode': "isolated",
+        'risk_reward_ratio': round(best_params['risk_reward_ratio'], 2),
+        'min_leverage': best_params['min_leverage'],
+        'max_leverage': best_params['max_leverage'],
+        'atr_multiplier_sl': round(best_params['atr_multiplier_sl'], 3),
+        'min_sl_pct': 0.5,
+        'structure_sl_buffer_pct': 0.2,
+        'trailing_stop_activation_rr': round(best_params['trailing_stop_activation_rr'], 2),
+        'trailing_stop_callback_rate_pct': round(best_params['trailing_stop_callback_rate_pct'], 2),
+    }
+    behavior_config = {"use_longs": True, "use_shorts": True}
+
+    # Extrahiere WFV-Metriken aus best_trial user_attrs
+    best_test_pnl    = best_trial.user_attrs.get('test_pnl',    None)
+    best_train_pnl   = best_trial.user_attrs.get('train_pnl',   None)
+    best_test_wr     = best_trial.user_attrs.get('test_wr',     None)
+    best_test_trades = best_trial.user_attrs.get('test_trades',  None)
+    best_test_dd_pct = best_trial.user_attrs.get('test_dd_pct', None)
+
+    config_output = {
+        "market": {"symbol": symbol, "timeframe": timeframe},
+        "strategy": strategy_config,
+        "risk": risk_config,
+        "behavior": behavior_config,
+        "_meta": {
+            "wfv": "70/30",
+            "test_pnl_pct":    best_test_pnl,
+            "train_pnl_pct":   best_train_pnl,
+            "test_wr":         best_test_wr,
+            "test_trades":     best_test_trades,
+            "test_dd_pct":     best_test_dd_pct,
+            "composite_score": round(best_trial.value, 4) if best_trial.value is not None else None,
+            "optimized_at":    datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        }
+    }
+
+    # --- Smart-save: überschreibe nur, wenn die neue Konfiguration besser ist als die gespeicherte ---
+    history_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'results')
+    os.makedirs(history_dir, exist_ok=True)
+    history_path = os.path.join(history_dir, 'optimizer_history.json')
+
+    key = create_safe_filename(symbol, timeframe)
+    existing_best = None
+    try:
+        if os.path.exists(history_path):
+            with open(history_path, 'r', encoding='utf-8') as hf:
+                history = json.load(hf)
+            existing_best = history.get(key, {}).get('best_pnl')
+    except Exception:
+        existing_best = None
+
+    saved = False
+    status = 'saved'
+    config_missing = not os.path.exists(config_output_path)
+    new_test_pnl = best_test_pnl if best_test_pnl is not None else -9999
+
+    # Quality gate: nur speichern wenn OOS PnL positiv ist
+    if new_test_pnl <= 0:
+        print(f"\n❌ Kein profitables OOS-Ergebnis für {symbol} ({timeframe}) — Test-PnL: {new_test_pnl:.2f}%. Config wird NICHT gespeichert.")
+        return {'symbol': symbol, 'timeframe': timeframe, 'status': 'quality_gate_failed', 'test_pnl': new_test_pnl}
+
+    if existing_best is None or config_missing or new_test_pnl > existing_best:
+        # besser — schreibe die Config und aktualisiere die Historie
+        try:
+            with open(config_output_path, 'w', encoding='utf-8') as f:
+                json.dump(config_output, f, indent=4)
+            saved = True
+            status = 'new_best'
+            # update history
+            try:
+                hist = {}
+                if os.path.exists(history_path):
+                    with open(history_path, 'r', encoding='utf-8') as hf:
+                        hist = json.load(hf)
+                hist[key] = {
+                    'best_pnl': new_test_pnl,
+                    'updated_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+                    'config': os.path.relpath(config_output_path, PROJECT_ROOT)
+                }
+                with open(history_path, 'w', encoding='utf-8') as hf:
+                    json.dump(hist, hf, indent=2)
+            except Exception:
+                pass
+            pnl_str = f"{new_test_pnl:.2f}%" if new_test_pnl != -9999 else "n/a"
+            print(f"\n✔ Beste Konfiguration (Test-PnL: {pnl_str}) wurde in '{config_output_path}' gespeichert.")
+        except Exception as e:
+            print(f"Fehler beim Speichern der Config: {e}")
+            status = 'save_error'
+    else:
+        # schlechteres oder gleiches Ergebnis – NICHT überschreiben
+        saved = False
+        status = 'unchanged'
+        print(f"\nℹ️ Gefundene Konfiguration (Test-PnL: {new_test_pnl:.2f}%) ist schlechter/gleich als vorhandene (Test-PnL: {existing_best}). Überschreibe nicht.")
+
+    # Task-Level Summary für das ganze Run-Report
+    return {
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'test_pnl': best_test_pnl,
+        'train_pnl': best_train_pnl,
+        'test_wr': best_test_wr,
+        'test_trades': best_test_trades,
+        'test_dd_pct': best_test_dd_pct,
+        'composite_score': round(best_trial.value, 4) if best_trial.value is not None else None,
+        'saved': saved,
+        'status': status,
+        'config_path': os.path.relpath(config_output_path, PROJECT_ROOT)
+    }
+
+
 def main():
-    global HISTORICAL_DATA, FINE_DATA, TRAIN_DATA, TEST_DATA, TRAIN_SPLIT_IDX, CURRENT_SYMBOL, CURRENT_TIMEFRAME, CONFIG_SUFFIX, MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT, START_CAPITAL, OPTIM_MODE, MIN_TRADES_PER_YEAR
+    global CONFIG_SUFFIX, MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT, START_CAPITAL, OPTIM_MODE, MIN_TRADES_PER_YEAR, SMC_DISK_CACHE, TRAIN_CHUNKS, PRUNER, RISK_BATCH
     parser = argparse.ArgumentParser(description="Parameter-Optimierung für TitanBot (SMC)")
     parser.add_argument('--symbols', required=False, type=str, default="")
     parser.add_argument('--timeframes', required=False, type=str, default="")
@@ -175,7 +1053,15 @@ def main():
                         help='Paare im Format "SYM1:TF1 SYM2:TF2" (Alternativ zu --symbols + --timeframes)')
     parser.add_argument('--start_date', required=True, type=str)
     parser.add_argument('--end_date', required=True, type=str)
-    parser.add_argument('--jobs', required=True, type=int)
+    parser.add_argument('--jobs', required=True, type=int,
+                        help='CPU-Budget: Worker-Prozesse insgesamt über alle gleichzeitig laufenden Paare (-1 = alle Kerne)')
+    parser.add_argument('--parallel', choices=['processes', 'threads'], default='processes',
+                        help='processes: --jobs Worker-Prozesse auf einer gemeinsamen Study (skaliert mit Kernen); '
+                             'threads: Optuna n_jobs im selben Prozess (GIL-gebunden)')
+    parser.add_argument('--storage', choices=['sqlite', 'journal'], default='sqlite',
+                        help='sqlite: artifacts/db/optuna_studies_smc.db (WAL); '
+                             'journal: artifacts/db/optuna_studies_smc.journal (Optuna JournalStorage, '
+                             'weniger Lock-Konkurrenz bei vielen Worker-Prozessen)')
     parser.add_argument('--max_drawdown', required=True, type=float)
     parser.add_argument('--start_capital', required=True, type=float)
     parser.add_argument('--min_win_rate', required=True, type=float)
@@ -183,6 +1069,17 @@ def main():
     parser.add_argument('--min_pnl', required=True, type=float)
     parser.add_argument('--mode', required=True, type=str)
     parser.add_argument('--config_suffix', type=str, default="")
+    parser.add_argument('--pruner', choices=['hyperband', 'median', 'none'], default='hyperband',
+                        help='Pruner für die Zwischenstände der Train-Abschnitte')
+    parser.add_argument('--train_chunks', type=int, default=4,
+                        help='Train-Backtest in N Abschnitten an den Pruner melden (1 = aus)')
+    parser.add_argument('--risk_batch', type=int, default=1,
+                        help='K Trials je Batch mit gleichen Strategie-, aber eigenen Risiko-Parametern '
+                             '(ask/tell, ein gemeinsamer Backtest-Durchlauf; 1 = aus)')
+    parser.add_argument('--no_warm_start', action='store_true',
+                        help='Gespeicherte config_*.json des Paares NICHT als ersten Trial einreihen')
+    parser.add_argument('--smc_cache', action='store_true',
+                        help='SMC-Ergebnisse auf Platte cachen (data/cache/smc, LRU); alternativ TITANBOT_SMC_CACHE=1')
     parser.add_argument('--min_trades_per_year', type=int, default=300,
                         help='Mindest-Trades pro Jahr pro Strategie (proportional auf Datenlänge skaliert)')
     args = parser.parse_args()
@@ -191,6 +1088,8 @@ def main():
     MAX_DRAWDOWN_CONSTRAINT, MIN_WIN_RATE_CONSTRAINT, MIN_PNL_CONSTRAINT = args.max_drawdown / 100.0, args.min_win_rate, args.min_pnl
     START_CAPITAL, N_TRIALS, OPTIM_MODE = args.start_capital, args.trials, args.mode
     MIN_TRADES_PER_YEAR = args.min_trades_per_year
+    SMC_DISK_CACHE = SMCDiskCache() if args.smc_cache else default_cache()
+    TRAIN_CHUNKS, PRUNER, RISK_BATCH = args.train_chunks, args.pruner, max(1, args.risk_batch)
 
     if args.pairs:
         # Paar-Modus: "AAVE:5m ETH:6h BTC:4h" → direkte Symbol/Timeframe-Zuordnung (kein Kreuzprodukt)
@@ -208,339 +1107,41 @@ def main():
     # Run-level summary collector
     run_tasks_summary = []
     run_start_ts = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+    start_time = time.time()
 
+    # --- 1. Paare vorbereiten (Daten, Indikatoren, Split, Qualität) ---
+    contexts = []
     for task in TASKS:
-        symbol, timeframe = task['symbol'], task['timeframe']
-
-        CURRENT_SYMBOL = symbol
-        CURRENT_TIMEFRAME = timeframe
-
-        print(f"\n===== Optimiere: {symbol} ({timeframe}) =====")
-        # Per-Paar Lookback: wenn --start_date auto, berechne Startdatum je Timeframe
-        if args.start_date.lower() == 'auto':
-            pair_lookback = TF_LOOKBACK_DAYS.get(timeframe, 365)
-            end_dt = datetime.strptime(args.end_date, '%Y-%m-%d')
-            pair_start_date = (end_dt - timedelta(days=pair_lookback)).strftime('%Y-%m-%d')
-            print(f"Datenbereich: {pair_lookback} Tage ({pair_start_date} bis {args.end_date})")
+        ctx, skipped = _prepare_pair(task['symbol'], task['timeframe'], args.start_date, args.end_date)
+        if skipped is not None:
+            run_tasks_summary.append(skipped)
         else:
-            pair_start_date = args.start_date
-        HISTORICAL_DATA = load_data(symbol, timeframe, pair_start_date, args.end_date)
-
-        fine_tf = FINE_TF_MAP.get(timeframe)
-        FINE_DATA = LazyFineData(symbol, fine_tf) if fine_tf else None
-
-        # Indikatoren einmalig vorberechnen — ATR/ADX/volume_ma sind trial-unabhängig
-        # (adx_period=14 ist fix, volume_ma_period=20 ist fix)
-        if not HISTORICAL_DATA.empty:
-            import ta as _ta
-            try:
-                _atr = _ta.volatility.AverageTrueRange(
-                    high=HISTORICAL_DATA['high'], low=HISTORICAL_DATA['low'],
-                    close=HISTORICAL_DATA['close'], window=14)
-                HISTORICAL_DATA['atr'] = _atr.average_true_range()
-                _adx = _ta.trend.ADXIndicator(
-                    high=HISTORICAL_DATA['high'], low=HISTORICAL_DATA['low'],
-                    close=HISTORICAL_DATA['close'], window=14)
-                HISTORICAL_DATA['adx']     = _adx.adx()
-                HISTORICAL_DATA['adx_pos'] = _adx.adx_pos()
-                HISTORICAL_DATA['adx_neg'] = _adx.adx_neg()
-                HISTORICAL_DATA['volume_ma'] = HISTORICAL_DATA['volume'].rolling(window=20).mean()
-                print(f"Indikatoren vorberechnet (ATR/ADX/volume_ma) — werden pro Trial wiederverwendet.")
-            except Exception as _e:
-                print(f"Warnung: Indikator-Vorberechnung fehlgeschlagen ({_e}), wird pro Trial berechnet.")
-
-            # 70/30 Walk-Forward Split
-            TRAIN_SPLIT_IDX = int(len(HISTORICAL_DATA) * 0.70)
-            TRAIN_DATA = HISTORICAL_DATA.iloc[:TRAIN_SPLIT_IDX].copy()
-            TEST_DATA  = HISTORICAL_DATA.iloc[TRAIN_SPLIT_IDX:].copy()
-            train_from = TRAIN_DATA.index[0].strftime('%Y-%m-%d')
-            train_to   = TRAIN_DATA.index[-1].strftime('%Y-%m-%d')
-            test_from  = TEST_DATA.index[0].strftime('%Y-%m-%d')
-            test_to    = TEST_DATA.index[-1].strftime('%Y-%m-%d')
-            print(f"WFV-Split: Train={len(TRAIN_DATA)} Kerzen (70%) [{train_from} → {train_to}], Test={len(TEST_DATA)} Kerzen (30%) [{test_from} → {test_to}]")
-            _train_days = max(1, (TRAIN_DATA.index[-1] - TRAIN_DATA.index[0]).days)
-            _test_days  = max(1, (TEST_DATA.index[-1]  - TEST_DATA.index[0]).days)
-            _min_tr = max(2, int(MIN_TRADES_PER_YEAR * _train_days / 365))
-            _min_te = max(1, int(MIN_TRADES_PER_YEAR * _test_days  / 365))
-            print(f"Mindest-Trades: Train >={_min_tr} ({_train_days}d @ {MIN_TRADES_PER_YEAR}/Jahr), Test >={_min_te} ({_test_days}d)")
-
-        if HISTORICAL_DATA.empty:
-            print("Keine Daten geladen. Überspringe.")
-            run_tasks_summary.append({'symbol': symbol, 'timeframe': timeframe, 'status': 'no_data'})
-            continue
-
-        print("\n--- Bewertung der Datensatz-Qualität ---")
-        evaluation = evaluate_dataset(HISTORICAL_DATA.copy(), timeframe)
-        print(f"Note: {evaluation['score']} / 10\n" + "\n".join(evaluation['justification']) + "\n----------------------------------------")
-        if evaluation['score'] < 3:
-            print(f"Datensatz-Qualität zu gering. Überspringe Optimierung.")
-            run_tasks_summary.append({'symbol': symbol, 'timeframe': timeframe, 'status': 'bad_data', 'score': evaluation['score']})
-            continue
-
-        DB_FILE = os.path.join(PROJECT_ROOT, 'artifacts', 'db', 'optuna_studies_smc.db')
-        os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-        STORAGE_URL = f"sqlite:///{DB_FILE}?timeout=60"
-        study_name = f"smc_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}_{OPTIM_MODE}"
-
-        study = optuna.create_study(storage=STORAGE_URL, study_name=study_name, direction="maximize", load_if_exists=True)
-
-        # --- Progress reporting callback (writes progress log + status JSON) ---
-        import time, pathlib
-        LOGS_DIR = os.path.join(PROJECT_ROOT, 'logs')
-        os.makedirs(LOGS_DIR, exist_ok=True)
-        PROGRESS_LOG = os.path.join(LOGS_DIR, 'optimizer_output.log')
-        # Ensure the log file always exists (create if missing)
-        if not os.path.exists(PROGRESS_LOG):
-            with open(PROGRESS_LOG, 'w', encoding='utf-8') as pf:
-                pf.write("")
-        STATUS_FILE = os.path.join(PROJECT_ROOT, 'data', 'cache', '.optimization_status.json')
-
-        def _write_progress_line(line: str):
-            ts = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-            try:
-                with open(PROGRESS_LOG, 'a', encoding='utf-8') as pf:
-                    pf.write(f"{ts} {line}\n")
-            except Exception:
-                pass
-
-        def _write_status_json(status: dict):
-            try:
-                os.makedirs(os.path.dirname(STATUS_FILE), exist_ok=True)
-                with open(STATUS_FILE, 'w', encoding="utf-8") as sf:
-                    json.dump(status, sf, indent=2)
-            except Exception:
-                pass
-
-        start_time = time.time()
-        _last_bar_time = [0.0]  # Throttle für ASCII-Fortschrittsbalken
-        _bar_final_printed = [False]  # verhindert Doppeldruck der letzten Zeile (parallele Jobs)
-        _trials_at_start = [0]  # Anzahl der Trials im DB vor diesem Run
-        _max_test_pnl = [None]  # Monoton steigendes Maximum des Test-PnL (für Anzeige)
-
-        def _trial_callback(study_obj, trial_obj):
-            # Called after each trial (including pruned/complete)
-            try:
-                trials_done = min(
-                    len([t for t in study_obj.trials if t.state != optuna.trial.TrialState.RUNNING]) - _trials_at_start[0],
-                    N_TRIALS
-                )
-                trials_total = N_TRIALS
-                best = None
-                best_test_pnl_cb = None
-                try:
-                    best = study_obj.best_trial
-                    best_val = round(best.value, 4) if best and best.value is not None else None
-                    best_no = best.number if best else None
-                    best_test_pnl_cb = best.user_attrs.get('test_pnl') if best else None
-                    # Aktuellen Trial ebenfalls prüfen (kann höheren test_pnl haben als best_trial)
-                    cur_pnl = trial_obj.user_attrs.get('test_pnl') if trial_obj else None
-                    for pnl in (best_test_pnl_cb, cur_pnl):
-                        if pnl is not None:
-                            if _max_test_pnl[0] is None or pnl > _max_test_pnl[0]:
-                                _max_test_pnl[0] = pnl
-                except Exception:
-                    best_val = None
-                    best_no = None
-
-                elapsed = int(time.time() - start_time)
-                line = f"PROGRESS symbol={CURRENT_SYMBOL} timeframe={CURRENT_TIMEFRAME} trials={trials_done}/{trials_total} best_test_pnl={best_test_pnl_cb} best_trial={best_no} elapsed_s={elapsed}"
-                _write_progress_line(line)
-
-                status = {
-                    'status': 'running',
-                    'symbol': CURRENT_SYMBOL,
-                    'timeframe': CURRENT_TIMEFRAME,
-                    'trials_done': trials_done,
-                    'trials_total': trials_total,
-                    'best_value': best_val,
-                    'best_test_pnl': best_test_pnl_cb,
-                    'best_trial_no': best_no,
-                    'started_at': datetime.fromtimestamp(start_time, timezone.utc).isoformat().replace('+00:00', 'Z'),
-                    'last_update': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-                }
-                _write_status_json(status)
-
-                # ASCII-Fortschrittsbalken (alle 5 Sek. oder beim letzten Trial)
-                now_t = time.time()
-                is_done = trials_done >= trials_total
-                if is_done and _bar_final_printed[0]:
-                    return  # parallele Jobs: finalen Druck nur einmal
-                if now_t - _last_bar_time[0] >= 5.0 or is_done:
-                    _last_bar_time[0] = now_t
-                    bar_width = 25
-                    pct = min(trials_done / trials_total, 1.0) if trials_total > 0 else 0
-                    filled = int(bar_width * pct)
-                    bar = '█' * filled + '░' * (bar_width - filled)
-                    sym_short = CURRENT_SYMBOL.split('/')[0]
-                    best_str = f"{_max_test_pnl[0]:+.2f}%" if _max_test_pnl[0] is not None else "---"
-                    line = f"  [{bar}] {sym_short}/{CURRENT_TIMEFRAME}  {trials_done:>4}/{trials_total}  ({pct*100:5.1f}%)  Best Test-PnL: {best_str}  {elapsed}s"
-                    # \r überschreibt dieselbe Zeile; Leerzeichen am Ende löschen Reste
-                    print(f"\r{line:<80}", end='\n' if is_done else '', flush=True)
-                    if is_done:
-                        _bar_final_printed[0] = True
-            except Exception:
-                pass
-
-        _trials_at_start[0] = len([t for t in study.trials if t.state != optuna.trial.TrialState.RUNNING])
-        try:
-            study.optimize(objective, n_trials=N_TRIALS, n_jobs=args.jobs, callbacks=[_trial_callback], show_progress_bar=False)
-        except Exception as e_opt:
-            print(f"FEHLER während Optuna optimize: {e_opt}")
-            # mark status file as error for visibility
-            _write_progress_line(f"ERROR symbol={CURRENT_SYMBOL} timeframe={CURRENT_TIMEFRAME} error={e_opt}")
-            try:
-                _write_status_json({'status': 'error', 'error': str(e_opt), 'last_update': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')})
-            except Exception:
-                pass
-            continue # Nächsten Task versuchen
-
-        # Beide SMC-Caches nach jedem Task leeren (neues Symbol/Timeframe = andere Daten)
-        with _SMC_TRAIN_CACHE_LOCK:
-            _SMC_TRAIN_CACHE.clear()
-        with _SMC_TEST_CACHE_LOCK:
-            _SMC_TEST_CACHE.clear()
-
-        valid_trials = [t for t in study.trials if t.state == optuna.trial.TrialState.COMPLETE]
-        if not valid_trials:
-            print(f"\n❌ FEHLER: Für {symbol} ({timeframe}) konnte keine Konfiguration gefunden werden.")
-            run_tasks_summary.append({'symbol': symbol, 'timeframe': timeframe, 'status': 'no_valid_trials'})
-            continue
-
-        best_trial = max(valid_trials, key=lambda t: t.value)
-        best_params = best_trial.params
-
-        config_dir = os.path.join(PROJECT_ROOT, 'src', 'titanbot', 'strategy', 'configs')
-        os.makedirs(config_dir, exist_ok=True)
-        config_output_path = os.path.join(config_dir, f'config_{create_safe_filename(symbol, timeframe)}{CONFIG_SUFFIX}.json')
-
-        strategy_config = {
-            'swingsLength': best_params['swingsLength'],
-            'ob_mitigation': best_params['ob_mitigation'],
-            'use_adx_filter': best_params['use_adx_filter'],
-            'adx_period': best_params.get('adx_period', 14),
-            'adx_threshold': best_params.get('adx_threshold', 25),
-            'use_pd_filter': best_params.get('use_pd_filter', True),
-            'use_liquidity_sweep_filter': best_params.get('use_liquidity_sweep_filter', True),
-            'liquidity_lookback': best_params.get('liquidity_lookback', 20),
-            'min_fvg_size_pct': round(best_params.get('min_fvg_size_pct', 0.05), 4),
-            'min_ob_quality': round(best_params.get('min_ob_quality', 0.2), 3),
-            'max_ob_touches': best_params.get('max_ob_touches', 1),
-            'use_rejection_candle': best_params.get('use_rejection_candle', True),
-            'use_mtf_filter': best_params.get('use_mtf_filter', False),
-            'volume_ma_period': 20,
-        }
-
-        risk_config = {
-            'margin_mode': "isolated",
-            'risk_reward_ratio': round(best_params['risk_reward_ratio'], 2),
-            'min_leverage': best_params['min_leverage'],
-            'max_leverage': best_params['max_leverage'],
-            'atr_multiplier_sl': round(best_params['atr_multiplier_sl'], 3),
-            'min_sl_pct': 0.5,
-            'structure_sl_buffer_pct': 0.2,
-            'trailing_stop_activation_rr': round(best_params['trailing_stop_activation_rr'], 2),
-            'trailing_stop_callback_rate_pct': round(best_params['trailing_stop_callback_rate_pct'], 2),
-        }
-        behavior_config = {"use_longs": True, "use_shorts": True}
-        
-        # Extrahiere WFV-Metriken aus best_trial user_attrs
-        best_test_pnl    = best_trial.user_attrs.get('test_pnl',    None)
-        best_train_pnl   = best_trial.user_attrs.get('train_pnl',   None)
-        best_test_wr     = best_trial.user_attrs.get('test_wr',     None)
-        best_test_trades = best_trial.user_attrs.get('test_trades',  None)
-        best_test_dd_pct = best_trial.user_attrs.get('test_dd_pct', None)
-
-        config_output = {
-            "market": {"symbol": symbol, "timeframe": timeframe},
-            "strategy": strategy_config,
-            "risk": risk_config,
-            "behavior": behavior_config,
-            "_meta": {
-                "wfv": "70/30",
-                "test_pnl_pct":    best_test_pnl,
-                "train_pnl_pct":   best_train_pnl,
-                "test_wr":         best_test_wr,
-                "test_trades":     best_test_trades,
-                "test_dd_pct":     best_test_dd_pct,
-                "composite_score": round(best_trial.value, 4) if best_trial.value is not None else None,
-                "optimized_at":    datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-            }
-        }
-
-        # --- Smart-save: überschreibe nur, wenn die neue Konfiguration besser ist als die gespeicherte ---
-        history_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'results')
-        os.makedirs(history_dir, exist_ok=True)
-        history_path = os.path.join(history_dir, 'optimizer_history.json')
-
-        key = create_safe_filename(symbol, timeframe)
-        existing_best = None
-        try:
-            if os.path.exists(history_path):
-                with open(history_path, 'r', encoding='utf-8') as hf:
-                    history = json.load(hf)
-                existing_best = history.get(key, {}).get('best_pnl')
-        except Exception:
-            existing_best = None
-
-        saved = False
-        status = 'saved'
-        config_missing = not os.path.exists(config_output_path)
-        new_test_pnl = best_test_pnl if best_test_pnl is not None else -9999
-
-        # Quality gate: nur speichern wenn OOS PnL positiv ist
-        if new_test_pnl <= 0:
-            print(f"\n❌ Kein profitables OOS-Ergebnis für {symbol} ({timeframe}) — Test-PnL: {new_test_pnl:.2f}%. Config wird NICHT gespeichert.")
-            run_tasks_summary.append({'symbol': symbol, 'timeframe': timeframe, 'status': 'quality_gate_failed', 'test_pnl': new_test_pnl})
-            continue
-
-        if existing_best is None or config_missing or new_test_pnl > existing_best:
-            # besser — schreibe die Config und aktualisiere die Historie
-            try:
-                with open(config_output_path, 'w', encoding='utf-8') as f:
-                    json.dump(config_output, f, indent=4)
-                saved = True
-                status = 'new_best'
-                # update history
-                try:
-                    hist = {}
-                    if os.path.exists(history_path):
-                        with open(history_path, 'r', encoding='utf-8') as hf:
-                            hist = json.load(hf)
-                    hist[key] = {
-                        'best_pnl': new_test_pnl,
-                        'updated_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
-                        'config': os.path.relpath(config_output_path, PROJECT_ROOT)
-                    }
-                    with open(history_path, 'w', encoding='utf-8') as hf:
-                        json.dump(hist, hf, indent=2)
-                except Exception:
-                    pass
-                pnl_str = f"{new_test_pnl:.2f}%" if new_test_pnl != -9999 else "n/a"
-                print(f"\n✔ Beste Konfiguration (Test-PnL: {pnl_str}) wurde in '{config_output_path}' gespeichert.")
-            except Exception as e:
-                print(f"Fehler beim Speichern der Config: {e}")
-                status = 'save_error'
+            contexts.append(ctx)
+
+    STORAGE_SPEC = _storage_spec(args.storage, os.path.join(PROJECT_ROOT, 'artifacts', 'db'))
+
+    # --- Fortschritt (PROGRESS-Zeilen + Status-JSON + ASCII-Balken) ---
+    LOGS_DIR = os.path.join(PROJECT_ROOT, 'logs')
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    PROGRESS_LOG = os.path.join(LOGS_DIR, 'optimizer_output.log')
+    # Ensure the log file always exists (create if missing)
+    if not os.path.exists(PROGRESS_LOG):
+        with open(PROGRESS_LOG, 'w', encoding='utf-8') as pf:
+            pf.write("")
+    STATUS_FILE = os.path.join(PROJECT_ROOT, 'data', 'cache', '.optimization_status.json')
+
+    # --- 2. Paare optimieren (Scheduler, längste zuerst) und Ergebnisse exportieren ---
+    cpu_budget = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if args.parallel == 'processes' and cpu_budget > 1 and len(contexts) > 1:
+        print(f"\nScheduler: {len(contexts)} Paare, bis zu {cpu_budget} Worker-Prozesse gleichzeitig (längste zuerst).")
+    for ctx, study, error in _run_pairs(contexts, STORAGE_SPEC, N_TRIALS, cpu_budget, parallel=args.parallel,
+                                        jobs=args.jobs, warm_start=not args.no_warm_start,
+                                        progress_log=PROGRESS_LOG, status_file=STATUS_FILE):
+        if error is None:
+            run_tasks_summary.append(_export_best_config(ctx, study))
         else:
-            # schlechteres oder gleiches Ergebnis – NICHT überschreiben
-            saved = False
-            status = 'unchanged'
-            print(f"\nℹ️ Gefundene Konfiguration (Test-PnL: {new_test_pnl:.2f}%) ist schlechter/gleich als vorhandene (Test-PnL: {existing_best}). Überschreibe nicht.")
-
-        # Sammle Task-Level Summary für das ganze Run-Report
-        run_tasks_summary.append({
-            'symbol': symbol,
-            'timeframe': timeframe,
-            'test_pnl': best_test_pnl,
-            'train_pnl': best_train_pnl,
-            'test_wr': best_test_wr,
-            'test_trades': best_test_trades,
-            'test_dd_pct': best_test_dd_pct,
-            'composite_score': round(best_trial.value, 4) if best_trial.value is not None else None,
-            'saved': saved,
-            'status': status,
-            'config_path': os.path.relpath(config_output_path, PROJECT_ROOT)
-        })
-
+            run_tasks_summary.append({'symbol': ctx.symbol, 'timeframe': ctx.timeframe, 'status': 'error', 'error': error})
+        ctx.release()
 
     # --- Schreibe Run‑Summary in artifacts/results/last_optimizer_run.json (kurz und maschinenlesbar) ---
     try:
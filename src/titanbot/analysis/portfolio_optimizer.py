@@ -1,8 +1,14 @@
 # src/titanbot/analysis/portfolio_optimizer.py
-# Hybrid: Pre-Filter → Exhaustive Search (≤20 Kandidaten) oder Multi-Start-Greedy (>20)
-import itertools
+# Hybrid: Pre-Filter → Exhaustive Search (≤ EXHAUSTIVE_MAX_COMBOS kollisionsfreie Kombinationen)
+# oder Multi-Start-Greedy. Kombinationen werden über vorberechnete Strategie-Streams bewertet
+# (portfolio_streams.py), die volle Simulation läuft nur noch einmal für das gefundene Optimum.
+# Mit jobs > 1 verteilt ein Prozess-Pool Pre-Filter und Kombinationen auf mehrere Kerne.
+# run_risk_sweep() sucht für mehrere Risikostufen zugleich: eine Kombination wird in einem
+# Durchlauf für alle Stufen bewertet (ein Equity-Zustand pro Stufe).
 import contextlib
 import io
+import math
+import multiprocessing
 import sys
 import os
 import json
@@ -10,10 +16,12 @@ import json
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
-from titanbot.analysis.portfolio_simulator import run_portfolio_simulation
+from titanbot.analysis.portfolio_simulator import run_portfolio_simulation, add_indicators
+from titanbot.analysis.portfolio_streams import build_strategy_streams
 
-EXHAUSTIVE_THRESHOLD = 20  # Bis zu dieser Kandidatenzahl: exhaustive, sonst multi-start greedy
+EXHAUSTIVE_MAX_COMBOS = 2**20 - 1  # Bis zu so vielen kollisionsfreien Kombinationen: exhaustive, sonst greedy
 MAX_GREEDY_STARTS = 10    # Multi-Start-Greedy: nur die Top-N Einzelstrategien als Startpunkt
+EVAL_BATCH = 1024         # Kombinationen pro Worker-Auftrag (exhaustive Suche)
 
 
 def _simulate_silent(start_capital, sim_data, start_date, end_date):
@@ -22,6 +30,260 @@ def _simulate_silent(start_capital, sim_data, start_date, end_date):
         return run_portfolio_simulation(start_capital, sim_data, start_date, end_date)
 
 
+def _with_indicators(strategies_data):
+    """
+    Indikatoren einmal pro Strategie vorberechnen. Jede Simulation nutzt danach
+    dieselben Spalten, statt pro Lauf die Daten zu kopieren und neu zu rechnen.
+    """
+    prepared = {}
+    for fname, sd in strategies_data.items():
+        if 'data' in sd and len(sd['data']) >= 15:
+            sd = {**sd, 'data': add_indicators(sd['data'], sd.get('smc_params', {}))}
+        prepared[fname] = sd
+    return prepared
+
+
+def _build_streams(strategies_data, start_date, end_date):
+    """Phase 1: Signale und Trade-Vorlagen aller Strategien einmal vorberechnen (ohne Print-Output)."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return build_strategy_streams(strategies_data, start_date, end_date)
+
+
+def _admissible(result, target_max_dd_decimal):
+    return bool(result) and not result.get("liquidation_date") \
+        and result.get('max_drawdown_pct', 100.0) / 100.0 <= target_max_dd_decimal
+
+
+# --- Bewertung von Kombinationen (im eigenen Prozess oder in Pool-Workern) ---
+_EVAL_STATE = {}
+
+
+def _init_evaluator(streams, start_capital, target_max_dd_decimal, risk_levels=(None,)):
+    """Pool-Initializer: Streams und Parameter einmal pro Worker übernehmen."""
+    _EVAL_STATE.update(streams=streams, start_capital=start_capital, target=target_max_dd_decimal,
+                       risk_levels=list(risk_levels))
+
+
+def _members(files, mask):
+    return [f for i, f in enumerate(files) if mask >> i & 1]
+
+
+def _outcome(res, target_max_dd_decimal):
+    return (res if _admissible(res, target_max_dd_decimal) else None), bool(res and res['aborted'])
+
+
+def _evaluate_files(files, lane=0):
+    """Phase 2 für die Kombination files auf Risikostufe lane: (Ergebnis oder None wenn unzulässig, vorzeitig abgebrochen)."""
+    streams, target = _EVAL_STATE['streams'], _EVAL_STATE['target']
+    if streams is None:
+        return None, False
+    res = streams.simulate(files, _EVAL_STATE['start_capital'], target, risk_pct=_EVAL_STATE['risk_levels'][lane])
+    return _outcome(res, target)
+
+
+def _evaluate_lanes(lanes):
+    """
+    Je Risikostufe r die Kombination lanes[r] (leer = Stufe auslassen), alle in einem
+    Durchlauf: [(Ergebnis oder None, abgebrochen), ...] in Stufen-Reihenfolge.
+    """
+    streams, target = _EVAL_STATE['streams'], _EVAL_STATE['target']
+    if streams is None:
+        return [(None, False)] * len(lanes)
+    results = streams.simulate_lanes(lanes, _EVAL_STATE['start_capital'], _EVAL_STATE['risk_levels'], target)
+    return [_outcome(res, target) for res in results]
+
+
+def _evaluate_masks(task):
+    """Worker-Auftrag (files, masks, lane): [(Ergebnis oder None, abgebrochen), ...] je Maske."""
+    files, masks, lane = task
+    return [_evaluate_files(_members(files, mask), lane) for mask in masks]
+
+
+def _better(res, key, current):
+    """res schlägt current = (schlüssel, dateien, ergebnis): mehr Endkapital, bei Gleichstand kleinerer Schlüssel."""
+    if current is None:
+        return True
+    capital = current[2]['end_capital']
+    return res['end_capital'] > capital or (res['end_capital'] == capital and key < current[0])
+
+
+def _best_of_masks(task):
+    """
+    Worker-Auftrag der exhaustiven Suche (files, masks, size, lane_files). Jede Maske über files
+    wird in einem Durchlauf für alle Stufen r bewertet, deren Kandidaten lane_files[r] sie
+    enthalten (None = Stufe nicht dabei), Mitglieder in der Kandidaten-Reihenfolge der Stufe.
+    Rückgabe (size, [(schlüssel, dateien, ergebnis) oder None je Stufe], masken, simuliert, abgebrochen).
+    Schlüssel (Größe, Kandidaten-Ränge): bei Gleichstand gewinnt, was itertools.combinations
+    über die Kandidaten der Stufe zuerst erzeugt.
+    """
+    files, masks, size, lane_files = task
+    positions = [None if lf is None else {f: i for i, f in enumerate(lf)} for lf in lane_files]
+    best = [None] * len(lane_files)
+    simulated = aborted = 0
+    for mask in masks:
+        members = _members(files, mask)
+        lanes, keys = [], []
+        for pos, lf in zip(positions, lane_files):
+            if pos is None or any(f not in pos for f in members):
+                lanes.append([])
+                keys.append(None)
+            else:
+                ranks = sorted(pos[f] for f in members)
+                lanes.append([lf[i] for i in ranks])
+                keys.append((size, tuple(ranks)))
+        if not any(lanes):
+            continue
+        for r, ((res, was_aborted), key) in enumerate(zip(_evaluate_lanes(lanes), keys)):
+            if key is None:
+                continue
+            simulated += 1
+            aborted += was_aborted
+            if res is not None and _better(res, key, best[r]):
+                best[r] = (key, lanes[r], res)
+    return size, best, len(masks), simulated, aborted
+
+
+class _Evaluator:
+    """
+    Führt Bewertungs-Aufträge im eigenen Prozess (jobs=1) oder in einem Pool aus jobs
+    Prozessen aus (spawn). Die Worker erhalten die Streams einmal beim Start; imap()
+    liefert die Ergebnisse in Auftragsreihenfolge, sobald sie fertig sind.
+    risk_levels: risk_per_trade_pct je Stufe in % (None = aus den risk_params).
+    """
+
+    def __init__(self, streams, start_capital, target_max_dd_decimal, jobs=1, risk_levels=(None,)):
+        self.jobs = max(1, jobs)
+        self.risk_levels = list(risk_levels)
+        self.pool = None
+        if self.jobs > 1:
+            ctx = multiprocessing.get_context('spawn')
+            self.pool = ctx.Pool(self.jobs, initializer=_init_evaluator,
+                                 initargs=(streams, start_capital, target_max_dd_decimal, self.risk_levels))
+        else:
+            _init_evaluator(streams, start_capital, target_max_dd_decimal, self.risk_levels)
+
+    def imap(self, func, tasks):
+        return self.pool.imap(func, tasks) if self.pool is not None else map(func, tasks)
+
+    def chunk_size(self, n_items):
+        """Auftragsgröße, damit n_items auf alle Worker verteilt werden (höchstens EVAL_BATCH)."""
+        return max(1, min(EVAL_BATCH, math.ceil(n_items / (self.jobs * 4))))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+class _SubsetCache:
+    """
+    Ergebnisse je Kandidaten-Teilmenge, Schlüssel ist die Bitmaske über candidate_files.
+    Mitglieder werden immer in Kandidaten-Reihenfolge simuliert: dieselbe Menge (z.B. von
+    zwei Greedy-Startpunkten aus erreicht) liefert dasselbe Ergebnis und wird nur einmal
+    gerechnet. Simulationen brechen ab, sobald der laufende Drawdown das Ziel überschreitet.
+    lane: Risikostufe des Evaluators, auf der simuliert wird.
+    """
+
+    def __init__(self, candidate_files, evaluator, target_max_dd_decimal, lane=0):
+        self.files = list(candidate_files)
+        self.bits = {f: 1 << i for i, f in enumerate(self.files)}
+        self.evaluator = evaluator
+        self.target_max_dd_decimal = target_max_dd_decimal
+        self.lane = lane
+        self.results = {}
+        self.simulated = self.hits = self.aborted = 0
+
+    def mask(self, files):
+        mask = 0
+        for f in files:
+            mask |= self.bits[f]
+        return mask
+
+    def files_of(self, mask):
+        return _members(self.files, mask)
+
+    def remember(self, files, result):
+        """Bereits bekanntes Ergebnis (z.B. aus dem Pre-Filter) übernehmen."""
+        self.results[self.mask(files)] = result if _admissible(result, self.target_max_dd_decimal) else None
+
+    def evaluate(self, mask):
+        """Ergebnis der Teilmenge, oder None wenn sie nicht simulierbar ist, liquidiert oder das DD-Ziel reißt."""
+        return self.evaluate_many([mask])[0]
+
+    def evaluate_many(self, masks):
+        """Ergebnisse wie evaluate() für alle masks; noch unbekannte werden parallel gerechnet."""
+        missing = [mask for mask in dict.fromkeys(masks) if mask not in self.results]
+        self.hits += len(masks) - len(missing)
+        step = self.evaluator.chunk_size(len(missing))
+        batches = [missing[i:i + step] for i in range(0, len(missing), step)]
+        tasks = [(self.files, b, self.lane) for b in batches]
+        for batch, outcomes in zip(batches, self.evaluator.imap(_evaluate_masks, tasks)):
+            for mask, (res, aborted) in zip(batch, outcomes):
+                self.results[mask] = res
+                self.simulated += 1
+                self.aborted += aborted
+        return [self.results[mask] for mask in masks]
+
+
+def _search_exhaustive(evaluator, files, coins, total_combos, lane_files):
+    """
+    Alle kollisionsfreien Teilmengen von files, nach Größe und lexikografisch (wie itertools.combinations),
+    gemeinsam für alle Stufen mit Kandidaten lane_files[r] (None = Stufe nicht dabei).
+    Rückgabe ([(dateien, ergebnis) oder (None, None) je Stufe], simuliert, abgebrochen).
+    """
+    def tasks():
+        for size in range(1, len(set(coins)) + 1):
+            batch = []
+            for mask in _collision_free_subsets(coins, size):
+                batch.append(mask)
+                if len(batch) == EVAL_BATCH:
+                    yield files, batch, size, lane_files
+                    batch = []
+            if batch:
+                yield files, batch, size, lane_files
+
+    best = [None] * len(lane_files)
+    done = simulated = aborted = 0
+    for size, found, count, n_simulated, n_aborted in evaluator.imap(_best_of_masks, tasks()):
+        done += count
+        simulated += n_simulated
+        aborted += n_aborted
+        for r, candidate in enumerate(found):
+            if candidate is not None and _better(candidate[2], candidate[0], best[r]):
+                best[r] = candidate
+        best_capital = max((b[2]['end_capital'] for b in best if b is not None), default=-1)
+        print(f"\r  [{done:>7}/{total_combos}] Größe {size} | Bestes Kapital: {best_capital:.2f} USDT",
+              end='', flush=True)
+    return [(b[1], b[2]) if b is not None else (None, None) for b in best], simulated, aborted
+
+
+def _count_collision_free(coins):
+    """Anzahl nicht-leerer Teilmengen mit höchstens einer Strategie je Coin."""
+    total = 1
+    for coin in set(coins):
+        total *= coins.count(coin) + 1
+    return total - 1
+
+
+def _collision_free_subsets(coins, size):
+    """
+    Bitmasken aller Teilmengen der Größe size ohne doppelten Coin, in der Reihenfolge von
+    itertools.combinations. Ein Zweig endet bei der ersten Kollision (jede Obermenge kollidiert auch).
+    """
+    n = len(coins)
+
+    def extend(start, mask, used, remaining):
+        if remaining == 0:
+            yield mask
+            return
+        for i in range(start, n - remaining + 1):
+            if coins[i] not in used:
+                yield from extend(i + 1, mask | (1 << i), used | {coins[i]}, remaining - 1)
+
+    return extend(0, 0, frozenset(), size)
+
+
 def _build_sim_data(files, strategies_data):
     sim_data = {}
     for fname in files:
@@ -33,26 +295,15 @@ def _build_sim_data(files, strategies_data):
     return sim_data
 
 
-def _no_coin_collision(files, strategies_data):
-    coins = [strategies_data[f]['symbol'].split('/')[0] for f in files if f in strategies_data]
-    return len(coins) == len(set(coins))
-
-
-def _greedy_from(start_file, candidate_pool, strategies_data, start_capital, start_date, end_date,
-                 target_max_dd_decimal, sim_counter):
+def _greedy_from(start_file, candidate_pool, strategies_data, cache, sim_counter):
     """
     Greedy-Lauf von start_file aus. Gibt (best_files, best_result, sim_counter) zurück.
     sim_counter ist ein dict {'done': int, 'total': int} für Fortschrittsanzeige.
     """
-    sim_data = _build_sim_data([start_file], strategies_data)
-    if sim_data is None:
-        return None, None, sim_counter
-
     sim_counter['done'] += 1
-    result = _simulate_silent(start_capital, sim_data, start_date, end_date)
-    if not result or result.get("liquidation_date"):
-        return None, None, sim_counter
-    if result.get('max_drawdown_pct', 100.0) / 100.0 > target_max_dd_decimal:
+    best_mask = cache.mask([start_file])
+    result = cache.evaluate(best_mask)
+    if result is None:
         return None, None, sim_counter
 
     best_files = [start_file]
@@ -71,12 +322,8 @@ def _greedy_from(start_file, candidate_pool, strategies_data, start_capital, sta
         candidates_this_round = [f for f in remaining
                                   if strategies_data.get(f, {}).get('symbol', '').split('/')[0] not in selected_coins]
 
+        results = cache.evaluate_many([best_mask | cache.mask([c]) for c in candidates_this_round])
         for idx, candidate in enumerate(candidates_this_round):
-            team = best_files + [candidate]
-            sim_data = _build_sim_data(team, strategies_data)
-            if sim_data is None:
-                continue
-
             sim_counter['done'] += 1
             print(f"\r  Sim {sim_counter['done']}/{sim_counter['total']} | "
                   f"Start {sim_counter['start_i']}/{sim_counter['start_n']} | "
@@ -84,10 +331,8 @@ def _greedy_from(start_file, candidate_pool, strategies_data, start_capital, sta
                   f"Bestes Kapital: {sim_counter['best_capital']:.2f} USDT",
                   end='', flush=True)
 
-            res = _simulate_silent(start_capital, sim_data, start_date, end_date)
-            if not res or res.get("liquidation_date"):
-                continue
-            if res.get('max_drawdown_pct', 100.0) / 100.0 > target_max_dd_decimal:
+            res = results[idx]
+            if res is None:
                 continue
             if res['end_capital'] > best_addition_capital:
                 best_addition_capital = res['end_capital']
@@ -96,6 +341,7 @@ def _greedy_from(start_file, candidate_pool, strategies_data, start_capital, sta
 
         if best_addition:
             best_files.append(best_addition)
+            best_mask |= cache.mask([best_addition])
             selected_coins.add(strategies_data[best_addition]['symbol'].split('/')[0])
             best_capital = best_addition_capital
             best_result = best_addition_result
@@ -105,99 +351,109 @@ def _greedy_from(start_file, candidate_pool, strategies_data, start_capital, sta
         else:
             break
 
-    return best_files, best_result, sim_counter
+    return cache.files_of(best_mask), best_result, sim_counter
 
 
-def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date, target_max_dd: float):
-    print(f"\n--- Portfolio-Optimierung: Max DD <= {target_max_dd:.2f}% ---")
-    target_max_dd_decimal = target_max_dd / 100.0
+def _coin(strategies_data, filename):
+    return strategies_data[filename]['symbol'].split('/')[0]
 
-    if not strategies_data:
-        print("Keine Strategien gefunden.")
-        return None
+
+def _search_lanes(start_capital, strategies_data, target_max_dd, evaluator):
+    """
+    Pre-Filter und Suche für jede Risikostufe des Evaluators. Einzel-Configs und (bei
+    exhaustiver Suche) Kombinationen werden für alle Stufen in einem Durchlauf bewertet;
+    jede Stufe hat eigene Kandidaten und findet dasselbe Portfolio wie eine Suche allein.
+    Rückgabe: [(best_files, Kennzahlen) oder (None, None) je Stufe].
+    """
+    target_max_dd_decimal = target_max_dd / 100.0
+    risk_levels = evaluator.risk_levels
+    labels = ['' if risk is None else f"Risiko {risk:.1f}%: " for risk in risk_levels]
+    if evaluator.jobs > 1:
+        print(f"Bewertung in {evaluator.jobs} Prozessen.")
 
     # --- 1. Pre-Filter ---
     total = len(strategies_data)
     print(f"1/2: Pre-Filter — {total} Configs werden einzeln getestet...")
-    valid_candidates = []
+    valid_candidates = [[] for _ in risk_levels]
 
-    for i, (filename, strat_data) in enumerate(strategies_data.items(), 1):
+    singles = evaluator.imap(_evaluate_lanes, [[[filename]] * len(risk_levels) for filename in strategies_data])
+    for i, (filename, outcomes) in enumerate(zip(strategies_data, singles), 1):
         print(f"\r  [{i:>3}/{total}] {filename:<50}", end='', flush=True)
-        key = f"{strat_data['symbol']}_{strat_data['timeframe']}"
-        sim_data = {key: strat_data}
-        if 'data' not in strat_data or strat_data['data'].empty:
-            continue
+        for candidates, (result, _) in zip(valid_candidates, outcomes):
+            if result is not None and result['end_capital'] > start_capital:
+                candidates.append({
+                    'filename': filename,
+                    'end_capital': result['end_capital'],
+                    'max_dd': result.get('max_drawdown_pct', 100.0),
+                    'result': result,
+                })
 
-        result = _simulate_silent(start_capital, sim_data, start_date, end_date)
-        if not result or result.get("liquidation_date"):
+    print()  # Zeilenumbruch nach letztem \r
+    found = [(None, None)] * len(risk_levels)
+    caches = [None] * len(risk_levels)
+    for r, candidates in enumerate(valid_candidates):
+        if not candidates:
+            print(f"{labels[r]}Keine Einzelstrategie erfüllte Max DD <= {target_max_dd:.2f}%.")
             continue
+        candidates.sort(key=lambda x: x['end_capital'], reverse=True)
+        print(f"-> {labels[r]}{len(candidates)}/{total} Kandidaten bestehen Pre-Filter:")
+        for c in candidates:
+            print(f"   {c['filename']:<50} | Kapital: {c['end_capital']:>8.2f} USDT | DD: {c['max_dd']:>5.1f}%")
+        caches[r] = _SubsetCache([c['filename'] for c in candidates], evaluator, target_max_dd_decimal, r)
+        for c in candidates:
+            caches[r].remember([c['filename']], c['result'])
+
+    active = [r for r, cache in enumerate(caches) if cache is not None]
+    if not active:
+        return found
 
-        actual_dd = result.get('max_drawdown_pct', 100.0) / 100.0
-        if actual_dd <= target_max_dd_decimal and result['end_capital'] > start_capital:
-            valid_candidates.append({
-                'filename': filename,
-                'end_capital': result['end_capital'],
-                'max_dd': actual_dd * 100,
-                'result': result,
-            })
-
-    print()  # Zeilenumbruch nach letztem \r
-    if not valid_candidates:
-        print(f"Keine Einzelstrategie erfüllte Max DD <= {target_max_dd:.2f}%.")
-        return {"optimal_portfolio": [], "final_result": None}
+    # --- 2. Suche ---
+    def coins_of(files):
+        return [_coin(strategies_data, f) for f in files]
 
-    valid_candidates.sort(key=lambda x: x['end_capital'], reverse=True)
-    candidate_files = [c['filename'] for c in valid_candidates]
-    n = len(candidate_files)
-    print(f"-> {n}/{total} Kandidaten bestehen Pre-Filter:")
-    for c in valid_candidates:
-        print(f"   {c['filename']:<50} | Kapital: {c['end_capital']:>8.2f} USDT | DD: {c['max_dd']:>5.1f}%")
+    def union_of(lanes):
+        return list(dict.fromkeys(f for r in lanes for f in caches[r].files))
 
-    # --- 2. Suche ---
-    best_files = None
-    best_result = None
-    best_capital = -1
-
-    if n <= EXHAUSTIVE_THRESHOLD:
-        total_combos = 2**n - 1
-        print(f"\n2/2: Exhaustive Search — {total_combos} Kombinationen ({n} Kandidaten)...")
-        done = 0
-        for size in range(1, n + 1):
-            combos = list(itertools.combinations(candidate_files, size))
-            for combo in combos:
-                done += 1
-                print(f"\r  [{done:>6}/{total_combos}] Größe {size} | Bestes Kapital: {best_capital:.2f} USDT",
-                      end='', flush=True)
-                if not _no_coin_collision(list(combo), strategies_data):
-                    continue
-                sim_data = _build_sim_data(list(combo), strategies_data)
-                if sim_data is None:
-                    continue
-                res = _simulate_silent(start_capital, sim_data, start_date, end_date)
-                if not res or res.get("liquidation_date"):
-                    continue
-                if res.get('max_drawdown_pct', 100.0) / 100.0 > target_max_dd_decimal:
-                    continue
-                if res['end_capital'] > best_capital:
-                    best_capital = res['end_capital']
-                    best_files = list(combo)
-                    best_result = res
+    exhaustive = [r for r in active if _count_collision_free(coins_of(caches[r].files)) <= EXHAUSTIVE_MAX_COMBOS]
+    if _count_collision_free(coins_of(union_of(exhaustive))) <= EXHAUSTIVE_MAX_COMBOS:
+        groups = [exhaustive] if exhaustive else []
+    else:
+        groups = [[r] for r in exhaustive]
+
+    simulated = aborted = 0
+    for group in groups:
+        files = union_of(group)
+        coins = coins_of(files)
+        total_combos = _count_collision_free(coins)
+        scope = f", {len(group)} Risikostufen in einem Durchlauf" if len(group) > 1 else ""
+        print(f"\n2/2: {labels[group[0]] if len(group) == 1 else ''}Exhaustive Search — {total_combos} "
+              f"kollisionsfreie Kombinationen ({len(files)} Kandidaten, {len(set(coins))} Coins{scope})...")
+        lane_files = [caches[r].files if r in group else None for r in range(len(risk_levels))]
+        results, n_simulated, n_aborted = _search_exhaustive(evaluator, files, coins, total_combos, lane_files)
+        for r in group:
+            found[r] = results[r]
+        simulated += n_simulated
+        aborted += n_aborted
         print()
 
-    else:
-        starts = candidate_files[:MAX_GREEDY_STARTS]
+    for r in active:
+        if r in exhaustive:
+            continue
+        cache = caches[r]
+        n = len(cache.files)
+        best_files, best_result, best_capital = None, None, -1
+        starts = cache.files[:MAX_GREEDY_STARTS]
         # Geschätzte Gesamtsimulationen: starts × (1 + n Kandidaten pro Schritt × ~n/2 Schritte)
         estimated_total = len(starts) * (1 + n * (n // 2))
         sim_counter = {'done': 0, 'total': estimated_total, 'best_capital': best_capital,
                        'start_i': 0, 'start_n': len(starts)}
 
-        print(f"\n2/2: Multi-Start-Greedy — Top {len(starts)} von {n} Kandidaten als Startpunkt...")
+        print(f"\n2/2: {labels[r]}Multi-Start-Greedy — Top {len(starts)} von {n} Kandidaten als Startpunkt...")
         for i, start_file in enumerate(starts, 1):
             sim_counter['start_i'] = i
             print(f"\n  Startpunkt {i}/{len(starts)}: {start_file}")
             files, result, sim_counter = _greedy_from(
-                start_file, candidate_files, strategies_data,
-                start_capital, start_date, end_date, target_max_dd_decimal, sim_counter
+                start_file, cache.files, strategies_data, cache, sim_counter
             )
             if result and result['end_capital'] > best_capital:
                 best_capital = result['end_capital']
@@ -205,22 +461,106 @@ def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date
                 best_files = files
                 best_result = result
                 print(f"\n  ✓ Neues Optimum: {best_capital:.2f} USDT | DD: {best_result['max_drawdown_pct']:.2f}% | {len(best_files)} Strategien")
+        found[r] = (best_files, best_result)
         print()
 
-    if best_files is None:
-        print(f"Kein Portfolio gefunden das Max DD <= {target_max_dd:.2f}% einhält.")
-        return {"optimal_portfolio": [], "final_result": None}
+    simulated += sum(caches[r].simulated for r in active)
+    aborted += sum(caches[r].aborted for r in active)
+    hits = sum(caches[r].hits for r in active)
+    print(f"-> {simulated} Simulationen, {hits} aus dem Cache, "
+          f"{aborted} bei Drawdown > {target_max_dd:.2f}% vorzeitig abgebrochen")
 
-    print(f"\nOptimum: {len(best_files)} Strategien | Endkapital: {best_capital:.2f} USDT | Max DD: {best_result['max_drawdown_pct']:.2f}%")
+    for r in active:
+        if found[r][0] is None:
+            print(f"{labels[r]}Kein Portfolio gefunden das Max DD <= {target_max_dd:.2f}% einhält.")
+    return found
+
+
+def _prepare_search(start_capital, strategies_data, start_date, end_date, target_max_dd, jobs, risk_levels):
+    """Indikatoren und Streams einmal vorberechnen; Rückgabe (strategies_data, Evaluator)."""
+    strategies_data = _with_indicators(strategies_data)
+    print("Berechne Signal-Streams aller Strategien (einmalig)...")
+    streams = _build_streams(strategies_data, start_date, end_date)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return strategies_data, _Evaluator(streams, start_capital, target_max_dd / 100.0, jobs, risk_levels)
+
+
+def simulate_portfolio(start_capital, strategies_data, files, start_date, end_date):
+    """Volle Simulation (Equity-Kurve, Trade-Liste) des Portfolios files, ohne Print-Output."""
+    return _simulate_silent(start_capital, _build_sim_data(files, strategies_data), start_date, end_date)
 
+
+def save_optimal_portfolio(files):
+    """Schreibt das Portfolio nach artifacts/results/optimization_results.json (liest master_runner.py)."""
     try:
         results_dir = os.path.join(PROJECT_ROOT, 'artifacts', 'results')
         os.makedirs(results_dir, exist_ok=True)
         output_path = os.path.join(results_dir, 'optimization_results.json')
         with open(output_path, 'w') as f:
-            json.dump({"optimal_portfolio": best_files}, f, indent=4)
+            json.dump({"optimal_portfolio": files}, f, indent=4)
         print(f"Gespeichert: '{output_path}'")
     except Exception as e:
         print(f"Fehler beim Speichern: {e}")
 
+
+def run_portfolio_optimizer(start_capital, strategies_data, start_date, end_date, target_max_dd: float,
+                            jobs: int = 1):
+    """
+    Sucht das Portfolio mit dem höchsten Endkapital, das target_max_dd einhält.
+    jobs: Prozesse für die Bewertung der Kombinationen (1 = im eigenen Prozess, <= 0 = alle Kerne).
+    """
+    print(f"\n--- Portfolio-Optimierung: Max DD <= {target_max_dd:.2f}% ---")
+
+    if not strategies_data:
+        print("Keine Strategien gefunden.")
+        return None
+
+    strategies_data, evaluator = _prepare_search(start_capital, strategies_data, start_date, end_date,
+                                                 target_max_dd, jobs, [None])
+    try:
+        [(best_files, best_result)] = _search_lanes(start_capital, strategies_data, target_max_dd, evaluator)
+    finally:
+        evaluator.close()
+
+    if best_files is None:
+        return {"optimal_portfolio": [], "final_result": None}
+
+    # Volle Simulation nur für das Optimum (Equity-Kurve, Trade-Liste für die Auswertung)
+    best_capital = best_result['end_capital']
+    best_result = simulate_portfolio(start_capital, strategies_data, best_files, start_date, end_date)
+
+    print(f"\nOptimum: {len(best_files)} Strategien | Endkapital: {best_capital:.2f} USDT | Max DD: {best_result['max_drawdown_pct']:.2f}%")
+    save_optimal_portfolio(best_files)
+
     return {"optimal_portfolio": best_files, "final_result": best_result}
+
+
+def run_risk_sweep(start_capital, strategies_data, start_date, end_date, target_max_dd: float, risk_levels,
+                   jobs: int = 1):
+    """
+    Portfolio-Optimierung für mehrere Risikostufen auf einmal: risk_levels sind
+    risk_per_trade_pct-Werte in %, die für alle Strategien gelten. Streams, Pre-Filter und
+    exhaustive Suche laufen einmal, jede Kombination wird in einem Durchlauf für alle Stufen
+    gerechnet. Je Stufe dasselbe Portfolio wie run_portfolio_optimizer mit überschriebenen
+    risk_params; final_result enthält nur die Kennzahlen (ohne Equity-Kurve und Trade-Liste,
+    dafür simulate_portfolio). Nichts wird gespeichert (dafür save_optimal_portfolio).
+    Rückgabe {risk: {"optimal_portfolio": [...], "final_result": dict oder None}} oder None.
+    """
+    risk_levels = list(risk_levels)
+    print(f"\n--- Portfolio-Optimierung: Max DD <= {target_max_dd:.2f}% | "
+          f"{len(risk_levels)} Risikostufen ({', '.join(f'{r:.1f}%' for r in risk_levels)}) ---")
+
+    if not strategies_data:
+        print("Keine Strategien gefunden.")
+        return None
+
+    strategies_data, evaluator = _prepare_search(start_capital, strategies_data, start_date, end_date,
+                                                 target_max_dd, jobs, risk_levels)
+    try:
+        found = _search_lanes(start_capital, strategies_data, target_max_dd, evaluator)
+    finally:
+        evaluator.close()
+
+    return {risk: {"optimal_portfolio": files or [], "final_result": result}
+            for risk, (files, result) in zip(risk_levels, found)}
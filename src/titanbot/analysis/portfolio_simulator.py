@@ -4,31 +4,39 @@ import numpy as np
 from tqdm import tqdm
 import sys
 import os
-import ta # Import für ATR/ADX hinzugefügt
 import math # Import für math.ceil
 import json
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
 sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
-from titanbot.strategy.smc_engine import SMCEngine, Bias
-from titanbot.strategy.trade_logic import get_titan_signal, get_zone_based_tp
+from titanbot.strategy.smc_engine import SMCEngine, Bias, smc_columns
+from titanbot.strategy.smc_cache import default_cache, process_dataframe_cached
+from titanbot.strategy.trade_logic import compile_signal_params, signal_from_candle, get_zone_based_tp
 from titanbot.analysis.backtester import load_data, _resolve_ambiguous_exit, _get_fine_slice # Importiere load_data für HTF-Daten
 from titanbot.utils.timeframe_utils import determine_htf # NEU: Import für determine_htf
+from titanbot.utils.indicators import INDICATOR_COLUMNS, compute_indicators
 
-def run_portfolio_simulation(start_capital, strategies_data, start_date, end_date):
-    """
-    Führt eine chronologische Portfolio-Simulation mit mehreren SMC-Strategien durch.
-    Beinhaltet MTF-Bias-Check.
 
-    Intrabar-Aufloesung (SL vs. statischer TP in derselben Kerze, oraclebot-Muster):
-    nur fuer den Fall "noch nicht trailing" -- sobald Trailing aktiv ist, gibt es
-    nur noch EIN bewegliches Level (kein TP mehr relevant), daher keine Ambiguitaet
-    mehr aufzuloesen. Nutzt strat_data['fine_data'] falls vom Aufrufer mitgegeben
-    (optional, faellt sonst auf die alte SL-first-Konvention zurueck).
+def add_indicators(data, smc_params):
     """
-    print("\n--- Starte Portfolio-Simulation (SMC)... ---")
+    ATR/ADX/volume_ma wie im Backtester. Gibt eine flache Kopie von data mit den
+    Indikator-Spalten zurück — data selbst bleibt unverändert.
+    """
+    adx_period = smc_params.get('adx_period', 14)
+    volume_ma_period = smc_params.get('volume_ma_period', 20)
+    out = data.copy(deep=False)
+    for col, values in compute_indicators(out, adx_period, volume_ma_period).items():
+        out[col] = values
+    return out
+
 
+def _prepare_strategies(strategies_data, start_date, end_date):
+    """
+    Schritte 0-2 der Portfolio-Simulation: MTF-Bias, Indikatoren und SMC-Analyse je Strategie.
+    Rückgabe: (valid_strategies, smc_results, signal_params, market_bias, sorted_timestamps)
+    oder None, wenn keine Strategie verwertbar ist.
+    """
     # --- 0. MTF-Bias für jede Strategie bestimmen ---
     # Wenn market_bias bereits im strat-Dict vorberechnet wurde (z.B. vom Optimizer),
     # wird load_data übersprungen — verhindert 3520x API-Calls im Greedy-Loop.
@@ -51,7 +59,7 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                 htf_data = load_data(symbol, htf, start_date, end_date)
                 if not htf_data.empty and len(htf_data) >= 150:
                     htf_engine = SMCEngine(settings={'swingsLength': 50, 'ob_mitigation': 'Close'})
-                    htf_engine.process_dataframe(htf_data[['open', 'high', 'low', 'close']].copy())
+                    htf_engine.process_dataframe(htf_data[['open', 'high', 'low', 'close']], bar_state_format='arrays')
                     market_bias = htf_engine.swingTrend
             strat['market_bias'] = market_bias
 
@@ -68,25 +76,16 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
         if 'data' in strat and not strat['data'].empty:
             
             try:
-                temp_data = strat['data'].copy()
+                # Flache Kopie: neue Spalten landen nur hier, die OHLCV-Daten des Aufrufers werden geteilt
+                temp_data = strat['data'].copy(deep=False)
                 smc_params = strat.get('smc_params', {})
-                adx_period = smc_params.get('adx_period', 14)
-                volume_ma_period = smc_params.get('volume_ma_period', 20)
 
                 if len(temp_data) >= 15:
-                    # ATR
-                    atr_indicator = ta.volatility.AverageTrueRange(high=temp_data['high'], low=temp_data['low'], close=temp_data['close'], window=14)
-                    temp_data['atr'] = atr_indicator.average_true_range()
-
-                    # ADX
-                    adx_indicator = ta.trend.ADXIndicator(high=temp_data['high'], low=temp_data['low'], close=temp_data['close'], window=adx_period)
-                    temp_data['adx'] = adx_indicator.adx()
-                    temp_data['adx_pos'] = adx_indicator.adx_pos()
-                    temp_data['adx_neg'] = adx_indicator.adx_neg()
-                    
-                    # Volume MA (NEU)
-                    temp_data['volume_ma'] = temp_data['volume'].rolling(window=volume_ma_period).mean()
-                    
+                    # Indikatoren nur berechnen, wenn der Aufrufer sie nicht schon vorberechnet hat
+                    # (z.B. portfolio_optimizer einmal pro Strategie statt pro Simulation)
+                    if not all(col in temp_data.columns for col in INDICATOR_COLUMNS):
+                        temp_data = add_indicators(temp_data, smc_params)
+
                     temp_data.dropna(subset=['atr', 'adx'], inplace=True) 
 
                     if not temp_data.empty:
@@ -118,6 +117,8 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
     # --- 2. SMC-Analyse für jede Strategie ---
     print("2/4: Führe SMC-Analyse für alle gültigen Strategien durch...")
     smc_results_by_strategy = {}
+    signal_params_by_strategy = {}
+    smc_cache = default_cache()  # Disk-Cache nur mit TITANBOT_SMC_CACHE=1
     valid_strategies = {}
 
     for key, strat in tqdm(strategies_data_processed.items(), desc="SMC Analyse"):
@@ -127,15 +128,15 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
             strat['smc_params']['timeframe'] = strat['timeframe']
             strat['smc_params']['htf'] = strat['htf'] # HTF hinzufügen
 
-            engine = SMCEngine(settings=strat.get('smc_params', {}))
-            smc_result = engine.process_dataframe(strat['data'][['open','high','low','close']].copy())
+            smc_result = process_dataframe_cached(strat['data'], strat.get('smc_params', {}), smc_cache,
+                                                  strat['symbol'], strat['timeframe'])
             smc_results_by_strategy[key] = smc_result
             # SMC-Spalten (P/D, Sweep-Flags) in Strategie-Daten übertragen — wie in backtester.py
-            enriched_df = smc_result.get('enriched_df')
-            if enriched_df is not None:
-                for col in enriched_df.columns:
-                    if col.startswith('smc_'):
-                        strat['data'][col] = enriched_df[col].values
+            for col, values in smc_columns(smc_result).items():
+                strat['data'][col] = values
+            # Signal-Parameter einmal pro Strategie kompilieren statt pro Kerze
+            signal_params_by_strategy[key] = compile_signal_params(
+                {"strategy": strat.get('smc_params', {}), "risk": strat.get('risk_params', {})})
             valid_strategies[key] = strat
         except Exception as e:
             print(f"FEHLER bei SMC-Analyse für {key}: {e}")
@@ -144,6 +145,26 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
         print("Für keine Strategie konnte die SMC-Analyse erfolgreich durchgeführt werden.")
         return None
 
+    return valid_strategies, smc_results_by_strategy, signal_params_by_strategy, mtf_bias_by_strategy, sorted_timestamps
+
+
+def run_portfolio_simulation(start_capital, strategies_data, start_date, end_date):
+    """
+    Führt eine chronologische Portfolio-Simulation mit mehreren SMC-Strategien durch.
+    Beinhaltet MTF-Bias-Check.
+
+    Intrabar-Aufloesung (SL vs. statischer TP in derselben Kerze, oraclebot-Muster):
+    nur fuer den Fall "noch nicht trailing" -- sobald Trailing aktiv ist, gibt es
+    nur noch EIN bewegliches Level (kein TP mehr relevant), daher keine Ambiguitaet
+    mehr aufzuloesen. Nutzt strat_data['fine_data'] falls vom Aufrufer mitgegeben
+    (optional, faellt sonst auf die alte SL-first-Konvention zurueck).
+    """
+    print("\n--- Starte Portfolio-Simulation (SMC)... ---")
+    prepared = _prepare_strategies(strategies_data, start_date, end_date)
+    if prepared is None:
+        return None
+    valid_strategies, smc_results_by_strategy, signal_params_by_strategy, mtf_bias_by_strategy, sorted_timestamps = prepared
+
     # --- 3. Chronologische Simulation ---
     print("3/4: Führe chronologische Backtests durch...")
     equity = start_capital
@@ -162,8 +183,23 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
     max_allowed_effective_leverage = 10
     absolute_max_notional_value = 1000000
     min_notional = 5.0
-    
-    for ts in tqdm(sorted_timestamps, desc="Simuliere Portfolio"):
+
+    # Globale Zeitachse: je Strategie die Kerzen-Position pro Zeitstempel (-1 = keine Kerze),
+    # dazu OHLC als Arrays und die Kerzen als Dicts für die Signalprüfung. Die Schleife
+    # indiziert nur noch diese Arrays statt .loc[ts] / ts in index / get_loc(ts).
+    timeline = pd.DatetimeIndex(sorted_timestamps)
+    bars = {}
+    for key, strat in valid_strategies.items():
+        data = strat['data']
+        bars[key] = {
+            'pos': data.index.get_indexer(timeline),
+            'high': data['high'].to_numpy(dtype=np.float64),
+            'low': data['low'].to_numpy(dtype=np.float64),
+            'close': data['close'].to_numpy(dtype=np.float64),
+            'candles': data.to_dict('records'),
+        }
+
+    for t, ts in enumerate(tqdm(sorted_timestamps, desc="Simuliere Portfolio")):
         if liquidation_date: break
 
         current_total_equity = equity
@@ -173,35 +209,36 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
         positions_to_close = []
         for key, pos in open_positions.items():
             strat_data = valid_strategies.get(key)
-            if not strat_data or ts not in strat_data['data'].index:
+            i = bars[key]['pos'][t] if strat_data else -1
+            if i < 0:
                 if pos.get('last_known_price'):
                     pnl_mult = 1 if pos['side'] == 'long' else -1
                     unrealized_pnl += pos['notional_value'] * (pos['last_known_price'] / pos['entry_price'] -1) * pnl_mult
                 continue
 
-            current_candle = strat_data['data'].loc[ts]
-            pos['last_known_price'] = current_candle['close']
+            high, low, close = bars[key]['high'][i], bars[key]['low'][i], bars[key]['close'][i]
+            pos['last_known_price'] = close
             exit_price = None
             was_trailing_before = pos['trailing_active']
 
             if pos['side'] == 'long':
-                if not pos['trailing_active'] and current_candle['high'] >= pos['activation_price']:
+                if not pos['trailing_active'] and high >= pos['activation_price']:
                     pos['trailing_active'] = True
                 if pos['trailing_active']:
-                    pos['peak_price'] = max(pos['peak_price'], current_candle['high'])
+                    pos['peak_price'] = max(pos['peak_price'], high)
                     trailing_sl = pos['peak_price'] * (1 - pos['callback_rate'])
                     pos['stop_loss'] = max(pos['stop_loss'], trailing_sl)
-                sl_hit = current_candle['low'] <= pos['stop_loss']
-                tp_hit = (not was_trailing_before) and current_candle['high'] >= pos['take_profit']
+                sl_hit = low <= pos['stop_loss']
+                tp_hit = (not was_trailing_before) and high >= pos['take_profit']
             else: # Short
-                if not pos['trailing_active'] and current_candle['low'] <= pos['activation_price']:
+                if not pos['trailing_active'] and low <= pos['activation_price']:
                     pos['trailing_active'] = True
                 if pos['trailing_active']:
-                    pos['peak_price'] = min(pos['peak_price'], current_candle['low'])
+                    pos['peak_price'] = min(pos['peak_price'], low)
                     trailing_sl = pos['peak_price'] * (1 + pos['callback_rate'])
                     pos['stop_loss'] = min(pos['stop_loss'], trailing_sl)
-                sl_hit = current_candle['high'] >= pos['stop_loss']
-                tp_hit = (not was_trailing_before) and current_candle['low'] <= pos['take_profit']
+                sl_hit = high >= pos['stop_loss']
+                tp_hit = (not was_trailing_before) and low <= pos['take_profit']
 
             if sl_hit and tp_hit:
                 # Nur ambig, solange diese Kerze noch nicht getrailt hat (sonst gibt
@@ -210,8 +247,7 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                 exit_price = None
                 if fine_data is not None:
                     coarse_idx = strat_data['data'].index
-                    pos_i = coarse_idx.get_loc(ts)
-                    duration = (coarse_idx[pos_i + 1] - ts) if pos_i + 1 < len(coarse_idx) else None
+                    duration = (coarse_idx[i + 1] - ts) if i + 1 < len(coarse_idx) else None
                     if duration is not None:
                         fine_slice = _get_fine_slice(fine_data, ts, ts + duration)
                         exit_price, _ = _resolve_ambiguous_exit(fine_slice, pos['stop_loss'], pos['take_profit'], pos['side'])
@@ -249,7 +285,7 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                 positions_to_close.append(key)
             else:
                 pnl_mult = 1 if pos['side'] == 'long' else -1
-                unrealized_pnl += pos['notional_value'] * (current_candle['close'] / pos['entry_price'] -1) * pnl_mult
+                unrealized_pnl += pos['notional_value'] * (close / pos['entry_price'] -1) * pnl_mult
 
         for key in positions_to_close:
             del open_positions[key]
@@ -257,20 +293,18 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
         # --- 3b. Neue Signale prüfen und Positionen eröffnen ---
         if equity > 0:
             for key, strat in valid_strategies.items():
-                if key not in open_positions and ts in strat['data'].index:
-                    current_candle = strat['data'].loc[ts]
+                i = bars[key]['pos'][t]
+                if key not in open_positions and i >= 0:
+                    current_candle = bars[key]['candles'][i]
                     smc_results = smc_results_by_strategy.get(key)
                     risk_params = strat.get('risk_params', {})
-                    smc_params = strat.get('smc_params', {})
                     market_bias = mtf_bias_by_strategy.get(key, Bias.NEUTRAL) # MTF Bias holen
 
                     if not smc_results: continue
 
-                    # --- NEU: Kombiniere Parameter für die Logik-Funktion ---
-                    params_for_logic = {"strategy": smc_params, "risk": risk_params}
-                    
-                    # FEHLER BEHOBEN: market_bias an die Signalfunktion übergeben, signal_context empfangen
-                    side, _, signal_context = get_titan_signal(smc_results, current_candle, params=params_for_logic, market_bias=market_bias) 
+                    # market_bias an die Signalfunktion übergeben, signal_context empfangen
+                    side, _, signal_context = signal_from_candle(
+                        signal_params_by_strategy[key], smc_results, current_candle, market_bias)
 
                     if side:
                         entry_price = current_candle['close']
@@ -327,8 +361,7 @@ def run_portfolio_simulation(start_capital, strategies_data, start_date, end_dat
                         if current_total_margin + margin_used > equity * 1.0001:  # 0.01% Toleranz
                             continue
 
-                        bar_idx = strat['data'].index.get_loc(ts)
-                        take_profit = get_zone_based_tp(side, entry_price, sl_distance, risk_reward_ratio, smc_results_by_strategy.get(key, {}), bar_idx)
+                        take_profit = get_zone_based_tp(side, entry_price, sl_distance, risk_reward_ratio, smc_results_by_strategy.get(key, {}), i)
                         activation_price = entry_price + sl_distance * activation_rr if side == 'buy' else entry_price - sl_distance * activation_rr
 
                         open_positions[key] = {
@@ -0,0 +1,421 @@
+# /root/titanbot/src/titanbot/analysis/portfolio_streams.py
+"""
+Zweiphasige Portfolio-Simulation für den Portfolio-Optimizer.
+
+Phase 1 (build_strategy_streams, einmal pro Optimizer-Lauf): je Strategie MTF-Bias,
+Indikatoren und SMC-Analyse wie in run_portfolio_simulation. Einstieg, SL, TP und
+Ausstieg eines Trades hängen nicht vom Kapital ab, daher wird pro Signal-Kerze eine
+Trade-Vorlage vorberechnet (Richtung, Einstieg, SL-Abstand, Ausstiegs-Kerze und -Preis,
+inkl. Trailing-Stop und Fein-Daten-Auflösung ambiger Kerzen).
+
+Phase 2 (StrategyStreams.simulate, pro Kombination): ein Kernel läuft chronologisch über
+die Kerzen der Mitglieder (K-Wege-Merge der Zeitachsen) und wendet nur noch die
+Portfolio-Regeln an: eine Position je Strategie, Risk-Sizing auf das aktuelle Kapital,
+Margin-Limit, Liquidation und Drawdown. Die Kennzahlen entsprechen denen von
+run_portfolio_simulation (gleiche Reihenfolge der Gleitkomma-Operationen), ohne
+Trade-Liste und Equity-Kurve.
+"""
+import numpy as np
+import pandas as pd
+
+from titanbot.analysis.backtester import _get_fine_slice, _resolve_ambiguous_exit
+from titanbot.analysis.portfolio_simulator import _prepare_strategies
+from titanbot.strategy.smc_engine import Bias
+from titanbot.strategy.trade_logic import get_zone_based_tp, signal_from_candle
+from titanbot.utils.jit import njit
+
+# Konstanten wie in run_portfolio_simulation
+FEE_PCT = 0.05 / 100
+ABSOLUTE_MAX_NOTIONAL = 1000000.0
+MIN_NOTIONAL = 5.0
+
+
+@njit
+def _walk_exit(high, low, start, is_long, entry_price, stop_loss, take_profit, activation_price, callback_rate):
+    """
+    Erste Kerze ab start, in der SL oder TP greift (Trailing wie in run_portfolio_simulation).
+    Rückgabe: (kerze oder -1, sl_hit, tp_hit, stop_loss zu diesem Zeitpunkt).
+    """
+    trailing = False
+    peak = entry_price
+    for i in range(start, len(high)):
+        was_trailing = trailing
+        if is_long:
+            if not trailing and high[i] >= activation_price:
+                trailing = True
+            if trailing:
+                peak = max(peak, high[i])
+                stop_loss = max(stop_loss, peak * (1 - callback_rate))
+            sl_hit = low[i] <= stop_loss
+            tp_hit = (not was_trailing) and high[i] >= take_profit
+        else:
+            if not trailing and low[i] <= activation_price:
+                trailing = True
+            if trailing:
+                peak = min(peak, low[i])
+                stop_loss = min(stop_loss, peak * (1 + callback_rate))
+            sl_hit = high[i] >= stop_loss
+            tp_hit = (not was_trailing) and low[i] <= take_profit
+        if sl_hit or tp_hit:
+            return i, sl_hit, tp_hit, stop_loss
+    return -1, False, False, stop_loss
+
+
+@njit
+def _combine(members, lane_members, lane_size, lane_risk, offsets, times, close, signal, is_long, entry, sl_pct,
+             exit_bar, exit_price, min_leverage, max_leverage, start_capital, fee_pct, min_notional, max_notional,
+             abort_drawdown, trade_pnl):
+    """
+    Portfolio-Regeln von run_portfolio_simulation für mehrere Portfolios ("Lanes") in einem
+    chronologischen Durchlauf über die Streams von members. Lane r hält eigenes Kapital und
+    eigene Positionen; ihre Strategien sind lane_members[r, :lane_size[r]] (Positionen in
+    members, in dieser Reihenfolge) mit risk_per_trade_pct / 100 = lane_risk[r, u].
+    Offene Positionen werden wie das dict dort in Eröffnungsreihenfolge geführt. Zeitstempel,
+    an denen keine Strategie einer Lane eine Kerze hat, ändern deren Kennzahlen nicht.
+    Eine Lane endet bei Liquidation oder sobald max_drawdown_pct / 100 abort_drawdown
+    übersteigt (der laufende Maximal-Drawdown kann nur noch steigen).
+    Rückgabe je Lane: (equity, max_dd, dd_time, has_dd, min_equity, liq_time, liquidated,
+    aborted, n_trades) als Arrays; die Netto-PnL der Trades landet in trade_pnl[r].
+    """
+    n_members = len(members)
+    n_lanes = len(lane_size)
+    cursor = np.empty(n_members, np.int64)
+    stop = np.empty(n_members, np.int64)
+    for u in range(n_members):
+        cursor[u] = offsets[members[u]]
+        stop[u] = offsets[members[u] + 1]
+    present = np.zeros(n_members, np.bool_)
+    order = np.empty((n_lanes, n_members), np.int64)  # offene Positionen in Eröffnungsreihenfolge
+    n_open = np.zeros(n_lanes, np.int64)
+    pos_tpl = np.full((n_lanes, n_members), -1, np.int64)
+    pos_notional = np.zeros((n_lanes, n_members))
+    pos_margin = np.zeros((n_lanes, n_members))
+    last_price = np.zeros((n_lanes, n_members))
+
+    equity = np.full(n_lanes, start_capital)
+    peak_equity = np.full(n_lanes, start_capital)
+    max_dd = np.zeros(n_lanes)
+    dd_time = np.zeros(n_lanes, np.int64)
+    has_dd = np.zeros(n_lanes, np.bool_)
+    min_equity = np.full(n_lanes, start_capital)
+    liq_time = np.zeros(n_lanes, np.int64)
+    liquidated = np.zeros(n_lanes, np.bool_)
+    aborted = np.zeros(n_lanes, np.bool_)
+    n_trades = np.zeros(n_lanes, np.int64)
+    active = 0
+    for r in range(n_lanes):
+        if lane_size[r] > 0:
+            active += 1
+
+    while active > 0:
+        has_ts = False
+        ts = np.int64(0)
+        for u in range(n_members):
+            if cursor[u] < stop[u] and (not has_ts or times[cursor[u]] < ts):
+                ts = times[cursor[u]]
+                has_ts = True
+        if not has_ts:
+            break
+        for u in range(n_members):
+            present[u] = cursor[u] < stop[u] and times[cursor[u]] == ts
+
+        for r in range(n_lanes):
+            if lane_size[r] == 0 or liquidated[r] or aborted[r]:
+                continue
+
+            # --- Offene Positionen managen ---
+            unrealized = 0.0
+            kept = 0
+            for j in range(n_open[r]):
+                u = order[r, j]
+                t = pos_tpl[r, u]
+                mult = 1.0 if is_long[t] else -1.0
+                if not present[u]:
+                    unrealized += pos_notional[r, u] * (last_price[r, u] / entry[t] - 1) * mult
+                    order[r, kept] = u
+                    kept += 1
+                    continue
+                bar = cursor[u]
+                last_price[r, u] = close[bar]
+                if exit_bar[t] == bar:
+                    price = exit_price[t]
+                    pnl_pct = (price / entry[t] - 1) if is_long[t] else (1 - price / entry[t])
+                    net_pnl = pos_notional[r, u] * pnl_pct - pos_notional[r, u] * fee_pct * 2
+                    equity[r] += net_pnl
+                    trade_pnl[r, n_trades[r]] = net_pnl
+                    n_trades[r] += 1
+                    pos_tpl[r, u] = -1
+                else:
+                    unrealized += pos_notional[r, u] * (close[bar] / entry[t] - 1) * mult
+                    order[r, kept] = u
+                    kept += 1
+            n_open[r] = kept
+
+            # --- Neue Positionen eröffnen ---
+            if equity[r] > 0:
+                for m in range(lane_size[r]):
+                    u = lane_members[r, m]
+                    if pos_tpl[r, u] >= 0 or not present[u]:
+                        continue
+                    t = signal[cursor[u]]
+                    if t < 0:
+                        continue
+                    k = members[u]
+                    target_notional = equity[r] * lane_risk[r, u] / sl_pct[t]
+                    if target_notional < min_notional:
+                        target_notional = min_notional
+                    eff_leverage = target_notional / equity[r]
+                    eff_leverage = max(min_leverage[k], min(eff_leverage, max_leverage[k]))
+                    eff_leverage = max(1.0, np.floor(eff_leverage))
+                    notional = min(target_notional, max_notional)
+                    if notional < min_notional:
+                        continue
+                    margin = notional / eff_leverage
+                    total_margin = 0.0
+                    for j in range(n_open[r]):
+                        total_margin += pos_margin[r, order[r, j]]
+                    if total_margin + margin > equity[r] * 1.0001:
+                        continue
+                    pos_tpl[r, u] = t
+                    pos_notional[r, u] = notional
+                    pos_margin[r, u] = margin
+                    last_price[r, u] = entry[t]
+                    order[r, n_open[r]] = u
+                    n_open[r] += 1
+
+            # --- Equity, Liquidation, Drawdown ---
+            total_equity = equity[r] + unrealized
+            if total_equity <= 0:
+                liq_time[r] = ts
+                liquidated[r] = True
+                total_equity = 0.0
+                for j in range(n_open[r]):
+                    pos_tpl[r, order[r, j]] = -1
+                n_open[r] = 0
+                equity[r] = 0.0
+            peak_equity[r] = max(peak_equity[r], total_equity)
+            drawdown = (peak_equity[r] - max(0.0, total_equity)) / peak_equity[r] if peak_equity[r] > 0 else 0.0
+            if drawdown > max_dd[r]:
+                max_dd[r] = drawdown
+                dd_time[r] = ts
+                has_dd[r] = True
+                aborted[r] = max_dd[r] * 100 / 100.0 > abort_drawdown
+            min_equity[r] = min(min_equity[r], total_equity)
+            if liquidated[r] or aborted[r]:
+                active -= 1
+
+        for u in range(n_members):
+            if present[u]:
+                cursor[u] += 1
+
+    # Offene Positionen am Ende zum letzten bekannten Kurs schließen
+    for r in range(n_lanes):
+        if aborted[r]:
+            continue
+        for j in range(n_open[r]):
+            u = order[r, j]
+            t = pos_tpl[r, u]
+            price = last_price[r, u]
+            pnl_pct = (price / entry[t] - 1) if is_long[t] else (1 - price / entry[t])
+            net_pnl = pos_notional[r, u] * pnl_pct - pos_notional[r, u] * fee_pct * 2
+            equity[r] += net_pnl
+            trade_pnl[r, n_trades[r]] = net_pnl
+            n_trades[r] += 1
+
+    return equity, max_dd, dd_time, has_dd, min_equity, liq_time, liquidated, aborted, n_trades
+
+
+def _trade_templates(strat, smc_results, signal_params, market_bias):
+    """Trade-Vorlagen (eine pro Signal-Kerze) einer vorbereiteten Strategie."""
+    data = strat['data']
+    risk_params = strat.get('risk_params', {})
+    risk_reward_ratio = risk_params.get('risk_reward_ratio', 2.0)
+    sl_buffer_atr_mult = risk_params.get('sl_buffer_atr_mult', 0.2)
+    activation_rr = risk_params.get('trailing_stop_activation_rr', 2.0)
+    callback_rate = risk_params.get('trailing_stop_callback_rate_pct', 1.0) / 100
+    high = data['high'].to_numpy(dtype=np.float64)
+    low = data['low'].to_numpy(dtype=np.float64)
+    index = data.index
+    fine_data = strat.get('fine_data')
+
+    templates = []
+    if not smc_results:
+        return templates
+    for i, candle in enumerate(data.to_dict('records')):
+        side, _, signal_context = signal_from_candle(signal_params, smc_results, candle, market_bias)
+        if not side:
+            continue
+        entry_price = candle['close']
+        current_atr = candle.get('atr')
+        if pd.isna(current_atr) or current_atr <= 0:
+            continue
+        buffer = current_atr * sl_buffer_atr_mult
+        if side == 'buy':
+            stop_loss = signal_context.get('level_low', entry_price) - buffer
+        else:
+            stop_loss = signal_context.get('level_high', entry_price) + buffer
+        sl_distance = max(abs(entry_price - stop_loss), entry_price * 0.001)
+        if sl_distance <= 0:
+            continue
+        sl_pct = sl_distance / entry_price
+        if sl_pct <= 1e-6:
+            continue
+        take_profit = get_zone_based_tp(side, entry_price, sl_distance, risk_reward_ratio, smc_results, i)
+        activation_price = entry_price + sl_distance * activation_rr if side == 'buy' else entry_price - sl_distance * activation_rr
+
+        is_long = side == 'buy'
+        exit_i, sl_hit, tp_hit, stop_at_exit = _walk_exit(
+            high, low, i + 1, is_long, entry_price, stop_loss, take_profit, activation_price, callback_rate)
+        exit_price = np.nan
+        if sl_hit and tp_hit:
+            exit_price = None
+            if fine_data is not None and exit_i + 1 < len(index):
+                fine_slice = _get_fine_slice(fine_data, index[exit_i], index[exit_i + 1])
+                exit_price, _ = _resolve_ambiguous_exit(fine_slice, stop_at_exit, take_profit,
+                                                        'long' if is_long else 'short')
+            if exit_price is None:
+                exit_price = stop_at_exit  # Fallback: SL-first-Konvention
+        elif sl_hit:
+            exit_price = stop_at_exit
+        elif tp_hit:
+            exit_price = take_profit
+        templates.append((i, is_long, entry_price, sl_pct, exit_i, exit_price))
+    return templates
+
+
+class StrategyStreams:
+    """Vorberechnete Kerzen- und Trade-Streams je Strategie; simulate() kombiniert sie."""
+
+    def __init__(self, keys, offsets, times, close, signal, templates, risk_pct, min_leverage, max_leverage, tz):
+        self.keys = list(keys)
+        self._slot = {key: i for i, key in enumerate(self.keys)}
+        self.offsets, self.times, self.close, self.signal = offsets, times, close, signal
+        self.is_long, self.entry, self.sl_pct, self.exit_bar, self.exit_price = templates
+        self.risk_pct, self.min_leverage, self.max_leverage = risk_pct, min_leverage, max_leverage
+        self.tz = tz
+
+    def __contains__(self, key):
+        return key in self._slot
+
+    def _timestamp(self, ns):
+        return pd.Timestamp(ns, tz='UTC').tz_convert(self.tz) if self.tz is not None else pd.Timestamp(ns)
+
+    def simulate(self, keys, start_capital, abort_drawdown=None, risk_pct=None):
+        """
+        Kennzahlen wie run_portfolio_simulation für die Strategien keys (in dieser Reihenfolge):
+        start_capital, end_capital, total_pnl_pct, trade_count, win_rate, max_drawdown_pct,
+        max_drawdown_date, min_equity, liquidation_date. None, wenn keine davon einen Stream hat.
+        abort_drawdown: Simulation beenden, sobald max_drawdown_pct / 100 diesen Wert übersteigt;
+        das Ergebnis hat dann 'aborted': True und die übrigen Kennzahlen gelten nur bis dahin.
+        risk_pct: risk_per_trade_pct (in %) für alle Strategien statt des Werts aus den risk_params.
+        """
+        return self.simulate_lanes([keys], start_capital, [risk_pct], abort_drawdown)[0]
+
+    def simulate_lanes(self, lanes, start_capital, risk_levels=None, abort_drawdown=None):
+        """
+        Mehrere Portfolios in einem Durchlauf: lanes[r] ist die Strategie-Liste von Portfolio r,
+        risk_levels[r] dessen risk_per_trade_pct in % (None = aus den risk_params). Jede Lane
+        rechnet mit eigenem Kapital; Ergebnisse wie simulate(), als Liste in Lane-Reihenfolge.
+        """
+        if risk_levels is None:
+            risk_levels = [None] * len(lanes)
+        lanes = [[key for key in keys if key in self._slot] for keys in lanes]
+        members = list(dict.fromkeys(self._slot[key] for keys in lanes for key in keys))
+        if not members:
+            return [None] * len(lanes)
+        position = {slot: u for u, slot in enumerate(members)}
+        lane_members = np.zeros((len(lanes), len(members)), dtype=np.int64)
+        lane_size = np.zeros(len(lanes), dtype=np.int64)
+        lane_risk = np.empty((len(lanes), len(members)), dtype=np.float64)
+        for r, (keys, risk) in enumerate(zip(lanes, risk_levels)):
+            lane_size[r] = len(keys)
+            lane_members[r, :len(keys)] = [position[self._slot[key]] for key in keys]
+            lane_risk[r] = self.risk_pct[members] if risk is None else risk / 100
+        trade_pnl = np.empty((len(lanes), len(self.entry) + 1), dtype=np.float64)
+
+        equity, max_dd, dd_time, has_dd, min_equity, liq_time, liquidated, aborted, n_trades = _combine(
+            np.array(members, dtype=np.int64), lane_members, lane_size, lane_risk,
+            self.offsets, self.times, self.close, self.signal,
+            self.is_long, self.entry, self.sl_pct, self.exit_bar, self.exit_price,
+            self.min_leverage, self.max_leverage, float(start_capital),
+            FEE_PCT, MIN_NOTIONAL, ABSOLUTE_MAX_NOTIONAL,
+            np.inf if abort_drawdown is None else float(abort_drawdown), trade_pnl)
+
+        results = []
+        for r in range(len(lanes)):
+            if lane_size[r] == 0:
+                results.append(None)
+                continue
+            final_equity = max(0.0, float(equity[r]))
+            trades = int(n_trades[r])
+            wins = sum(1 for pnl in trade_pnl[r, :trades].tolist() if round(pnl, 4) > 0)
+            results.append({
+                "start_capital": start_capital,
+                "end_capital": final_equity,
+                "total_pnl_pct": (final_equity / start_capital - 1) * 100 if start_capital > 0 else 0,
+                "trade_count": trades,
+                "win_rate": (wins / trades * 100) if trades else 0,
+                "max_drawdown_pct": float(max_dd[r]) * 100,
+                "max_drawdown_date": self._timestamp(dd_time[r]) if has_dd[r] else None,
+                "min_equity": float(min_equity[r]),
+                "liquidation_date": self._timestamp(liq_time[r]) if liquidated[r] else None,
+                "aborted": bool(aborted[r]),
+            })
+        return results
+
+
+def build_strategy_streams(strategies_data, start_date, end_date):
+    """
+    Phase 1: bereitet alle Strategien aus strategies_data einmal vor (wie
+    run_portfolio_simulation) und gibt StrategyStreams zurück, oder None ohne
+    verwertbare Strategie. Schlüssel von simulate() sind die von strategies_data.
+    """
+    prepared = _prepare_strategies(strategies_data, start_date, end_date)
+    if prepared is None:
+        return None
+    valid_strategies, smc_results_by_strategy, signal_params_by_strategy, mtf_bias_by_strategy, _ = prepared
+
+    keys, offsets, times, close, signal = [], [0], [], [], []
+    tpl_is_long, tpl_entry, tpl_sl_pct, tpl_exit_bar, tpl_exit_price = [], [], [], [], []
+    risk_pct, min_leverage, max_leverage = [], [], []
+    tz = None
+    for key, strat in valid_strategies.items():
+        data = strat['data']
+        index = data.index.as_unit('ns')
+        tz = index.tz if tz is None else tz
+        base = offsets[-1]
+        templates = _trade_templates(strat, smc_results_by_strategy[key], signal_params_by_strategy[key],
+                                     mtf_bias_by_strategy.get(key, Bias.NEUTRAL))
+        bar_signal = np.full(len(data), -1, dtype=np.int64)
+        for bar, is_long, entry_price, sl_pct, exit_i, exit_price in templates:
+            bar_signal[bar] = len(tpl_entry)
+            tpl_is_long.append(is_long)
+            tpl_entry.append(entry_price)
+            tpl_sl_pct.append(sl_pct)
+            tpl_exit_bar.append(base + exit_i if exit_i >= 0 else -1)
+            tpl_exit_price.append(exit_price)
+
+        risk_params = strat.get('risk_params', {})
+        risk_pct.append(risk_params.get('risk_per_trade_pct', 1.0) / 100)
+        min_leverage.append(risk_params.get('min_leverage', 3))
+        max_leverage.append(risk_params.get('max_leverage', 20))
+        keys.append(key)
+        times.append(index.asi8)
+        close.append(data['close'].to_numpy(dtype=np.float64))
+        signal.append(bar_signal)
+        offsets.append(base + len(data))
+
+    return StrategyStreams(
+        keys,
+        np.array(offsets, dtype=np.int64),
+        np.concatenate(times).astype(np.int64),
+        np.concatenate(close),
+        np.concatenate(signal),
+        (np.array(tpl_is_long, dtype=np.bool_), np.array(tpl_entry, dtype=np.float64),
+         np.array(tpl_sl_pct, dtype=np.float64), np.array(tpl_exit_bar, dtype=np.int64),
+         np.array(tpl_exit_price, dtype=np.float64)),
+        np.array(risk_pct, dtype=np.float64),
+        np.array(min_leverage, dtype=np.float64),
+        np.array(max_leverage, dtype=np.float64),
+        tz,
+    )
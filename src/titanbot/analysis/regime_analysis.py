@@ -57,6 +57,7 @@ def load_regime_data(symbol, tf, start_date, end_date):
         import pandas as pd
         import ta
         from titanbot.analysis.backtester import load_data
+        from titanbot.utils.indicators import compute_indicators
 
         data = load_data(symbol, tf, start_date, end_date)
         if data is None or data.empty:
@@ -64,8 +65,7 @@ def load_regime_data(symbol, tf, start_date, end_date):
 
         data['ema50']  = ta.trend.EMAIndicator(data['close'], window=50).ema_indicator()
         data['ema200'] = ta.trend.EMAIndicator(data['close'], window=200).ema_indicator()
-        adx_ind = ta.trend.ADXIndicator(data['high'], data['low'], data['close'], window=14)
-        data['adx_val'] = adx_ind.adx()
+        data['adx_val'] = compute_indicators(data, adx_period=14, columns=('adx',))['adx']
         data.dropna(inplace=True)
         return data
     except Exception as e:
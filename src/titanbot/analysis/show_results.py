@@ -18,7 +18,7 @@ sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
 
 from titanbot.analysis.backtester import load_data, run_smc_backtest, FINE_TF_MAP, LazyFineData
 from titanbot.analysis.portfolio_simulator import run_portfolio_simulation
-from titanbot.analysis.portfolio_optimizer import run_portfolio_optimizer
+from titanbot.analysis.portfolio_optimizer import run_risk_sweep, save_optimal_portfolio, simulate_portfolio
 from titanbot.utils.telegram import send_document
 
 GREEN  = '\033[0;32m'
@@ -469,7 +469,8 @@ def run_single_analysis(start_date, end_date, start_capital, warmup_date=None, a
 
 
 # --- Geteilter Modus (Manuell / Auto) ---
-def run_shared_mode(is_auto: bool, start_date, end_date, start_capital, target_max_dd: float, warmup_date=None):
+def run_shared_mode(is_auto: bool, start_date, end_date, start_capital, target_max_dd: float, warmup_date=None,
+                    jobs: int = 1):
     mode_name = "Automatische Portfolio-Optimierung" if is_auto else "Manuelle Portfolio-Simulation"
     data_start = warmup_date or start_date
     print(f"--- TitanBot {mode_name} ---")
@@ -534,15 +535,11 @@ def run_shared_mode(is_auto: bool, start_date, end_date, start_capital, target_m
             best_portfolio = None
             best_calmar    = -999.0
 
+            # Alle Stufen in einer Suche: jede Kombination wird einmal für alle Risiken simuliert
+            sweep = run_risk_sweep(start_capital, strategies_data, start_date, end_date, target_max_dd,
+                                   risk_levels, jobs=jobs) or {}
             for risk_pct in risk_levels:
-                sd_risk = {}
-                for fname, sd in strategies_data.items():
-                    entry = dict(sd)
-                    entry["risk_params"] = dict(sd["risk_params"])
-                    entry["risk_params"]["risk_per_trade_pct"] = risk_pct
-                    sd_risk[fname] = entry
-
-                r = run_portfolio_optimizer(start_capital, sd_risk, start_date, end_date, target_max_dd)
+                r = sweep.get(risk_pct)
                 if not r or not r.get("final_result"):
                     continue
                 m = r["final_result"]
@@ -560,8 +557,16 @@ def run_shared_mode(is_auto: bool, start_date, end_date, start_capital, target_m
                     best_portfolio = r.get("optimal_portfolio", [])
 
             if best_results and best_results.get("final_result"):
-                final_report         = best_results["final_result"]
+                # Volle Simulation (Equity-Kurve, Trades) nur für das Calmar-Optimum
+                sd_risk = {}
+                for fname, sd in strategies_data.items():
+                    entry = dict(sd)
+                    entry["risk_params"] = dict(sd["risk_params"])
+                    entry["risk_params"]["risk_per_trade_pct"] = best_risk_pct
+                    sd_risk[fname] = entry
+                final_report         = simulate_portfolio(start_capital, sd_risk, best_portfolio, start_date, end_date)
                 portfolio_files_used = best_portfolio or selected_files
+                save_optimal_portfolio(best_portfolio)
 
                 print(f"\n{GREEN}Bestes Risiko: {best_risk_pct}%  (Calmar: {best_calmar:.2f}){NC}")
                 print("\n=======================================================")
@@ -647,6 +652,7 @@ if __name__ == "__main__":
     parser.add_argument('--start_capital', default=1000, type=int, help="Startkapital in USDT")
     parser.add_argument('--warmup_date', default=None, type=str, help="Datum ab dem Daten fuer SMC-Warmup geladen werden")
     parser.add_argument('--auto_write', action='store_true', help="Beste Strategien automatisch in settings.json schreiben")
+    parser.add_argument('--jobs', default=0, type=int, help="Prozesse fuer die Portfolio-Optimierung (Modus 3, 0 = alle Kerne)")
     args = parser.parse_args()
 
     start_date = args.start_date
@@ -731,7 +737,8 @@ if __name__ == "__main__":
                 start_date=start_date, 
                 end_date=end_date, 
                 start_capital=start_capital, 
-                target_max_dd=args.target_max_drawdown
+                target_max_dd=args.target_max_drawdown,
+                jobs=args.jobs
             )
         else: # Modus 1 (default)
             run_single_analysis(start_date=start_date, end_date=end_date, start_capital=start_capital,
@@ -0,0 +1,172 @@
+"""
+Candidate signal table: titan_signal() for a whole history at once.
+
+The SMC structures only depend on the engine settings (swingsLength,
+ob_mitigation, liquidity_lookback). The other signal parameters — ADX/volume
+filters, min_fvg_size_pct, min_ob_quality, max_ob_touches, MTF filter,
+confirmation candle, P/D and sweep gates — only decide which zone touch
+becomes the signal. The table stores every bar × touched zone once, in the
+priority order of titan_signal(); a parameter set is then applied as boolean
+masks over all rows (see CandidateSignalTable.signals()).
+"""
+import numpy as np
+
+from titanbot.strategy.smc_engine import Bias
+from titanbot.strategy.trade_logic import SignalParams, _is_rejection
+
+# Priority groups within one bar, in titan_signal() order
+LONG_FVG, LONG_INTERNAL_OB, LONG_SWING_OB, SHORT_FVG, SHORT_INTERNAL_OB, SHORT_SWING_OB = range(6)
+_LONG_GROUPS = (LONG_FVG, LONG_INTERNAL_OB, LONG_SWING_OB)
+_FVG_GROUPS = (LONG_FVG, SHORT_FVG)
+_SWING_GROUPS = (LONG_SWING_OB, SHORT_SWING_OB)
+
+
+class CandidateSignalTable:
+    """
+    Rows: (bar, group, structure) for every active FVG/OB whose zone the bar's
+    candle touches, ordered by bar, group and structure creation order.
+    Bar columns: everything the gates read (candle shape, P/D, sweeps, ADX,
+    volume, HTF bias).
+    """
+
+    def __init__(self, structure_index, smc_lookback: int, o, h, l, c,
+                 pd_pct, pd_zone, recent_bsl_sweep, recent_ssl_sweep,
+                 volume, volume_ma, adx, adx_pos, adx_neg, market_bias):
+        n = len(c)
+        self.n_bars = n
+        self.pd_pct = np.asarray(pd_pct, dtype=np.float64)
+        self.pd_zone = list(pd_zone)
+        self.recent_bsl_sweep = np.asarray(recent_bsl_sweep, dtype=bool)
+        self.recent_ssl_sweep = np.asarray(recent_ssl_sweep, dtype=bool)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.volume_ma = np.asarray(volume_ma, dtype=np.float64)
+        self.adx = np.asarray(adx, dtype=np.float64)
+        self.adx_pos = np.asarray(adx_pos, dtype=np.float64)
+        self.adx_neg = np.asarray(adx_neg, dtype=np.float64)
+        self.market_bias = np.array([b.value if b is not None else 0 for b in market_bias], dtype=np.int8)
+        self.close = np.asarray(c, dtype=np.float64)
+        self.is_bullish = self.close > np.asarray(o, dtype=np.float64)
+        self.is_bearish = self.close < np.asarray(o, dtype=np.float64)
+        self.rejection_buy = np.array([_is_rejection(o[i], h[i], l[i], c[i], 'buy') for i in range(n)], dtype=bool)
+        self.rejection_sell = np.array([_is_rejection(o[i], h[i], l[i], c[i], 'sell') for i in range(n)], dtype=bool)
+
+        bars, groups, structures = [], [], []
+        for i in range(n):
+            bar_smc = structure_index.query(i, smc_lookback)
+            li, ci, hi = l[i], c[i], h[i]
+            fvgs = bar_smc['unmitigated_fvgs']
+            internal_obs = bar_smc['unmitigated_internal_obs']
+            swing_obs = bar_smc['unmitigated_swing_obs']
+            for fvg in fvgs:
+                if fvg.bias == Bias.BULLISH and li <= fvg.top and ci >= fvg.bottom:
+                    bars.append(i); groups.append(LONG_FVG); structures.append(fvg)
+            for group, obs in ((LONG_INTERNAL_OB, internal_obs), (LONG_SWING_OB, swing_obs)):
+                for ob in obs:
+                    if ob.bias == Bias.BULLISH and li <= ob.barHigh and ci >= ob.barLow:
+                        bars.append(i); groups.append(group); structures.append(ob)
+            for fvg in fvgs:
+                if fvg.bias == Bias.BEARISH and hi >= fvg.bottom and ci <= fvg.top:
+                    bars.append(i); groups.append(SHORT_FVG); structures.append(fvg)
+            for group, obs in ((SHORT_INTERNAL_OB, internal_obs), (SHORT_SWING_OB, swing_obs)):
+                for ob in obs:
+                    if ob.bias == Bias.BEARISH and hi >= ob.barLow and ci <= ob.barHigh:
+                        bars.append(i); groups.append(group); structures.append(ob)
+
+        self.row_bar = np.array(bars, dtype=np.int64)
+        self.row_group = np.array(groups, dtype=np.int8)
+        self.row_structure = structures
+        self.row_is_long = np.isin(self.row_group, _LONG_GROUPS)
+        self.row_is_fvg = np.isin(self.row_group, _FVG_GROUPS)
+        self.row_is_swing = np.isin(self.row_group, _SWING_GROUPS)
+        # FVG: size_pct | OB: quality, touch_count (NaN/0 for the other kind)
+        self.row_size_pct = np.array([s.size_pct if f else np.nan for s, f in zip(structures, self.row_is_fvg)])
+        self.row_quality = np.array([np.nan if f else s.quality for s, f in zip(structures, self.row_is_fvg)])
+        self.row_touches = np.array([0 if f else s.touch_count for s, f in zip(structures, self.row_is_fvg)],
+                                    dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.row_bar)
+
+    def signals(self, sp: SignalParams):
+        """
+        Per-bar result of titan_signal() for one parameter set.
+        Returns (side, row): side int8 per bar (1 buy, -1 sell, 0 none) and the
+        chosen table row per bar (-1 = none), see context().
+        """
+        # --- Bar gates ---
+        bar_ok = np.ones(self.n_bars, dtype=bool)
+        if sp.use_volume_filter:
+            ma = self.volume_ma
+            has_ma = ~np.isnan(ma) & (ma != 0)
+            bar_ok &= ~(has_ma & (self.volume < ma * sp.volume_threshold_multiplier))
+        if sp.use_adx_filter:
+            bar_ok &= ~np.isnan(self.adx) & ~(self.adx < sp.adx_threshold)
+
+        long_ok = bar_ok.copy()
+        short_ok = bar_ok.copy()
+        if sp.use_pd_filter:
+            long_ok &= self.pd_pct <= 0.5
+            short_ok &= self.pd_pct >= 0.5
+        if sp.use_liquidity_sweep_filter:
+            long_ok &= self.recent_ssl_sweep
+            short_ok &= self.recent_bsl_sweep
+        if sp.use_entry_confirmation:
+            long_ok &= self.is_bullish | (sp.use_rejection_candle & self.rejection_buy)
+            short_ok &= self.is_bearish | (sp.use_rejection_candle & self.rejection_sell)
+
+        # --- Row gates ---
+        rows_ok = np.where(self.row_is_long, long_ok[self.row_bar], short_ok[self.row_bar])
+        with np.errstate(invalid='ignore'):
+            rows_ok &= np.where(
+                self.row_is_fvg,
+                ~(self.row_size_pct < sp.min_fvg_size),
+                ~(self.row_touches > sp.max_ob_touches) & ~(self.row_quality < sp.min_ob_quality),
+            )
+        if not sp.use_swing_ob:
+            rows_ok &= ~self.row_is_swing
+
+        # --- Erste überlebende Zeile pro Kerze (Priorität = Zeilenreihenfolge) ---
+        hits = np.flatnonzero(rows_ok)
+        hit_bars = self.row_bar[hits]
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = hit_bars[1:] != hit_bars[:-1]
+        hits, hit_bars = hits[first], hit_bars[first]
+        hit_long = self.row_is_long[hits]
+
+        # --- Final filters on the chosen side ---
+        keep = np.ones(len(hits), dtype=bool)
+        if sp.use_adx_filter:
+            pos, neg = self.adx_pos[hit_bars], self.adx_neg[hit_bars]
+            valid = ~np.isnan(pos) & ~np.isnan(neg)
+            keep &= ~(valid & np.where(hit_long, pos < neg, neg < pos))
+        if sp.use_mtf_filter:
+            bias = self.market_bias[hit_bars]
+            keep &= ~np.where(hit_long, bias == Bias.BEARISH.value, bias == Bias.BULLISH.value)
+        hits, hit_bars, hit_long = hits[keep], hit_bars[keep], hit_long[keep]
+
+        side = np.zeros(self.n_bars, dtype=np.int8)
+        side[hit_bars] = np.where(hit_long, 1, -1)
+        row = np.full(self.n_bars, -1, dtype=np.int64)
+        row[hit_bars] = hits
+        return side, row
+
+    def context(self, row: int) -> dict:
+        """signal_context of titan_signal() for a row returned by signals()."""
+        i = int(self.row_bar[row])
+        s = self.row_structure[row]
+        is_long = bool(self.row_is_long[row])
+        pd_pct = float(self.pd_pct[i])
+        if self.row_is_fvg[row]:
+            ctx = {'type': 'fvg', 'level_low': s.bottom, 'level_high': s.top,
+                   'bias': 'bullish' if is_long else 'bearish', 'fvg_size_pct': s.size_pct}
+        else:
+            ctx = {'type': 'order_block', 'level_low': s.barLow, 'level_high': s.barHigh,
+                   'bias': 'bullish' if is_long else 'bearish',
+                   'ob_quality': s.quality, 'ob_touches': s.touch_count}
+        ctx['pd_zone'] = self.pd_zone[i]
+        ctx['pd_pct'] = pd_pct
+        if is_long:
+            ctx['ssl_swept'] = bool(self.recent_ssl_sweep[i])
+        else:
+            ctx['bsl_swept'] = bool(self.recent_bsl_sweep[i])
+        return ctx
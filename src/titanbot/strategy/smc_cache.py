@@ -0,0 +1,173 @@
+"""
+Persistent on-disk cache for SMCEngine.process_dataframe() results.
+
+The SMC structures only depend on the candles and the engine settings
+(swingsLength, ob_mitigation, liquidity_lookback). Entries are content-addressed
+by (symbol, timeframe, data fingerprint, settings, ENGINE_VERSION) and stored as
+one uncompressed .npz per result: the struct-of-arrays bar state plus the
+structure record arrays (see SMCEngine.structures_as_arrays) and the event log.
+Loading touches the file; once the directory exceeds max_bytes the least
+recently used entries are removed.
+
+Opt-in: process_dataframe_cached(..., cache=SMCDiskCache()) or
+run_smc_backtest(..., smc_params={'_smc_cache': cache, ...}). default_cache()
+returns a cache when TITANBOT_SMC_CACHE=1 is set, else None.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from titanbot.strategy.smc_engine import (
+    ENGINE_VERSION, FVG_DTYPE, LIQUIDITY_DTYPE, ORDER_BLOCK_DTYPE, SMCEngine,
+    structures_from_arrays,
+)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', 'cache', 'smc')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_SETTING_KEYS = ('swingsLength', 'ob_mitigation', 'liquidity_lookback')
+_SETTING_DEFAULTS = {'swingsLength': 50, 'ob_mitigation': 'High/Low', 'liquidity_lookback': 20}
+_STRUCTURE_DTYPES = {'swing_obs': ORDER_BLOCK_DTYPE, 'internal_obs': ORDER_BLOCK_DTYPE,
+                     'fvgs': FVG_DTYPE, 'liquidity_levels': LIQUIDITY_DTYPE}
+# Event log as records: level2 is NaN for single-level events, is_equal -1 when absent
+EVENT_DTYPE = np.dtype([
+    ('time', np.int64), ('index', np.int64), ('type', 'U32'),
+    ('level', np.float64), ('level2', np.float64), ('is_equal', np.int8),
+])
+
+
+def data_fingerprint(df) -> str:
+    """Hash over index and OHLC values — changes whenever any candle changes."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(df.index.asi8 if hasattr(df.index, 'asi8') else np.arange(len(df))))
+    for col in ('open', 'high', 'low', 'close'):
+        if col in df.columns:
+            h.update(col.encode())
+            h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)))
+    return h.hexdigest()
+
+
+def _events_to_records(events: list) -> np.ndarray:
+    rows = []
+    for ev in events:
+        level = ev['level']
+        level, level2 = level if isinstance(level, tuple) else (level, np.nan)
+        rows.append((ev['time'], ev['index'], ev['type'], level, level2, int(ev.get('is_equal', -1))))
+    return np.array(rows, dtype=EVENT_DTYPE)
+
+
+def _events_from_records(records: np.ndarray) -> list:
+    events = []
+    for time, index, kind, level, level2, is_equal in records.tolist():
+        ev = {'time': time, 'index': index, 'type': kind,
+              'level': level if level2 != level2 else (level, level2)}
+        if is_equal != -1:
+            ev['is_equal'] = bool(is_equal)
+        events.append(ev)
+    return events
+
+
+class SMCDiskCache:
+    """Size-bounded LRU directory of .npz SMC results."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, df, settings: dict, symbol: str = None, timeframe: str = None) -> str:
+        parts = [str(symbol or ''), str(timeframe or ''), data_fingerprint(df), f"v{ENGINE_VERSION}"]
+        parts += [f"{k}={settings.get(k, _SETTING_DEFAULTS[k])}" for k in _SETTING_KEYS]
+        digest = hashlib.blake2b('|'.join(parts).encode(), digest_size=16).hexdigest()
+        prefix = f"{symbol}_{timeframe}".replace('/', '').replace(':', '') if symbol else 'smc'
+        return f"{prefix}_{digest}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key: str):
+        """Result dict as from process_dataframe(..., bar_state_format='arrays'), or None."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+            os.utime(path)  # LRU: zuletzt benutzt
+        except (OSError, ValueError, KeyError):
+            return None
+        bar_arrays = {name[4:]: arr for name, arr in arrays.items() if name.startswith('bar_')}
+        structures = structures_from_arrays({name: arrays[name] for name in _STRUCTURE_DTYPES})
+        return {
+            "events": _events_from_records(arrays['events']),
+            "unmitigated_swing_obs": [ob for ob in structures['swing_obs'] if not ob.mitigated],
+            "unmitigated_internal_obs": [ob for ob in structures['internal_obs'] if not ob.mitigated],
+            "unmitigated_fvgs": [fvg for fvg in structures['fvgs'] if not fvg.mitigated],
+            "liquidity_levels": structures['liquidity_levels'],
+            "bar_states": None,
+            "bar_arrays": bar_arrays,
+            "enriched_df": None,
+            "all_swing_obs": structures['swing_obs'],
+            "all_internal_obs": structures['internal_obs'],
+            "all_fvgs": structures['fvgs'],
+        }
+
+    def store(self, key: str, engine: SMCEngine, results: dict):
+        """Write the result of engine.process_dataframe(..., bar_state_format='arrays')."""
+        arrays = {'bar_' + name: arr for name, arr in results['bar_arrays'].items()}
+        arrays.update(engine.structures_as_arrays())
+        arrays['events'] = _events_to_records(results['events'])
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the directory fits into max_bytes."""
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith('.npz')]
+        except OSError:
+            return
+        stats = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries))
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in stats:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def default_cache():
+    """SMCDiskCache() when TITANBOT_SMC_CACHE=1, else None (cache off)."""
+    if os.environ.get('TITANBOT_SMC_CACHE', '') in ('', '0'):
+        return None
+    return SMCDiskCache()
+
+
+def process_dataframe_cached(df, settings: dict, cache: SMCDiskCache = None,
+                             symbol: str = None, timeframe: str = None) -> dict:
+    """
+    SMCEngine(settings).process_dataframe(df, bar_state_format='arrays'), served
+    from cache when an entry for the same candles and settings exists.
+    """
+    if cache is None:
+        return SMCEngine(settings=settings).process_dataframe(df, bar_state_format='arrays')
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    key = cache.key(df, settings, symbol, timeframe)
+    results = cache.load(key)
+    if results is None:
+        engine = SMCEngine(settings=settings)
+        results = engine.process_dataframe(df, bar_state_format='arrays')
+        cache.store(key, engine, results)
+    return results
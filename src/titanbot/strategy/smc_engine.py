@@ -1,8 +1,15 @@
+import bisect
+import copy
+from collections import deque
+
 import pandas as pd
 import numpy as np
-from dataclasses import dataclass, field
+from numpy.lib.stride_tricks import sliding_window_view
+from dataclasses import dataclass, fields
 from enum import Enum
 
+from titanbot.utils.jit import njit, JIT_ENABLED
+
 
 # ==================== ENUMS ====================
 
@@ -16,9 +23,48 @@ class Bias(Enum):
     NEUTRAL = 0
 
 
+# Bump whenever a change alters structures, events or bar states (invalidates the SMC disk cache)
+ENGINE_VERSION = 1
+
+# Categorical codes for the struct-of-arrays bar state (process_dataframe(..., bar_state_format='arrays'))
+PD_ZONES = ('discount', 'equilibrium', 'premium')     # smc_pd_zone code = index
+BIAS_NAMES = {Bias.BULLISH.value: 'bullish', Bias.BEARISH.value: 'bearish', Bias.NEUTRAL.value: 'neutral'}
+BAR_ARRAY_DTYPES = {
+    'pd_pct': np.float64,
+    'pd_zone': np.int8,
+    'pd_high': np.float64,
+    'pd_low': np.float64,
+    'recent_bsl_sweep': np.bool_,
+    'recent_ssl_sweep': np.bool_,
+    'swing_bias': np.int8,        # Bias.value: 1 bullish, -1 bearish, 0 neutral
+    'internal_bias': np.int8,
+}
+
+# Record dtypes for structures_as_arrays(); field names follow the dataclass attributes
+LIQUIDITY_SIDES = ('bsl', 'ssl')                    # LiquidityLevel.bias code = index
+ORDER_BLOCK_DTYPE = np.dtype([
+    ('barHigh', np.float64), ('barLow', np.float64), ('barTime', np.int64),
+    ('bias', np.int8),                               # Bias.value
+    ('mitigated', np.bool_), ('touch_count', np.int32), ('bos_move_pct', np.float64),
+    ('quality', np.float64), ('bar_index', np.int64), ('mitigated_bar', np.int64),
+])
+FVG_DTYPE = np.dtype([
+    ('top', np.float64), ('bottom', np.float64),
+    ('bias', np.int8),                               # Bias.value
+    ('startTime', np.int64), ('size_pct', np.float64), ('mitigated', np.bool_),
+    ('start_bar_index', np.int64), ('mitigated_bar', np.int64),
+])
+LIQUIDITY_DTYPE = np.dtype([
+    ('price', np.float64),
+    ('bias', np.int8),                               # LIQUIDITY_SIDES index
+    ('bar_index', np.int64), ('bar_time', np.int64), ('is_equal', np.bool_),
+    ('swept', np.bool_), ('sweep_bar', np.int64),
+])
+
+
 # ==================== DATACLASSES ====================
 
-@dataclass
+@dataclass(slots=True)
 class Pivot:
     currentLevel: float = np.nan
     lastLevel: float = np.nan
@@ -26,7 +72,7 @@ class Pivot:
     barTime: int = 0
     barIndex: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class OrderBlock:
     barHigh: float
     barLow: float
@@ -39,7 +85,7 @@ class OrderBlock:
     bar_index: int = 0            # Formation bar index (for look-ahead-free backtesting)
     mitigated_bar: int = -1       # Bar index when mitigated (-1 = still active)
 
-@dataclass
+@dataclass(slots=True)
 class FVG:
     top: float
     bottom: float
@@ -50,7 +96,7 @@ class FVG:
     start_bar_index: int = 0      # Formation bar index (for look-ahead-free backtesting)
     mitigated_bar: int = -1       # Bar index when mitigated (-1 = still active)
 
-@dataclass
+@dataclass(slots=True)
 class LiquidityLevel:
     """
     BSL (Buy-Side Liquidity): highs where stop-losses of shorts accumulate.
@@ -67,6 +113,120 @@ class LiquidityLevel:
     sweep_bar: int = -1
 
 
+# ==================== KERNELS ====================
+
+@njit
+def _fvg_lifecycle(highs, lows, closes, min_size_pct):
+    """
+    FVG detection and mitigation for a whole history (same rules as
+    _drawFairValueGaps / _deleteFairValueGaps). At most one FVG per bar.
+    Returns per-bar arrays: kind (1 bullish, -1 bearish, 0 none), top, bottom,
+    size_pct, mitigated_bar (-1 = still active after the last bar).
+    """
+    n = len(closes)
+    kind = np.zeros(n, dtype=np.int8)
+    top = np.zeros(n)
+    bottom = np.zeros(n)
+    size_pct = np.zeros(n)
+    mitigated_bar = np.full(n, -1, dtype=np.int64)
+    active = np.empty(n, dtype=np.int64)   # start bars of active FVGs
+    n_active = 0
+    for i in range(n):
+        # Mitigation first (bar order of _process_bar), compacting the active list
+        keep = 0
+        for k in range(n_active):
+            s = active[k]
+            if (kind[s] == 1 and lows[i] < bottom[s]) or (kind[s] == -1 and highs[i] > top[s]):
+                mitigated_bar[s] = i
+            else:
+                active[keep] = s
+                keep += 1
+        n_active = keep
+
+        if i < 2:
+            continue
+        c2_high = highs[i - 2]
+        c2_low = lows[i - 2]
+        if lows[i] > c2_high and closes[i] > c2_high:
+            pct = (lows[i] - c2_high) / c2_high if c2_high > 0 else 0.0
+            if pct >= min_size_pct:
+                kind[i] = 1
+                top[i] = lows[i]
+                bottom[i] = c2_high
+                size_pct[i] = pct
+        elif highs[i] < c2_low and closes[i] < c2_low:
+            pct = (c2_low - highs[i]) / c2_low if c2_low > 0 else 0.0
+            if pct >= min_size_pct:
+                kind[i] = -1
+                top[i] = c2_low
+                bottom[i] = highs[i]
+                size_pct[i] = pct
+        if kind[i] != 0:
+            active[n_active] = i
+            n_active += 1
+    return kind, top, bottom, size_pct, mitigated_bar
+
+
+# ==================== ACTIVE SETS ====================
+
+class _ActiveSet:
+    """
+    Still-active structures (unmitigated OBs/FVGs, unswept liquidity) of one bias,
+    sorted by a price key. The insertion sequence breaks ties and preserves creation
+    order, so a candle only has to retire the structures whose level it crosses.
+    """
+
+    __slots__ = ('_keys', '_items')
+
+    def __init__(self):
+        self._keys: list = []    # sorted (price, seq)
+        self._items: list = []   # aligned with _keys
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def add(self, price: float, seq: int, item):
+        idx = bisect.bisect_right(self._keys, (price, seq))
+        self._keys.insert(idx, (price, seq))
+        self._items.insert(idx, item)
+
+    def pop_below(self, price: float) -> list:
+        """Remove and return all items with key < price."""
+        idx = bisect.bisect_left(self._keys, (price,))
+        return self._pop_range(0, idx)
+
+    def pop_above(self, price: float) -> list:
+        """Remove and return all items with key > price."""
+        idx = bisect.bisect_right(self._keys, (price, float('inf')))
+        return self._pop_range(idx, len(self._keys))
+
+    def pop_between(self, low: float, high: float) -> list:
+        """Remove and return all items with low < key < high as (seq, item) pairs."""
+        lo = bisect.bisect_right(self._keys, (low, float('inf')))
+        hi = bisect.bisect_left(self._keys, (high,))
+        if lo >= hi:
+            return []
+        seqs = [k[1] for k in self._keys[lo:hi]]
+        return list(zip(seqs, self._pop_range(lo, hi)))
+
+    def between(self, low: float, high: float) -> list:
+        """All items with low <= key <= high as (seq, item) pairs (not removed)."""
+        lo = bisect.bisect_left(self._keys, (low,))
+        hi = bisect.bisect_right(self._keys, (high, float('inf')))
+        return [(self._keys[k][1], self._items[k]) for k in range(lo, hi)]
+
+    def _pop_range(self, lo: int, hi: int) -> list:
+        if lo >= hi:
+            return []
+        items = self._items[lo:hi]
+        del self._keys[lo:hi]
+        del self._items[lo:hi]
+        return items
+
+
 # ==================== ENGINE ====================
 
 class SMCEngine:
@@ -113,19 +273,77 @@ class SMCEngine:
         self.liquidityLevels: list[LiquidityLevel] = []
         self.event_log: list = []
 
-        # Per-candle state (one dict per bar)
+        # Active sets: only structures that can still be mitigated/swept, sorted by level
+        self._seq = 0
+        self._active_obs = {Bias.BULLISH: _ActiveSet(), Bias.BEARISH: _ActiveSet()}   # key: barLow / barHigh
+        self._active_fvgs = {Bias.BULLISH: _ActiveSet(), Bias.BEARISH: _ActiveSet()}  # key: bottom / top
+        self._active_liquidity = {'bsl': _ActiveSet(), 'ssl': _ActiveSet()}          # key: price
+        self._recent_sweeps: deque = deque()   # (sweep_bar, bias) within liquidity_lookback
+        self._recent_sweep_counts = {'bsl': 0, 'ssl': 0}
+
+        # Per-candle state (one dict per bar, or preallocated arrays in 'arrays' mode)
         self.bar_states: list = []
+        self.bar_arrays: dict = None
+        self._n_bar_arrays = 0
 
         # Premium/Discount range tracking
         self.pd_high: float = np.nan   # Last confirmed swing high
         self.pd_low: float = np.nan    # Last confirmed swing low
 
+        # Precomputed pivot candidates per leg size: {size: (new_leg_high, new_leg_low)}
+        self.precompute_legs = settings.get('precompute_legs', True)
+        self._leg_flags: dict = {}
+
+        # FVG lifecycle per bar from _fvg_lifecycle() (compiled with numba), only for process_dataframe()
+        self.precompute_fvgs = settings.get('precompute_fvgs', JIT_ENABLED)
+        self._fvg_flags: tuple = None
+
     # ==================== PIVOT DETECTION ====================
 
+    @staticmethod
+    def _compute_leg_flags(highs: np.ndarray, lows: np.ndarray, size: int):
+        """
+        Vectorized pivot candidates for all bars at once.
+        new_leg_high[i]: highs[i - size] > max(highs[i - size + 1 : i + 1])
+        new_leg_low[i]:  lows[i - size]  < min(lows[i - size + 1 : i + 1])
+        Bars with i < size stay False (no complete window yet).
+        """
+        n = len(highs)
+        new_leg_high = np.zeros(n, dtype=bool)
+        new_leg_low = np.zeros(n, dtype=bool)
+        if size <= 0 or n <= size:
+            return new_leg_high, new_leg_low
+        # window_max[j] = max(highs[j : j + size]) for j = 0 .. n - size
+        window_max = sliding_window_view(highs, size).max(axis=1)
+        window_min = sliding_window_view(lows, size).min(axis=1)
+        new_leg_high[size:] = highs[:n - size] > window_max[1:]
+        new_leg_low[size:] = lows[:n - size] < window_min[1:]
+        return new_leg_high, new_leg_low
+
+    def _precompute_leg_flags(self):
+        """Compute leg flags for swing and internal length once per processed history."""
+        self._leg_flags = {}
+        if not self.precompute_legs:
+            return
+        highs = np.asarray(self.highs, dtype=np.float64)
+        lows = np.asarray(self.lows, dtype=np.float64)
+        for size in {self.swingsLength, self.internalLength}:
+            new_leg_high, new_leg_low = self._compute_leg_flags(highs, lows, size)
+            self._leg_flags[size] = (new_leg_high.tolist(), new_leg_low.tolist())
+
     def _leg(self, size: int, index: int, current_leg_state: Leg) -> Leg:
         """Pine Script 'leg' function port: confirms a pivot `size` bars ago."""
         if index < size:
             return current_leg_state
+
+        flags = self._leg_flags.get(size)
+        if flags is not None and index < len(flags[0]):
+            if flags[0][index]:
+                return Leg.BEARISH
+            if flags[1][index]:
+                return Leg.BULLISH
+            return current_leg_state
+
         try:
             window_highs = self.highs[index - size + 1: index + 1]
             window_lows = self.lows[index - size + 1: index + 1]
@@ -220,6 +438,9 @@ class SMCEngine:
             )
             ob_list = self.internalOrderBlocks if internal else self.swingOrderBlocks
             ob_list.append(new_ob)
+            self._seq += 1
+            key = ob_low if bias == Bias.BULLISH else ob_high
+            self._active_obs[bias].add(key, self._seq, new_ob)
         except Exception:
             pass
 
@@ -279,26 +500,29 @@ class SMCEngine:
         bearish_source = c_close if self.ob_mitigation == 'Close' else c_high
         bullish_source = c_close if self.ob_mitigation == 'Close' else c_low
 
-        for ob in self.internalOrderBlocks + self.swingOrderBlocks:
-            if ob.mitigated:
-                continue
-            if ob.bias == Bias.BEARISH and bearish_source > ob.barHigh:
-                ob.mitigated = True
-                ob.mitigated_bar = index
-            elif ob.bias == Bias.BULLISH and bullish_source < ob.barLow:
-                ob.mitigated = True
-                ob.mitigated_bar = index
-            else:
-                # Price entered zone without mitigation → increment touch count
-                if ob.bias == Bias.BULLISH and c_low <= ob.barHigh and c_close >= ob.barLow:
-                    ob.touch_count += 1
-                elif ob.bias == Bias.BEARISH and c_high >= ob.barLow and c_close <= ob.barHigh:
-                    ob.touch_count += 1
+        # Retire only OBs whose level the candle crossed (bearish: key barHigh, bullish: key barLow)
+        for ob in self._active_obs[Bias.BEARISH].pop_below(bearish_source):
+            ob.mitigated = True
+            ob.mitigated_bar = index
+        for ob in self._active_obs[Bias.BULLISH].pop_above(bullish_source):
+            ob.mitigated = True
+            ob.mitigated_bar = index
+
+        # Price entered zone without mitigation → increment touch count
+        for ob in self._active_obs[Bias.BULLISH]:
+            if c_low <= ob.barHigh and c_close >= ob.barLow:
+                ob.touch_count += 1
+        for ob in self._active_obs[Bias.BEARISH]:
+            if c_high >= ob.barLow and c_close <= ob.barHigh:
+                ob.touch_count += 1
 
     # ==================== FVG ====================
 
     def _drawFairValueGaps(self, index: int):
         """Detect Fair Value Gaps (3-candle pattern) with minimum size filter."""
+        if self._fvg_flags is not None and index < len(self._fvg_flags[0]):
+            self._add_precomputed_fvg(index)
+            return
         if index < 2:
             return
         c_high = self.highs[index]
@@ -315,11 +539,14 @@ class SMCEngine:
             size = c_low - c2_high
             size_pct = size / c2_high if c2_high > 0 else 0.0
             if size_pct >= self.min_fvg_size_pct:
-                self.fairValueGaps.append(FVG(
+                fvg = FVG(
                     top=c_low, bottom=c2_high,
                     bias=Bias.BULLISH, startTime=c_time, size_pct=size_pct,
                     start_bar_index=index,
-                ))
+                )
+                self.fairValueGaps.append(fvg)
+                self._seq += 1
+                self._active_fvgs[Bias.BULLISH].add(fvg.bottom, self._seq, fvg)
                 self.event_log.append({
                     "time": c_time, "index": index,
                     "type": "Bullish FVG", "level": (c_low, c2_high),
@@ -329,29 +556,58 @@ class SMCEngine:
             size = c2_low - c_high
             size_pct = size / c2_low if c2_low > 0 else 0.0
             if size_pct >= self.min_fvg_size_pct:
-                self.fairValueGaps.append(FVG(
+                fvg = FVG(
                     top=c2_low, bottom=c_high,
                     bias=Bias.BEARISH, startTime=c_time, size_pct=size_pct,
                     start_bar_index=index,
-                ))
+                )
+                self.fairValueGaps.append(fvg)
+                self._seq += 1
+                self._active_fvgs[Bias.BEARISH].add(fvg.top, self._seq, fvg)
                 self.event_log.append({
                     "time": c_time, "index": index,
                     "type": "Bearish FVG", "level": (c2_low, c_high),
                 })
 
+    def _add_precomputed_fvg(self, index: int):
+        """
+        FVG of bar index from the precomputed lifecycle. FVGs that get mitigated
+        within the processed history are stored with their mitigation bar and never
+        enter the active set; the others are mitigated by later bars as usual.
+        """
+        kind, top, bottom, size_pct, mitigated_bar = self._fvg_flags
+        if not kind[index]:
+            return
+        bias = Bias.BULLISH if kind[index] == 1 else Bias.BEARISH
+        c_time = self.times[index]
+        fvg = FVG(
+            top=top[index], bottom=bottom[index],
+            bias=bias, startTime=c_time, size_pct=size_pct[index],
+            start_bar_index=index,
+        )
+        self.fairValueGaps.append(fvg)
+        self._seq += 1
+        if mitigated_bar[index] != -1:
+            fvg.mitigated = True
+            fvg.mitigated_bar = mitigated_bar[index]
+        else:
+            self._active_fvgs[bias].add(fvg.bottom if bias == Bias.BULLISH else fvg.top, self._seq, fvg)
+        self.event_log.append({
+            "time": c_time, "index": index,
+            "type": "Bullish FVG" if bias == Bias.BULLISH else "Bearish FVG",
+            "level": (fvg.top, fvg.bottom),
+        })
+
     def _deleteFairValueGaps(self, index: int):
         """Mitigate FVGs when price closes through them."""
         c_low = self.lows[index]
         c_high = self.highs[index]
-        for fvg in self.fairValueGaps:
-            if fvg.mitigated:
-                continue
-            if fvg.bias == Bias.BULLISH and c_low < fvg.bottom:
-                fvg.mitigated = True
-                fvg.mitigated_bar = index
-            elif fvg.bias == Bias.BEARISH and c_high > fvg.top:
-                fvg.mitigated = True
-                fvg.mitigated_bar = index
+        for fvg in self._active_fvgs[Bias.BULLISH].pop_above(c_low):
+            fvg.mitigated = True
+            fvg.mitigated_bar = index
+        for fvg in self._active_fvgs[Bias.BEARISH].pop_below(c_high):
+            fvg.mitigated = True
+            fvg.mitigated_bar = index
 
     # ==================== LIQUIDITY ====================
 
@@ -361,17 +617,25 @@ class SMCEngine:
         Mark as equal high/low if within threshold of an existing unswept level.
         """
         threshold = price * self.equal_level_threshold
+        active = self._active_liquidity[bias]
+        # Slightly widened bisect window, exact threshold check below; oldest match wins
+        tolerance = abs(threshold) * 1e-9 + abs(price) * 1e-12
+        matches = [
+            (seq, lvl) for seq, lvl in active.between(price - threshold - tolerance,
+                                                      price + threshold + tolerance)
+            if abs(lvl.price - price) <= threshold
+        ]
         is_equal = False
-        for lvl in self.liquidityLevels:
-            if not lvl.swept and lvl.bias == bias and abs(lvl.price - price) <= threshold:
-                is_equal = True
-                lvl.is_equal = True
-                break
-        self.liquidityLevels.append(LiquidityLevel(
+        if matches:
+            is_equal = True
+            min(matches, key=lambda m: m[0])[1].is_equal = True
+        lvl = LiquidityLevel(
             price=price, bias=bias,
             bar_index=bar_index, bar_time=bar_time,
             is_equal=is_equal,
-        ))
+        )
+        self.liquidityLevels.append(lvl)
+        active.add(price, len(self.liquidityLevels), lvl)
 
     def _checkLiquiditySweep(self, index: int):
         """
@@ -384,25 +648,27 @@ class SMCEngine:
         c_close = self.closes[index]
         c_time = self.times[index]
 
-        for lvl in self.liquidityLevels:
-            if lvl.swept or lvl.bar_index >= index:
+        # BSL swept: c_close < price < c_high; SSL swept: c_low < price < c_close
+        swept = (self._active_liquidity['bsl'].pop_between(c_close, c_high) +
+                 self._active_liquidity['ssl'].pop_between(c_low, c_close))
+        if not swept:
+            return
+
+        # Events in creation order of the levels (same order as a full scan)
+        for seq, lvl in sorted(swept, key=lambda m: m[0]):
+            if lvl.bar_index >= index:
+                self._active_liquidity[lvl.bias].add(lvl.price, seq, lvl)
                 continue
-            if lvl.bias == 'bsl' and c_high > lvl.price and c_close < lvl.price:
-                lvl.swept = True
-                lvl.sweep_bar = index
-                self.event_log.append({
-                    "time": c_time, "index": index,
-                    "type": "BSL Sweep", "level": lvl.price,
-                    "is_equal": lvl.is_equal,
-                })
-            elif lvl.bias == 'ssl' and c_low < lvl.price and c_close > lvl.price:
-                lvl.swept = True
-                lvl.sweep_bar = index
-                self.event_log.append({
-                    "time": c_time, "index": index,
-                    "type": "SSL Sweep", "level": lvl.price,
-                    "is_equal": lvl.is_equal,
-                })
+            lvl.swept = True
+            lvl.sweep_bar = index
+            self._recent_sweeps.append((index, lvl.bias))
+            self._recent_sweep_counts[lvl.bias] += 1
+            self.event_log.append({
+                "time": c_time, "index": index,
+                "type": "BSL Sweep" if lvl.bias == 'bsl' else "SSL Sweep",
+                "level": lvl.price,
+                "is_equal": lvl.is_equal,
+            })
 
     # ==================== PREMIUM / DISCOUNT ====================
 
@@ -429,19 +695,18 @@ class SMCEngine:
 
     # ==================== PER-CANDLE STATE ====================
 
+    def _update_sweep_window(self, index: int):
+        """Drop sweeps older than the lookback; return (recent_bsl_sweep, recent_ssl_sweep)."""
+        lb = self.liquidity_lookback
+        while self._recent_sweeps and index - self._recent_sweeps[0][0] > lb:
+            _, bias = self._recent_sweeps.popleft()
+            self._recent_sweep_counts[bias] -= 1
+        return self._recent_sweep_counts['bsl'] > 0, self._recent_sweep_counts['ssl'] > 0
+
     def _build_bar_state(self, index: int) -> dict:
         """Snapshot of all SMC state for this specific bar."""
         current_price = self.closes[index]
-        lb = self.liquidity_lookback
-
-        recent_bsl_sweep = False
-        recent_ssl_sweep = False
-        for lvl in self.liquidityLevels:
-            if lvl.swept and 0 <= (index - lvl.sweep_bar) <= lb:
-                if lvl.bias == 'bsl':
-                    recent_bsl_sweep = True
-                elif lvl.bias == 'ssl':
-                    recent_ssl_sweep = True
+        recent_bsl_sweep, recent_ssl_sweep = self._update_sweep_window(index)
 
         pd_pct = self._get_pd_pct(current_price)
         pd_zone = self._get_pd_zone(current_price)
@@ -468,12 +733,59 @@ class SMCEngine:
             'internal_bias': internal_bias,
         }
 
+    def _write_bar_arrays(self, index: int):
+        """Same state as _build_bar_state(), written straight into the preallocated arrays."""
+        arrays = self.bar_arrays
+        if index >= len(arrays['pd_pct']):
+            # append_bar() past the preallocated length: grow geometrically
+            new_len = max(16, 2 * len(arrays['pd_pct']))
+            for key, arr in arrays.items():
+                grown = np.zeros(new_len, dtype=arr.dtype)
+                grown[:len(arr)] = arr
+                arrays[key] = grown
+
+        recent_bsl_sweep, recent_ssl_sweep = self._update_sweep_window(index)
+        pd_pct = self._get_pd_pct(self.closes[index])
+        arrays['pd_pct'][index] = pd_pct
+        arrays['pd_zone'][index] = 2 if pd_pct >= 0.618 else 0 if pd_pct <= 0.382 else 1
+        arrays['pd_high'][index] = self.pd_high
+        arrays['pd_low'][index] = self.pd_low
+        arrays['recent_bsl_sweep'][index] = recent_bsl_sweep
+        arrays['recent_ssl_sweep'][index] = recent_ssl_sweep
+        arrays['swing_bias'][index] = self.swingTrend.value
+        arrays['internal_bias'][index] = self.internalTrend.value
+        self._n_bar_arrays = index + 1
+
     # ==================== MAIN ENTRY POINT ====================
 
-    def process_dataframe(self, df: pd.DataFrame) -> dict:
+    def _process_bar(self, i: int) -> dict:
+        """Advance all SMC state by bar i and record its per-candle state."""
+        # Order matters — mirrors Pine Script execution order
+        self._deleteFairValueGaps(i)
+        self._getCurrentStructure(self.swingsLength, i, internal=False)
+        self._getCurrentStructure(self.internalLength, i, internal=True)
+        self._displayStructure(i, internal=True)
+        self._displayStructure(i, internal=False)
+        self._deleteOrderBlocks(i)
+        self._checkLiquiditySweep(i)
+        self._drawFairValueGaps(i)
+        if self.bar_arrays is not None:
+            self._write_bar_arrays(i)
+            return None
+        state = self._build_bar_state(i)
+        self.bar_states.append(state)
+        return state
+
+    def process_dataframe(self, df: pd.DataFrame, bar_state_format: str = 'dicts') -> dict:
         """
         Process all candles and return SMC results + enriched DataFrame.
 
+        bar_state_format='arrays' skips the per-bar dicts and the DataFrame copy:
+        the per-candle state is written into preallocated NumPy arrays
+        (result key 'bar_arrays', see BAR_ARRAY_DTYPES; zone/bias as int8 codes),
+        'bar_states' and 'enriched_df' are None. Use smc_columns() for smc_* columns
+        or bar_states_from_arrays() for the dict form.
+
         Returns dict with:
           - events: list of all SMC events (BOS, CHoCH, FVG, Sweeps)
           - unmitigated_swing_obs: active swing order blocks
@@ -483,7 +795,8 @@ class SMCEngine:
           - bar_states: per-candle state list
           - enriched_df: original df with added smc_* columns
         """
-        df = df.sort_index()
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
         self.highs = df['high'].tolist()
         self.lows = df['low'].tolist()
         self.closes = df['close'].tolist()
@@ -495,29 +808,97 @@ class SMCEngine:
             self.times = list(range(len(df)))
 
         self.bar_states = []
+        self.bar_arrays = None
+        if bar_state_format == 'arrays':
+            self.bar_arrays = {key: np.zeros(len(df), dtype=dtype) for key, dtype in BAR_ARRAY_DTYPES.items()}
+            self._n_bar_arrays = 0
+        elif bar_state_format != 'dicts':
+            raise ValueError(f"Unbekanntes bar_state_format: {bar_state_format}")
+        self._precompute_leg_flags()
+        self._fvg_flags = None
+        if self.precompute_fvgs:
+            flags = _fvg_lifecycle(np.asarray(self.highs, dtype=np.float64), np.asarray(self.lows, dtype=np.float64),
+                                   np.asarray(self.closes, dtype=np.float64), self.min_fvg_size_pct)
+            self._fvg_flags = tuple(a.tolist() for a in flags)
 
         for i in range(len(df)):
-            # Order matters — mirrors Pine Script execution order
-            self._deleteFairValueGaps(i)
-            self._getCurrentStructure(self.swingsLength, i, internal=False)
-            self._getCurrentStructure(self.internalLength, i, internal=True)
-            self._displayStructure(i, internal=True)
-            self._displayStructure(i, internal=False)
-            self._deleteOrderBlocks(i)
-            self._checkLiquiditySweep(i)
-            self._drawFairValueGaps(i)
-            self.bar_states.append(self._build_bar_state(i))
-
-        # Build enriched DataFrame with per-candle SMC columns
-        enriched_df = df.copy()
-        enriched_df['smc_pd_pct'] = [s['pd_pct'] for s in self.bar_states]
-        enriched_df['smc_pd_zone'] = [s['pd_zone'] for s in self.bar_states]
-        enriched_df['smc_pd_high'] = [s['pd_high'] for s in self.bar_states]
-        enriched_df['smc_pd_low'] = [s['pd_low'] for s in self.bar_states]
-        enriched_df['smc_recent_bsl_sweep'] = [s['recent_bsl_sweep'] for s in self.bar_states]
-        enriched_df['smc_recent_ssl_sweep'] = [s['recent_ssl_sweep'] for s in self.bar_states]
-        enriched_df['smc_swing_bias'] = [s['swing_bias'] for s in self.bar_states]
-        enriched_df['smc_internal_bias'] = [s['internal_bias'] for s in self.bar_states]
+            self._process_bar(i)
+
+        return self.get_results(None if self.bar_arrays is not None else df)
+
+    # ==================== INCREMENTAL API ====================
+
+    def append_bar(self, o: float, h: float, l: float, c: float, t=None) -> dict:
+        """
+        Advance the engine by one closed candle and return its per-candle state
+        (None in 'arrays' mode — the state is written into bar_arrays).
+        Appending bars one by one yields the same structures, events and bar states
+        as process_dataframe() on the same history.
+
+        t: candle open time (pd.Timestamp, datetime or int ns); defaults to the bar index.
+        """
+        index = len(self.closes)
+        if t is None:
+            t = index
+        elif not isinstance(t, (int, np.integer)):
+            t = pd.Timestamp(t).value
+        self.opens.append(float(o))
+        self.highs.append(float(h))
+        self.lows.append(float(l))
+        self.closes.append(float(c))
+        self.times.append(int(t))
+        return self._process_bar(index)
+
+    def snapshot(self) -> dict:
+        """
+        Detached copy of the complete engine state (picklable).
+        Precomputed leg/FVG flags are not part of the state — bars beyond them take
+        the regular per-bar path, so a restored engine continues identically.
+        """
+        state = {k: v for k, v in self.__dict__.items() if k not in ('_leg_flags', '_fvg_flags')}
+        return copy.deepcopy(state)
+
+    def restore(self, state: dict) -> 'SMCEngine':
+        """Reset the engine to a state returned by snapshot(). The snapshot stays reusable."""
+        self.__dict__.update(copy.deepcopy(state))
+        self._leg_flags = {}
+        self._fvg_flags = None
+        return self
+
+    def structures_as_arrays(self) -> dict:
+        """
+        All order blocks, FVGs and liquidity levels as NumPy record arrays
+        (ORDER_BLOCK_DTYPE / FVG_DTYPE / LIQUIDITY_DTYPE), row i = i-th entry of the
+        matching list. Compact to cache and cheap to pickle; structures_from_arrays()
+        turns them back into dataclasses.
+        """
+        return {
+            'swing_obs': _to_records(self.swingOrderBlocks, ORDER_BLOCK_DTYPE, _encode_bias),
+            'internal_obs': _to_records(self.internalOrderBlocks, ORDER_BLOCK_DTYPE, _encode_bias),
+            'fvgs': _to_records(self.fairValueGaps, FVG_DTYPE, _encode_bias),
+            'liquidity_levels': _to_records(self.liquidityLevels, LIQUIDITY_DTYPE, LIQUIDITY_SIDES.index),
+        }
+
+    def get_results(self, df: pd.DataFrame = None) -> dict:
+        """
+        Result dict for the bars processed so far (see process_dataframe).
+        enriched_df is only built when the matching OHLC DataFrame is passed.
+        """
+        enriched_df = None
+        bar_arrays = None
+        if self.bar_arrays is not None:
+            bar_arrays = {key: arr[:self._n_bar_arrays] for key, arr in self.bar_arrays.items()}
+        elif df is not None:
+            # Build enriched DataFrame with per-candle SMC columns
+            enriched_df = df.copy()
+            enriched_df['smc_pd_pct'] = [s['pd_pct'] for s in self.bar_states]
+            enriched_df['smc_pd_zone'] = [s['pd_zone'] for s in self.bar_states]
+            enriched_df['smc_pd_high'] = [s['pd_high'] for s in self.bar_states]
+            enriched_df['smc_pd_low'] = [s['pd_low'] for s in self.bar_states]
+            enriched_df['smc_recent_bsl_sweep'] = [s['recent_bsl_sweep'] for s in self.bar_states]
+            enriched_df['smc_recent_ssl_sweep'] = [s['recent_ssl_sweep'] for s in self.bar_states]
+            enriched_df['smc_swing_bias'] = [s['swing_bias'] for s in self.bar_states]
+            enriched_df['smc_internal_bias'] = [s['internal_bias'] for s in self.bar_states]
 
         return {
             "events": self.event_log,
@@ -525,10 +906,81 @@ class SMCEngine:
             "unmitigated_internal_obs": [ob for ob in self.internalOrderBlocks if not ob.mitigated],
             "unmitigated_fvgs": [fvg for fvg in self.fairValueGaps if not fvg.mitigated],
             "liquidity_levels": self.liquidityLevels,
-            "bar_states": self.bar_states,
+            "bar_states": self.bar_states if bar_arrays is None else None,
+            "bar_arrays": bar_arrays,
             "enriched_df": enriched_df,
             # Full lists with bar_index/mitigated_bar for look-ahead-free backtesting
             "all_swing_obs": self.swingOrderBlocks,
             "all_internal_obs": self.internalOrderBlocks,
             "all_fvgs": self.fairValueGaps,
         }
+
+
+# ==================== RECORD ARRAY HELPERS ====================
+
+def _encode_bias(bias: Bias) -> int:
+    return bias.value
+
+
+def _to_records(items: list, dtype: np.dtype, encode_bias) -> np.ndarray:
+    names = dtype.names
+    rows = [tuple(encode_bias(v) if name == 'bias' else v
+                  for name, v in zip(names, (getattr(item, n) for n in names)))
+            for item in items]
+    return np.array(rows, dtype=dtype)
+
+
+def _from_records(records: np.ndarray, cls, decode_bias) -> list:
+    names = [f.name for f in fields(cls)]
+    columns = [records[name].tolist() for name in names]
+    bias_col = names.index('bias')
+    columns[bias_col] = [decode_bias(code) for code in columns[bias_col]]
+    return [cls(*row) for row in zip(*columns)]
+
+
+def structures_from_arrays(arrays: dict) -> dict:
+    """Inverse of SMCEngine.structures_as_arrays(): record arrays → dataclass lists."""
+    return {
+        'swing_obs': _from_records(arrays['swing_obs'], OrderBlock, Bias),
+        'internal_obs': _from_records(arrays['internal_obs'], OrderBlock, Bias),
+        'fvgs': _from_records(arrays['fvgs'], FVG, Bias),
+        'liquidity_levels': _from_records(arrays['liquidity_levels'], LiquidityLevel,
+                                          LIQUIDITY_SIDES.__getitem__),
+    }
+
+
+# ==================== BAR STATE HELPERS ====================
+
+def bar_states_from_arrays(bar_arrays: dict) -> list:
+    """Per-bar dict form (as in 'bar_states') from the struct-of-arrays output."""
+    n = len(bar_arrays['pd_pct'])
+    columns = smc_columns({'bar_arrays': bar_arrays})
+    keys = [(key, 'smc_' + key) for key in BAR_ARRAY_DTYPES]
+    values = {key: columns[col].tolist() for key, col in keys}
+    return [{key: values[key][i] for key, _ in keys} for i in range(n)]
+
+
+def smc_columns(smc_results: dict) -> dict:
+    """
+    smc_* columns (name → array, one value per processed bar) from a
+    process_dataframe() result, independent of bar_state_format.
+    Zone and bias codes are decoded to the usual strings.
+    """
+    bar_arrays = smc_results.get('bar_arrays')
+    if bar_arrays is not None:
+        zone_names = np.array(PD_ZONES, dtype=object)
+        bias_names = np.array([BIAS_NAMES[-1], BIAS_NAMES[0], BIAS_NAMES[1]], dtype=object)
+        return {
+            'smc_pd_pct': bar_arrays['pd_pct'],
+            'smc_pd_zone': zone_names[bar_arrays['pd_zone']],
+            'smc_pd_high': bar_arrays['pd_high'],
+            'smc_pd_low': bar_arrays['pd_low'],
+            'smc_recent_bsl_sweep': bar_arrays['recent_bsl_sweep'],
+            'smc_recent_ssl_sweep': bar_arrays['recent_ssl_sweep'],
+            'smc_swing_bias': bias_names[bar_arrays['swing_bias'] + 1],
+            'smc_internal_bias': bias_names[bar_arrays['internal_bias'] + 1],
+        }
+    enriched_df = smc_results.get('enriched_df')
+    if enriched_df is not None:
+        return {col: enriched_df[col].values for col in enriched_df.columns if col.startswith('smc_')}
+    return {}
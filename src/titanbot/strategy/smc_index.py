@@ -0,0 +1,70 @@
+"""
+Interval index over the SMC structures of one engine run.
+
+Every order block / FVG lives on the bar interval [formation bar, mitigated_bar)
+(open-ended while unmitigated). The backtester asks for every bar i which
+structures are alive at i and were formed within the last `smc_lookback` bars.
+Building the index once per SMC result turns that per-bar full scan into a
+bisect on the sorted formation bars plus a vectorized end-bar check.
+"""
+import numpy as np
+
+_OPEN_END = np.iinfo(np.int64).max
+
+
+class IntervalIndex:
+    """
+    Alive-at-bar query over a list of structures.
+    Results keep the original list order (= creation order), like the list
+    comprehensions they replace.
+    """
+
+    __slots__ = ('items', '_order', '_starts', '_ends')
+
+    def __init__(self, items: list, start_attr: str, end_attr: str = 'mitigated_bar'):
+        self.items = items
+        starts = np.fromiter((getattr(item, start_attr) for item in items), dtype=np.int64, count=len(items))
+        ends = np.fromiter((getattr(item, end_attr) for item in items), dtype=np.int64, count=len(items))
+        ends[ends == -1] = _OPEN_END
+        order = np.argsort(starts, kind='stable')
+        self._order = None if np.array_equal(order, np.arange(len(items))) else order
+        self._starts = starts[order]
+        self._ends = ends[order]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def alive(self, index: int, window: int) -> list:
+        """Structures with index - window <= start <= index and end == -1 or end > index."""
+        lo = np.searchsorted(self._starts, index - window, side='left')
+        hi = np.searchsorted(self._starts, index, side='right')
+        if lo >= hi:
+            return []
+        hits = np.flatnonzero(self._ends[lo:hi] > index) + lo
+        if self._order is not None:
+            hits = np.sort(self._order[hits])
+        items = self.items
+        return [items[k] for k in hits.tolist()]
+
+
+class SMCStructureIndex:
+    """
+    IntervalIndex for internal OBs, swing OBs and FVGs of a process_dataframe()
+    result. query() returns the per-bar SMC dict expected by get_titan_signal().
+    """
+
+    __slots__ = ('internal_obs', 'swing_obs', 'fvgs', 'liquidity_levels')
+
+    def __init__(self, smc_results: dict):
+        self.internal_obs = IntervalIndex(smc_results.get('all_internal_obs', []), 'bar_index')
+        self.swing_obs = IntervalIndex(smc_results.get('all_swing_obs', []), 'bar_index')
+        self.fvgs = IntervalIndex(smc_results.get('all_fvgs', []), 'start_bar_index')
+        self.liquidity_levels = smc_results.get('liquidity_levels', [])
+
+    def query(self, index: int, window: int) -> dict:
+        return {
+            'unmitigated_internal_obs': self.internal_obs.alive(index, window),
+            'unmitigated_swing_obs': self.swing_obs.alive(index, window),
+            'unmitigated_fvgs': self.fvgs.alive(index, window),
+            'liquidity_levels': self.liquidity_levels,
+        }
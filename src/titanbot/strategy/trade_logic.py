@@ -1,4 +1,6 @@
 # /root/titanbot/src/titanbot/strategy/trade_logic.py
+from dataclasses import dataclass
+
 import pandas as pd
 import numpy as np
 from titanbot.strategy.smc_engine import Bias, FVG, OrderBlock
@@ -50,26 +52,31 @@ def get_zone_based_tp(
         return min(candidates)   # niedrigstes BSL über Entry = nächstes
 
 
-def _is_rejection_candle(candle: pd.Series, side: str) -> bool:
+def _is_rejection(o: float, h: float, l: float, c: float, side: str) -> bool:
     """
     Rejection candle (pin bar / hammer / shooting star).
     Long: long lower wick + close near high = demand absorbed.
     Short: long upper wick + close near low = supply absorbed.
     """
-    body = abs(candle['close'] - candle['open'])
-    full_range = candle['high'] - candle['low']
+    body = abs(c - o)
+    full_range = h - l
     if full_range == 0:
         return False
     body_pct = body / full_range
 
     if side == 'buy':
-        lower_wick = min(candle['open'], candle['close']) - candle['low']
+        lower_wick = min(o, c) - l
         return (lower_wick / full_range) >= 0.35 and body_pct <= 0.65
     else:
-        upper_wick = candle['high'] - max(candle['open'], candle['close'])
+        upper_wick = h - max(o, c)
         return (upper_wick / full_range) >= 0.35 and body_pct <= 0.65
 
 
+def _is_rejection_candle(candle: pd.Series, side: str) -> bool:
+    """_is_rejection() for a candle Series/dict."""
+    return _is_rejection(candle['open'], candle['high'], candle['low'], candle['close'], side)
+
+
 def _ob_quality_ok(ob: OrderBlock, min_quality: float, max_touches: int) -> bool:
     """OB passes quality gate: strength and freshness check."""
     if ob.touch_count > max_touches:
@@ -89,191 +96,173 @@ def _get_strategy_params(params: dict) -> dict:
     return params  # fallback: treat top-level as strategy params
 
 
-# ==================== SIGNAL GENERATION ====================
+# ==================== COMPILED PARAMS ====================
 
-def get_titan_signal(
-    smc_results: dict,
-    current_candle: pd.Series,
-    params: dict,
-    market_bias: Bias,
-    prev_candle: pd.Series = None,
-):
-    """
-    Professional SMC signal generation. Entry requires ALL of:
+@dataclass(frozen=True, slots=True)
+class SignalParams:
+    """Strategy settings used by titan_signal(), parsed once per parameter set."""
+    use_adx_filter: bool = False
+    adx_threshold: float = 25
+    use_entry_confirmation: bool = True
+    use_rejection_candle: bool = True
+    use_volume_filter: bool = False
+    volume_threshold_multiplier: float = 1.5
+    use_pd_filter: bool = True
+    use_liquidity_sweep_filter: bool = True
+    min_ob_quality: float = 0.2
+    max_ob_touches: int = 1
+    use_swing_ob: bool = True
+    min_fvg_size: float = 0.05 / 100.0    # fraction (min_fvg_size_pct / 100)
+    use_mtf_filter: bool = False
 
-    1. Premium/Discount zone alignment
-       - Long only in discount zone (pd_pct <= 0.5)
-       - Short only in premium zone (pd_pct >= 0.5)
 
-    2. Liquidity swept in the correct direction
-       - SSL swept recently → long setup (stops taken below, reversal up)
-       - BSL swept recently → short setup (stops taken above, reversal down)
+def compile_signal_params(params: dict) -> SignalParams:
+    """
+    SignalParams from the backtester form {"strategy":..., "risk":...} or the
+    flat live config. Defaults match get_titan_signal().
+    """
+    sp = _get_strategy_params(params)
+    return SignalParams(
+        use_adx_filter=sp.get('use_adx_filter', False),
+        adx_threshold=sp.get('adx_threshold', 25),
+        use_entry_confirmation=sp.get('use_entry_confirmation', True),
+        use_rejection_candle=sp.get('use_rejection_candle', True),
+        use_volume_filter=sp.get('use_volume_filter', False),
+        volume_threshold_multiplier=sp.get('volume_threshold_multiplier', 1.5),
+        use_pd_filter=sp.get('use_pd_filter', True),
+        use_liquidity_sweep_filter=sp.get('use_liquidity_sweep_filter', True),
+        min_ob_quality=sp.get('min_ob_quality', 0.2),
+        max_ob_touches=sp.get('max_ob_touches', 1),
+        use_swing_ob=sp.get('use_swing_ob', True),
+        min_fvg_size=params.get('strategy', params).get('min_fvg_size_pct', 0.05) / 100.0,
+        use_mtf_filter=sp.get('use_mtf_filter', False),
+    )
 
-    3. Price in a valid structural zone
-       - Unmitigated Bullish OB / FVG → long
-       - Unmitigated Bearish OB / FVG → short
-       - FVG priority over OB (tighter, cleaner zone)
 
-    4. OB quality gate (if OB entry)
-       - quality score >= min_ob_quality
-       - touch_count <= max_ob_touches
+def _missing(value) -> bool:
+    return value is None or value != value
 
-    5. Confirmation candle (optional)
-       - Bullish engulfing / rejection pin bar for longs
-       - Bearish engulfing / rejection pin bar for shorts
 
-    6. MTF bias alignment (optional — use_mtf_filter)
+_NO_SIGNAL = (None, None, None)
 
-    7. ADX filter (optional — use_adx_filter)
 
-    8. Volume filter (optional — use_volume_filter)
+# ==================== SIGNAL GENERATION ====================
 
+def titan_signal(
+    sp: SignalParams,
+    o: float, h: float, l: float, c: float,
+    fvgs: list,
+    internal_obs: list,
+    swing_obs: list,
+    market_bias: Bias = None,
+    pd_pct: float = 0.5,
+    pd_zone: str = 'equilibrium',
+    recent_bsl_sweep: bool = False,
+    recent_ssl_sweep: bool = False,
+    volume: float = 0,
+    volume_ma: float = np.nan,
+    adx: float = np.nan,
+    adx_pos: float = np.nan,
+    adx_neg: float = np.nan,
+):
+    """
+    Signal kernel behind get_titan_signal(): same gates, evaluated from scalar
+    candle fields and the active (unmitigated) FVG / OB lists of the bar.
     Returns: (side, entry_price, signal_context) or (None, None, None)
     """
-    strategy_params = _get_strategy_params(params)
-
-    # --- Settings ---
-    use_adx_filter = strategy_params.get('use_adx_filter', False)
-    adx_threshold = strategy_params.get('adx_threshold', 25)
-    use_entry_confirmation = strategy_params.get('use_entry_confirmation', True)
-    use_rejection_candle = strategy_params.get('use_rejection_candle', True)
-    use_volume_filter = strategy_params.get('use_volume_filter', False)
-    volume_threshold_multiplier = strategy_params.get('volume_threshold_multiplier', 1.5)
-    use_pd_filter = strategy_params.get('use_pd_filter', True)
-    use_liquidity_sweep_filter = strategy_params.get('use_liquidity_sweep_filter', True)
-    min_ob_quality = strategy_params.get('min_ob_quality', 0.2)
-    max_ob_touches = strategy_params.get('max_ob_touches', 1)
-    use_swing_ob = strategy_params.get('use_swing_ob', True)
-
-    # --- Per-candle SMC state (from enriched df) ---
-    pd_zone = current_candle.get('smc_pd_zone', 'equilibrium')
-    pd_pct = current_candle.get('smc_pd_pct', 0.5)
-    recent_bsl_sweep = current_candle.get('smc_recent_bsl_sweep', False)
-    recent_ssl_sweep = current_candle.get('smc_recent_ssl_sweep', False)
-
     # --- Fast exits ---
     # Volume filter
-    if use_volume_filter:
+    if sp.use_volume_filter:
         try:
-            volume_ma = current_candle.get('volume_ma', np.nan)
-            current_volume = current_candle.get('volume', 0)
-            if not (pd.isna(volume_ma) or volume_ma == 0):
-                if current_volume < volume_ma * volume_threshold_multiplier:
-                    return None, None, None
+            if not (_missing(volume_ma) or volume_ma == 0):
+                if volume < volume_ma * sp.volume_threshold_multiplier:
+                    return _NO_SIGNAL
         except Exception:
             pass
 
     # ADX strength filter (directional filter applied later)
-    if use_adx_filter:
+    if sp.use_adx_filter:
         try:
-            adx = current_candle.get('adx', np.nan)
-            if pd.isna(adx) or adx < adx_threshold:
-                return None, None, None
+            if _missing(adx) or adx < sp.adx_threshold:
+                return _NO_SIGNAL
         except Exception:
-            return None, None, None
-
-    # --- Candle character ---
-    is_bullish_candle = current_candle['close'] > current_candle['open']
-    is_bearish_candle = current_candle['close'] < current_candle['open']
-
-    # --- SMC structures ---
-    unmitigated_fvgs = smc_results.get("unmitigated_fvgs", [])
-    unmitigated_internal_obs = smc_results.get("unmitigated_internal_obs", [])
-    unmitigated_swing_obs = smc_results.get("unmitigated_swing_obs", [])
-    all_obs = unmitigated_internal_obs + (unmitigated_swing_obs if use_swing_ob else [])
+            return _NO_SIGNAL
 
     signal_side = None
-    signal_price = None
-    signal_context = {}
-
-    min_fvg_size = params.get('strategy', params).get('min_fvg_size_pct', 0.05) / 100.0
+    signal_context = None
+    obs_lists = (internal_obs, swing_obs) if sp.use_swing_ob else (internal_obs,)
 
     # ==================== LONG SETUP ====================
     # Gate 1: P/D zone — must be in discount (price below midpoint of range)
-    long_pd_ok = (not use_pd_filter) or (pd_pct <= 0.5)
     # Gate 2: SSL liquidity sweep — stops below were taken, reversal up expected
-    long_sweep_ok = (not use_liquidity_sweep_filter) or recent_ssl_sweep
+    if ((not sp.use_pd_filter) or (pd_pct <= 0.5)) and ((not sp.use_liquidity_sweep_filter) or recent_ssl_sweep):
+        # Confirmation candle hängt nur von der Kerze ab, nicht von der Zone
+        candle_ok = (not sp.use_entry_confirmation) or c > o or (
+            sp.use_rejection_candle and _is_rejection(o, h, l, c, 'buy'))
 
-    if long_pd_ok and long_sweep_ok:
         # Priority 1: FVG long (tighter zone, cleaner entry)
-        for fvg in unmitigated_fvgs:
-            if fvg.bias != Bias.BULLISH:
-                continue
-            if fvg.size_pct < min_fvg_size:
-                continue
-            if current_candle['low'] <= fvg.top and current_candle['close'] >= fvg.bottom:
-                if use_entry_confirmation:
-                    candle_ok = is_bullish_candle or (
-                        use_rejection_candle and _is_rejection_candle(current_candle, 'buy')
-                    )
-                    if not candle_ok:
-                        continue
-                signal_side = "buy"
-                signal_price = current_candle['close']
-                signal_context = {
-                    'type': 'fvg',
-                    'level_low': fvg.bottom,
-                    'level_high': fvg.top,
-                    'bias': 'bullish',
-                    'fvg_size_pct': fvg.size_pct,
-                    'pd_zone': pd_zone,
-                    'pd_pct': pd_pct,
-                    'ssl_swept': recent_ssl_sweep,
-                }
-                break
-
-        # Priority 2: OB long
-        if not signal_side:
-            for ob in all_obs:
-                if ob.bias != Bias.BULLISH:
+        if candle_ok:
+            for fvg in fvgs:
+                if fvg.bias != Bias.BULLISH:
                     continue
-                if current_candle['low'] <= ob.barHigh and current_candle['close'] >= ob.barLow:
-                    if not _ob_quality_ok(ob, min_ob_quality, max_ob_touches):
-                        continue
-                    if use_entry_confirmation:
-                        candle_ok = is_bullish_candle or (
-                            use_rejection_candle and _is_rejection_candle(current_candle, 'buy')
-                        )
-                        if not candle_ok:
-                            continue
+                if fvg.size_pct < sp.min_fvg_size:
+                    continue
+                if l <= fvg.top and c >= fvg.bottom:
                     signal_side = "buy"
-                    signal_price = current_candle['close']
                     signal_context = {
-                        'type': 'order_block',
-                        'level_low': ob.barLow,
-                        'level_high': ob.barHigh,
+                        'type': 'fvg',
+                        'level_low': fvg.bottom,
+                        'level_high': fvg.top,
                         'bias': 'bullish',
-                        'ob_quality': ob.quality,
-                        'ob_touches': ob.touch_count,
+                        'fvg_size_pct': fvg.size_pct,
                         'pd_zone': pd_zone,
                         'pd_pct': pd_pct,
                         'ssl_swept': recent_ssl_sweep,
                     }
                     break
 
+        # Priority 2: OB long
+        if candle_ok and not signal_side:
+            for obs in obs_lists:
+                for ob in obs:
+                    if ob.bias != Bias.BULLISH:
+                        continue
+                    if l <= ob.barHigh and c >= ob.barLow:
+                        if not _ob_quality_ok(ob, sp.min_ob_quality, sp.max_ob_touches):
+                            continue
+                        signal_side = "buy"
+                        signal_context = {
+                            'type': 'order_block',
+                            'level_low': ob.barLow,
+                            'level_high': ob.barHigh,
+                            'bias': 'bullish',
+                            'ob_quality': ob.quality,
+                            'ob_touches': ob.touch_count,
+                            'pd_zone': pd_zone,
+                            'pd_pct': pd_pct,
+                            'ssl_swept': recent_ssl_sweep,
+                        }
+                        break
+                if signal_side:
+                    break
+
     # ==================== SHORT SETUP ====================
-    if not signal_side:
-        # Gate 1: P/D zone — must be in premium (price above midpoint)
-        short_pd_ok = (not use_pd_filter) or (pd_pct >= 0.5)
-        # Gate 2: BSL liquidity sweep — stops above were taken, reversal down expected
-        short_sweep_ok = (not use_liquidity_sweep_filter) or recent_bsl_sweep
-
-        if short_pd_ok and short_sweep_ok:
-            # Priority 1: FVG short
-            for fvg in unmitigated_fvgs:
+    # Gate 1: P/D zone — must be in premium (price above midpoint)
+    # Gate 2: BSL liquidity sweep — stops above were taken, reversal down expected
+    if not signal_side and ((not sp.use_pd_filter) or (pd_pct >= 0.5)) and (
+            (not sp.use_liquidity_sweep_filter) or recent_bsl_sweep):
+        candle_ok = (not sp.use_entry_confirmation) or c < o or (
+            sp.use_rejection_candle and _is_rejection(o, h, l, c, 'sell'))
+
+        # Priority 1: FVG short
+        if candle_ok:
+            for fvg in fvgs:
                 if fvg.bias != Bias.BEARISH:
                     continue
-                if fvg.size_pct < min_fvg_size:
+                if fvg.size_pct < sp.min_fvg_size:
                     continue
-                if current_candle['high'] >= fvg.bottom and current_candle['close'] <= fvg.top:
-                    if use_entry_confirmation:
-                        candle_ok = is_bearish_candle or (
-                            use_rejection_candle and _is_rejection_candle(current_candle, 'sell')
-                        )
-                        if not candle_ok:
-                            continue
+                if h >= fvg.bottom and c <= fvg.top:
                     signal_side = "sell"
-                    signal_price = current_candle['close']
                     signal_context = {
                         'type': 'fvg',
                         'level_low': fvg.bottom,
@@ -286,22 +275,16 @@ def get_titan_signal(
                     }
                     break
 
-            # Priority 2: OB short
-            if not signal_side:
-                for ob in all_obs:
+        # Priority 2: OB short
+        if candle_ok and not signal_side:
+            for obs in obs_lists:
+                for ob in obs:
                     if ob.bias != Bias.BEARISH:
                         continue
-                    if current_candle['high'] >= ob.barLow and current_candle['close'] <= ob.barHigh:
-                        if not _ob_quality_ok(ob, min_ob_quality, max_ob_touches):
+                    if h >= ob.barLow and c <= ob.barHigh:
+                        if not _ob_quality_ok(ob, sp.min_ob_quality, sp.max_ob_touches):
                             continue
-                        if use_entry_confirmation:
-                            candle_ok = is_bearish_candle or (
-                                use_rejection_candle and _is_rejection_candle(current_candle, 'sell')
-                            )
-                            if not candle_ok:
-                                continue
                         signal_side = "sell"
-                        signal_price = current_candle['close']
                         signal_context = {
                             'type': 'order_block',
                             'level_low': ob.barLow,
@@ -314,31 +297,96 @@ def get_titan_signal(
                             'bsl_swept': recent_bsl_sweep,
                         }
                         break
+                if signal_side:
+                    break
 
     if not signal_side:
-        return None, None, None
+        return _NO_SIGNAL
 
     # ==================== FINAL FILTERS ====================
 
     # ADX directional filter
-    if use_adx_filter:
+    if sp.use_adx_filter:
         try:
-            adx_pos = current_candle.get('adx_pos', np.nan)
-            adx_neg = current_candle.get('adx_neg', np.nan)
-            if not (pd.isna(adx_pos) or pd.isna(adx_neg)):
+            if not (_missing(adx_pos) or _missing(adx_neg)):
                 if signal_side == "buy" and adx_pos < adx_neg:
-                    return None, None, None
+                    return _NO_SIGNAL
                 if signal_side == "sell" and adx_neg < adx_pos:
-                    return None, None, None
+                    return _NO_SIGNAL
         except Exception:
-            return None, None, None
+            return _NO_SIGNAL
 
     # MTF bias filter
-    use_mtf_filter = strategy_params.get('use_mtf_filter', False)
-    if use_mtf_filter and market_bias is not None and market_bias != Bias.NEUTRAL:
+    if sp.use_mtf_filter and market_bias is not None and market_bias != Bias.NEUTRAL:
         if signal_side == 'buy' and market_bias == Bias.BEARISH:
-            return None, None, None
+            return _NO_SIGNAL
         if signal_side == 'sell' and market_bias == Bias.BULLISH:
-            return None, None, None
+            return _NO_SIGNAL
+
+    return signal_side, c, signal_context
+
+
+def signal_from_candle(sp: SignalParams, smc_results: dict, candle, market_bias: Bias = None):
+    """titan_signal() for a candle Series/dict carrying OHLC, indicator and smc_* fields."""
+    get = candle.get
+    return titan_signal(
+        sp, candle['open'], candle['high'], candle['low'], candle['close'],
+        smc_results.get("unmitigated_fvgs", []),
+        smc_results.get("unmitigated_internal_obs", []),
+        smc_results.get("unmitigated_swing_obs", []),
+        market_bias,
+        pd_pct=get('smc_pd_pct', 0.5),
+        pd_zone=get('smc_pd_zone', 'equilibrium'),
+        recent_bsl_sweep=get('smc_recent_bsl_sweep', False),
+        recent_ssl_sweep=get('smc_recent_ssl_sweep', False),
+        volume=get('volume', 0),
+        volume_ma=get('volume_ma', np.nan),
+        adx=get('adx', np.nan),
+        adx_pos=get('adx_pos', np.nan),
+        adx_neg=get('adx_neg', np.nan),
+    )
+
+
+def get_titan_signal(
+    smc_results: dict,
+    current_candle: pd.Series,
+    params: dict,
+    market_bias: Bias,
+    prev_candle: pd.Series = None,
+):
+    """
+    Professional SMC signal generation. Entry requires ALL of:
 
-    return signal_side, signal_price, signal_context
+    1. Premium/Discount zone alignment
+       - Long only in discount zone (pd_pct <= 0.5)
+       - Short only in premium zone (pd_pct >= 0.5)
+
+    2. Liquidity swept in the correct direction
+       - SSL swept recently → long setup (stops taken below, reversal up)
+       - BSL swept recently → short setup (stops taken above, reversal down)
+
+    3. Price in a valid structural zone
+       - Unmitigated Bullish OB / FVG → long
+       - Unmitigated Bearish OB / FVG → short
+       - FVG priority over OB (tighter, cleaner zone)
+
+    4. OB quality gate (if OB entry)
+       - quality score >= min_ob_quality
+       - touch_count <= max_ob_touches
+
+    5. Confirmation candle (optional)
+       - Bullish engulfing / rejection pin bar for longs
+       - Bearish engulfing / rejection pin bar for shorts
+
+    6. MTF bias alignment (optional — use_mtf_filter)
+
+    7. ADX filter (optional — use_adx_filter)
+
+    8. Volume filter (optional — use_volume_filter)
+
+    Parses params on every call; loops over many bars should compile them once
+    with compile_signal_params() and call titan_signal() / signal_from_candle().
+
+    Returns: (side, entry_price, signal_context) or (None, None, None)
+    """
+    return signal_from_candle(compile_signal_params(params), smc_results, current_candle, market_bias)
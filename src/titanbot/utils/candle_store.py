@@ -0,0 +1,225 @@
+# /root/titanbot/src/titanbot/utils/candle_store.py
+"""
+Spaltenweiser Kerzen-Cache für load_data(), ersetzt data/cache/{symbol}_{tf}.csv.
+
+Pro Symbol/Timeframe ein Verzeichnis mit einer Partition pro Kalendermonat (UTC):
+  YYYY-MM.values.npy  float64-Block (eine Zeile pro Spalte, jede Spalte zusammenhängend)
+  YYYY-MM.index.npy   int64-Zeitstempel (ns, UTC), aufsteigend
+  manifest.json       Spalten, je Monat (erster, letzter Zeitstempel, Zeilen), leere Bereiche
+
+read() lädt nur die Monate im angefragten Bereich, per mmap (mode 'c': Schreiben
+landet in privaten Seiten, nie auf der Platte), und sucht die Grenzen per
+Binärsuche im Index. Liegt der Bereich in einem Monat, zeigt der DataFrame
+direkt auf die gemappten Seiten (keine Kopie); über Monatsgrenzen wird nur das
+angefragte Fenster kopiert. Eine vorhandene CSV migriert migrate_csv() einmalig.
+
+missing_ranges() meldet die Lücken eines Bereichs, merge() fügt nachgeladene
+Kerzen ein und schreibt nur die betroffenen Monate neu. Bereiche, für die die
+Börse nachweislich keine Kerzen hat, merkt sich das Manifest ('empty_ranges'),
+damit sie nicht bei jedem Lauf erneut abgefragt werden.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from titanbot.utils.timeframe_utils import timeframe_to_ms
+
+_MANIFEST_FILE = 'manifest.json'
+_VALUES_SUFFIX = '.values.npy'
+_INDEX_SUFFIX = '.index.npy'
+
+
+def series_name(symbol: str, timeframe: str) -> str:
+    """Dateiname wie beim bisherigen CSV-Cache: BTC/USDT:USDT, 1h → BTC-USDT-USDT_1h."""
+    return f"{symbol.replace('/', '-').replace(':', '-')}_{timeframe}"
+
+
+def _utc_ns(value):
+    """Zeitpunkt als int64-ns (UTC); naive Zeiten gelten als UTC."""
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')).value
+
+
+class CandleStore:
+    """Monatspartitionierte .npy-Kerzen pro (symbol, timeframe) unter directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _series_dir(self, symbol: str, timeframe: str) -> str:
+        return os.path.join(self.directory, series_name(symbol, timeframe))
+
+    def manifest(self, symbol: str, timeframe: str):
+        """Manifest-Dict oder None, wenn die Serie (noch) nicht gespeichert ist."""
+        try:
+            with open(os.path.join(self._series_dir(symbol, timeframe), _MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def span(self, symbol: str, timeframe: str):
+        """(erste, letzte) Kerze als UTC-Timestamps, oder None."""
+        manifest = self.manifest(symbol, timeframe)
+        if not manifest or not manifest['months']:
+            return None
+        months = sorted(manifest['months'])
+        first = manifest['months'][months[0]][0]
+        last = manifest['months'][months[-1]][1]
+        return pd.Timestamp(first, tz='UTC'), pd.Timestamp(last, tz='UTC')
+
+    @staticmethod
+    def _frame_arrays(df: pd.DataFrame):
+        """(int64-ns-Zeitstempel, float64-Block Spalten × Zeilen), sortiert, Duplikate: letzte gewinnt."""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("CandleStore erwartet einen DatetimeIndex")
+        index = (df.index.tz_localize('UTC') if df.index.tz is None else df.index.tz_convert('UTC')).as_unit('ns')
+        order = np.argsort(index.asi8, kind='stable')
+        times = index.asi8[order].astype(np.int64)
+        keep = np.ones(len(times), dtype=bool)
+        keep[:-1] = times[:-1] != times[1:]
+        return times[keep], np.ascontiguousarray(df.to_numpy(dtype=np.float64)[order][keep].T)
+
+    def _write_months(self, series_dir: str, times: np.ndarray, values: np.ndarray) -> dict:
+        """Schreibt die Monatspartitionen von times/values; Rückgabe: Manifest-Einträge je Monat."""
+        os.makedirs(series_dir, exist_ok=True)
+        stamps = pd.DatetimeIndex(times.view('M8[ns]'))
+        month_keys = stamps.year * 100 + stamps.month
+        bounds = np.flatnonzero(np.diff(month_keys)) + 1
+        months = {}
+        for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(times)]):
+            month = f"{month_keys[lo] // 100:04d}-{month_keys[lo] % 100:02d}"
+            self._save(os.path.join(series_dir, month + _INDEX_SUFFIX), times[lo:hi])
+            self._save(os.path.join(series_dir, month + _VALUES_SUFFIX), np.ascontiguousarray(values[:, lo:hi]))
+            months[month] = [int(times[lo]), int(times[hi - 1]), int(hi - lo)]
+        return months
+
+    def _write_manifest(self, series_dir: str, manifest: dict):
+        tmp_path = os.path.join(series_dir, f"{_MANIFEST_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(series_dir, _MANIFEST_FILE))
+
+    def write(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        """Ersetzt die gespeicherte Serie durch df (DatetimeIndex, numerische Spalten)."""
+        times, values = self._frame_arrays(df)
+        series_dir = self._series_dir(symbol, timeframe)
+        months = self._write_months(series_dir, times, values)
+        self._write_manifest(series_dir, {'columns': [str(col) for col in df.columns], 'months': months,
+                                          'empty_ranges': []})
+
+        # Monate, die nicht mehr zur Serie gehören
+        for name in os.listdir(series_dir):
+            if name.endswith(_INDEX_SUFFIX) or name.endswith(_VALUES_SUFFIX):
+                if name.split('.', 1)[0] not in months:
+                    os.remove(os.path.join(series_dir, name))
+
+    def merge(self, symbol: str, timeframe: str, df: pd.DataFrame, empty_ranges=()):
+        """
+        Fügt df in die Serie ein (gleiche Zeitstempel: df gewinnt). Neu geschrieben werden
+        nur die Monate, in die df fällt; das Manifest wird zuletzt atomar ersetzt.
+        empty_ranges: [start_ns, end_ns) ohne Kerzen an der Börse (siehe missing_ranges).
+        """
+        manifest = self.manifest(symbol, timeframe)
+        if manifest is None or not manifest['months']:
+            if not df.empty:
+                self.write(symbol, timeframe, df)
+            manifest = self.manifest(symbol, timeframe)
+            if manifest is None:
+                return
+        elif not df.empty:
+            if [str(col) for col in df.columns] != manifest['columns']:
+                df = df.reindex(columns=manifest['columns'])
+            new_times, new_values = self._frame_arrays(df)
+            stamps = pd.DatetimeIndex(new_times.view('M8[ns]'))
+            touched = sorted(set(stamps.strftime('%Y-%m')) & set(manifest['months']))
+            series_dir = self._series_dir(symbol, timeframe)
+            old_times = [np.load(os.path.join(series_dir, m + _INDEX_SUFFIX)) for m in touched]
+            old_values = [np.load(os.path.join(series_dir, m + _VALUES_SUFFIX)) for m in touched]
+            times = np.concatenate(old_times + [new_times])
+            values = np.concatenate(old_values + [new_values], axis=1)
+            order = np.argsort(times, kind='stable')  # neue Zeilen stehen hinten → gewinnen
+            times, values = times[order], values[:, order]
+            keep = np.ones(len(times), dtype=bool)
+            keep[:-1] = times[:-1] != times[1:]
+            manifest['months'].update(self._write_months(series_dir, times[keep], values[:, keep]))
+            manifest['months'] = dict(sorted(manifest['months'].items()))
+
+        known = {tuple(r) for r in manifest.get('empty_ranges', [])}
+        manifest['empty_ranges'] = sorted(known | {(int(a), int(b)) for a, b in empty_ranges})
+        self._write_manifest(self._series_dir(symbol, timeframe), manifest)
+
+    def missing_ranges(self, symbol: str, timeframe: str, start, end) -> list:
+        """
+        Lücken der Serie in [start, end] als [(start_ns, end_ns), ...] (halboffen): fehlender
+        Anfang, fehlende Kerzen mittendrin (Abstand > Timeframe) und fehlendes Ende. Der
+        Endbereich beginnt bei der letzten gespeicherten Kerze, damit eine beim Speichern
+        noch laufende Kerze ersetzt wird. Als leer bekannte Bereiche werden übersprungen.
+        """
+        start_ns, end_ns = _utc_ns(start), _utc_ns(end)
+        tf_ns = timeframe_to_ms(timeframe) * 1_000_000
+        manifest = self.manifest(symbol, timeframe)
+        if not manifest or not manifest['months']:
+            return [(start_ns, end_ns + 1)]
+        window = self.read(symbol, timeframe, start_ns - tf_ns, end_ns)
+        times = window.index.asi8
+        if len(times) == 0:
+            return [(start_ns, end_ns + 1)]
+
+        gaps = []
+        if times[0] > start_ns:
+            gaps.append((start_ns, int(times[0])))
+        for i in np.flatnonzero(np.diff(times) > tf_ns):
+            gaps.append((int(times[i]) + tf_ns, int(times[i + 1])))
+        empty = {tuple(r) for r in manifest.get('empty_ranges', [])}
+        gaps = [gap for gap in gaps if not any(a <= gap[0] and gap[1] <= b for a, b in empty)]
+        if times[-1] + tf_ns <= end_ns:
+            gaps.append((int(times[-1]), end_ns + 1))
+        return gaps
+
+    @staticmethod
+    def _save(path: str, arr: np.ndarray):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp_path, path)
+
+    def read(self, symbol: str, timeframe: str, start=None, end=None) -> pd.DataFrame:
+        """Kerzen mit start <= Zeit <= end (beide inklusive, None = offen) als DataFrame."""
+        manifest = self.manifest(symbol, timeframe)
+        if not manifest or not manifest['months']:
+            return pd.DataFrame()
+        start_ns, end_ns = _utc_ns(start), _utc_ns(end)
+
+        series_dir = self._series_dir(symbol, timeframe)
+        parts_values, parts_index = [], []
+        for month in sorted(manifest['months']):
+            first, last, _ = manifest['months'][month]
+            if (start_ns is not None and last < start_ns) or (end_ns is not None and first > end_ns):
+                continue
+            times = np.load(os.path.join(series_dir, month + _INDEX_SUFFIX), mmap_mode='c')
+            values = np.load(os.path.join(series_dir, month + _VALUES_SUFFIX), mmap_mode='c')
+            lo = int(np.searchsorted(times, start_ns, side='left')) if start_ns is not None else 0
+            hi = int(np.searchsorted(times, end_ns, side='right')) if end_ns is not None else len(times)
+            if hi > lo:
+                parts_index.append(times[lo:hi])
+                parts_values.append(values[:, lo:hi])
+
+        columns = manifest['columns']
+        if not parts_values:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], tz='UTC', name='timestamp'), dtype=np.float64)
+        if len(parts_values) == 1:
+            times, values = parts_index[0], parts_values[0]
+        else:
+            times, values = np.concatenate(parts_index), np.concatenate(parts_values, axis=1)
+        index = pd.DatetimeIndex(np.asarray(times).view('M8[ns]'), name='timestamp').tz_localize('UTC')
+        return pd.DataFrame(values.T, index=index, columns=columns, copy=False)
+
+    def migrate_csv(self, csv_path: str, symbol: str, timeframe: str):
+        """Übernimmt einen alten CSV-Cache (index_col='timestamp') in den Store und löscht die CSV."""
+        data = pd.read_csv(csv_path, index_col='timestamp', parse_dates=True)
+        self.write(symbol, timeframe, data)
+        os.remove(csv_path)
@@ -99,6 +99,15 @@ class Exchange:
             logger.error(f"FEHLER: Ungültiges Datumsformat: {e}")
             return pd.DataFrame()
 
+        df = self.fetch_ohlcv_range(symbol, timeframe, start_ts, end_ts, max_retries)
+        if df.empty:
+            logger.warning(f"Keine historischen Daten für {symbol} ({timeframe}) im Zeitraum {start_date_str} - {end_date_str} gefunden.")
+            return df
+        return df.loc[start_dt:end_dt]
+
+    def fetch_ohlcv_range(self, symbol, timeframe, start_ts, end_ts, max_retries=3):
+        """Alle Kerzen mit start_ts <= Zeitstempel <= end_ts (ms, UTC) als DataFrame, leer bei Fehler."""
+        if not self.markets: return pd.DataFrame()
         all_ohlcv = []
         current_ts = start_ts
         retries = 0
@@ -144,14 +153,13 @@ class Exchange:
                 retries += 1
 
         if not all_ohlcv:
-            logger.warning(f"Keine historischen Daten für {symbol} ({timeframe}) im Zeitraum {start_date_str} - {end_date_str} gefunden.")
             return pd.DataFrame()
 
         df = pd.DataFrame(all_ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
         df.set_index('timestamp', inplace=True)
         df = df[~df.index.duplicated(keep='first')].sort_index()
-        return df.loc[start_dt:end_dt]
+        return df.loc[pd.to_datetime(start_ts, unit='ms', utc=True):]
 
     def fetch_ticker(self, symbol):
         if not self.markets: return None
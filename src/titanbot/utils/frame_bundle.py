@@ -0,0 +1,52 @@
+# /root/titanbot/src/titanbot/utils/frame_bundle.py
+"""
+OHLCV-/Indikator-DataFrames als memory-mapped .npy-Bundle für Worker-Prozesse.
+
+publish_frame() schreibt die numerischen Spalten einmal als float64-Block
+(eine Zeile pro Spalte, also jede Spalte zusammenhängend) plus den Index als
+int64-Zeitstempel. attach_frame() lädt das Bundle mit mmap_mode='r': der
+DataFrame zeigt direkt auf die gemappten Seiten (read-only, keine Kopie), alle
+Prozesse teilen sich dieselben Seiten im Page-Cache — der Speicher wächst nicht
+mit der Worker-Anzahl. Nur der Index wird pro Prozess neu aufgebaut.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+_VALUES_FILE = 'values.npy'
+_INDEX_FILE = 'index.npy'
+_META_FILE = 'meta.json'
+
+
+def publish_frame(df: pd.DataFrame, directory: str) -> dict:
+    """Schreibt df nach directory und gibt den (picklebaren) Handle für attach_frame() zurück."""
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise ValueError("publish_frame erwartet einen DatetimeIndex")
+    non_numeric = [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+    if non_numeric:
+        raise ValueError(f"Nicht-numerische Spalten können nicht geteilt werden: {non_numeric}")
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, _VALUES_FILE), np.ascontiguousarray(df.to_numpy(dtype=np.float64).T))
+    np.save(os.path.join(directory, _INDEX_FILE), df.index.asi8)
+    meta = {
+        'columns': [str(col) for col in df.columns],
+        'unit': df.index.unit,
+        'tz': str(df.index.tz) if df.index.tz is not None else None,
+        'name': df.index.name,
+    }
+    with open(os.path.join(directory, _META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return {'directory': directory, **meta}
+
+
+def attach_frame(handle: dict) -> pd.DataFrame:
+    """Read-only DataFrame auf dem gemappten Bundle (siehe publish_frame)."""
+    directory = handle['directory']
+    values = np.load(os.path.join(directory, _VALUES_FILE), mmap_mode='r')
+    index = pd.DatetimeIndex(np.load(os.path.join(directory, _INDEX_FILE)).view(f"M8[{handle['unit']}]"), name=handle['name'])
+    if handle['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(handle['tz'])
+    return pd.DataFrame(values.T, index=index, columns=handle['columns'], copy=False)
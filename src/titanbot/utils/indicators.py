@@ -0,0 +1,279 @@
+# /root/titanbot/src/titanbot/utils/indicators.py
+"""
+ATR, ADX (+DI/-DI) und Volumen-MA als NumPy-Kernels — eine Implementierung für
+Backtester, Optimizer, Portfolio-Simulator, Live-Bot und Regime-Analyse.
+
+Die Werte sind bitgleich mit ta 0.11 (AverageTrueRange / ADXIndicator,
+fillna=False), inklusive dessen Eigenheiten: Warmup-Werte sind 0 statt NaN,
++DI/-DI beginnen eine Kerze nach der ersten Glättung, der ADX bei Index
+2*window-1. Die Wilder-Glättung läuft als O(n)-Schleife (numba, utils/jit.py).
+
+compute_indicators() cached die Spalten im Prozess pro (Daten-Fingerprint,
+Periode). IndicatorStream hält den Glättungs-Zustand am Ende einer Historie und
+führt ihn Kerze für Kerze fort — der Live-Bot rechnet damit pro Lauf nur die
+neuen Kerzen statt des ganzen Fensters.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from titanbot.utils.jit import njit
+
+INDICATOR_COLUMNS = ('atr', 'adx', 'adx_pos', 'adx_neg', 'volume_ma')
+ATR_WINDOW = 14
+_CACHE_SIZE = 32
+_cache = OrderedDict()
+
+
+@njit
+def _wilder_atr(tr, seed, window):
+    out = np.zeros(len(tr))
+    out[window - 1] = seed
+    for i in range(window, len(tr)):
+        out[i] = (out[i - 1] * (window - 1) + tr[i]) / float(window)
+    return out
+
+
+@njit
+def _wilder_dmi(ddm, pos, neg, s_tr, s_pos, s_neg, window):
+    """+DI/-DI und DX ab Index window; Rückgabe inkl. Glättungs-Zustand der letzten Kerze."""
+    n = len(ddm)
+    pdi = np.zeros(n)
+    ndi = np.zeros(n)
+    dx = np.zeros(n)
+    for j in range(window, n):
+        if j > window:
+            s_tr = s_tr - (s_tr / float(window)) + ddm[j]
+            s_pos = s_pos - (s_pos / float(window)) + pos[j]
+            s_neg = s_neg - (s_neg / float(window)) + neg[j]
+        p = 100 * (s_pos / s_tr) if s_tr != 0 else 0.0
+        m = 100 * (s_neg / s_tr) if s_tr != 0 else 0.0
+        dx[j] = 100 * np.abs((p - m) / (p + m)) if p + m != 0 else 0.0
+        if j > window:
+            pdi[j] = p
+            ndi[j] = m
+    return pdi, ndi, dx, s_tr, s_pos, s_neg
+
+
+@njit
+def _wilder_adx(dx, seed, window):
+    out = np.zeros(len(dx))
+    first = 2 * window - 1
+    out[first] = seed
+    for j in range(first + 1, len(dx)):
+        out[j] = ((out[j - 1] * (window - 1)) + dx[j]) / float(window)
+    return out
+
+
+def _prev(values: np.ndarray) -> np.ndarray:
+    prev = np.empty_like(values)
+    prev[0] = np.nan
+    prev[1:] = values[:-1]
+    return prev
+
+
+def atr(high, low, close, window: int = ATR_WINDOW) -> np.ndarray:
+    """Average True Range (Wilder), 0 vor Index window-1."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    if len(close) < window:
+        raise ValueError(f"ATR({window}) braucht mindestens {window} Kerzen, erhalten: {len(close)}")
+    prev_close = _prev(close)
+    tr = np.maximum(np.maximum(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    tr[0] = high[0] - low[0]
+    return _wilder_atr(tr, tr[:window].mean(), window)
+
+
+def _dmi(high, low, close, window):
+    """(adx, adx_pos, adx_neg, Zustand (s_tr, s_pos, s_neg)) wie ta.trend.ADXIndicator."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    if len(close) < 2 * window:
+        raise ValueError(f"ADX({window}) braucht mindestens {2 * window} Kerzen, erhalten: {len(close)}")
+    prev_close = _prev(close)
+    ddm = np.maximum(high, prev_close) - np.minimum(low, prev_close)
+    up = high - _prev(high)
+    down = _prev(low) - low
+    with np.errstate(invalid='ignore'):
+        pos = np.where((up > down) & (up > 0), up, 0.0)
+        neg = np.where((down > up) & (down > 0), down, 0.0)
+    pdi, ndi, dx, s_tr, s_pos, s_neg = _wilder_dmi(
+        ddm, pos, neg, ddm[1:window + 1].sum(), pos[1:window + 1].sum(), neg[1:window + 1].sum(), window)
+    adx_values = _wilder_adx(dx, dx[window:2 * window].mean(), window)
+    return adx_values, pdi, ndi, (s_tr, s_pos, s_neg)
+
+
+def adx(high, low, close, window: int = 14):
+    """(adx, adx_pos, adx_neg) — Average Directional Index mit +DI/-DI."""
+    adx_values, pdi, ndi, _ = _dmi(high, low, close, window)
+    return adx_values, pdi, ndi
+
+
+def volume_ma(volume, window: int = 20) -> np.ndarray:
+    """Gleitender Volumen-Durchschnitt, NaN vor Index window-1."""
+    return pd.Series(np.asarray(volume, dtype=np.float64)).rolling(window=window).mean().to_numpy()
+
+
+def _fingerprint(*arrays) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for arr in arrays:
+        h.update(np.ascontiguousarray(arr, dtype=np.float64))
+    return h.hexdigest()
+
+
+def _cached(key, compute):
+    values = _cache.get(key)
+    if values is None:
+        values = compute()
+        _cache[key] = values
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    else:
+        _cache.move_to_end(key)
+    return values
+
+
+def compute_indicators(df, adx_period: int = 14, volume_ma_period: int = 20,
+                       columns=INDICATOR_COLUMNS) -> dict:
+    """
+    {Spalte: np.ndarray} für die angefragten INDICATOR_COLUMNS von df (high/low/close/volume).
+    Ergebnisse werden pro (Fingerprint der Kerzen, Periode) gecacht; zurück kommen Kopien.
+    """
+    out = {}
+    if {'atr', 'adx', 'adx_pos', 'adx_neg'} & set(columns):
+        high, low, close = (df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close'))
+        hlc = _fingerprint(high, low, close)
+        if 'atr' in columns:
+            out['atr'] = _cached(('atr', hlc, ATR_WINDOW), lambda: atr(high, low, close, ATR_WINDOW))
+        if {'adx', 'adx_pos', 'adx_neg'} & set(columns):
+            values = _cached(('adx', hlc, adx_period), lambda: adx(high, low, close, adx_period))
+            out.update((col, arr) for col, arr in zip(('adx', 'adx_pos', 'adx_neg'), values) if col in columns)
+    if 'volume_ma' in columns:
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        out['volume_ma'] = _cached(('volume_ma', _fingerprint(volume), volume_ma_period),
+                                   lambda: volume_ma(volume, volume_ma_period))
+    return {col: out[col].copy() for col in columns}
+
+
+def clear_cache():
+    _cache.clear()
+
+
+class IndicatorStream:
+    """
+    Wilder-Zustand nach der letzten Kerze einer Historie.
+    append() schreibt eine abgeschlossene Kerze fort, peek() liefert die Werte
+    einer noch laufenden Kerze ohne den Zustand zu ändern. Die letzten
+    `history` Kerzen bleiben mit ihren Werten gespeichert (für sync()).
+    """
+
+    _STATE_KEYS = ('adx_period', 'volume_ma_period', 'history', 'last_high', 'last_low', 'last_close',
+                   'atr', 's_tr', 's_pos', 's_neg', 'adx', 'volumes', 'times', 'values')
+
+    def __init__(self, df, adx_period: int = 14, volume_ma_period: int = 20, history: int = 500):
+        """df: abgeschlossene Kerzen (DatetimeIndex, high/low/close/volume), mindestens 2*adx_period."""
+        self.adx_period = adx_period
+        self.volume_ma_period = volume_ma_period
+        self.history = history
+        if df is None:
+            return
+        high, low, close, volume = (df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close', 'volume'))
+        adx_values, pdi, ndi, (self.s_tr, self.s_pos, self.s_neg) = _dmi(high, low, close, adx_period)
+        columns = {'atr': atr(high, low, close), 'adx': adx_values, 'adx_pos': pdi, 'adx_neg': ndi,
+                   'volume_ma': volume_ma(volume, volume_ma_period)}
+        self.last_high, self.last_low, self.last_close = float(high[-1]), float(low[-1]), float(close[-1])
+        self.atr = float(columns['atr'][-1])
+        self.adx = float(adx_values[-1])
+        self.volumes = volume[-volume_ma_period:].tolist()
+        self.times = df.index.asi8[-history:].tolist()
+        self.values = {col: arr[-history:].tolist() for col, arr in columns.items()}
+
+    @property
+    def last_time(self) -> int:
+        return self.times[-1]
+
+    def _step(self, high, low, close, volume):
+        w = self.adx_period
+        pc = self.last_close
+        tr = max(high - low, abs(high - pc), abs(low - pc))
+        atr_value = (self.atr * (ATR_WINDOW - 1) + tr) / float(ATR_WINDOW)
+        ddm = max(high, pc) - min(low, pc)
+        up, down = high - self.last_high, self.last_low - low
+        pos = up if up > down and up > 0 else 0.0
+        neg = down if down > up and down > 0 else 0.0
+        s_tr = self.s_tr - (self.s_tr / float(w)) + ddm
+        s_pos = self.s_pos - (self.s_pos / float(w)) + pos
+        s_neg = self.s_neg - (self.s_neg / float(w)) + neg
+        pdi = 100 * (s_pos / s_tr) if s_tr != 0 else 0.0
+        ndi = 100 * (s_neg / s_tr) if s_tr != 0 else 0.0
+        dx = 100 * abs((pdi - ndi) / (pdi + ndi)) if pdi + ndi != 0 else 0.0
+        adx_value = ((self.adx * (w - 1)) + dx) / float(w)
+        volumes = (self.volumes + [volume])[-self.volume_ma_period:]
+        vol_ma = float(np.mean(volumes)) if len(volumes) == self.volume_ma_period else float('nan')
+        values = {'atr': atr_value, 'adx': adx_value, 'adx_pos': pdi, 'adx_neg': ndi, 'volume_ma': vol_ma}
+        return values, (high, low, close, atr_value, s_tr, s_pos, s_neg, adx_value, volumes)
+
+    def peek(self, high, low, close, volume) -> dict:
+        """Indikatorwerte einer (laufenden) Kerze nach dem Zustand, ohne ihn fortzuschreiben."""
+        return self._step(float(high), float(low), float(close), float(volume))[0]
+
+    def append(self, time_ns: int, high, low, close, volume) -> dict:
+        """Schreibt den Zustand um eine abgeschlossene Kerze fort und gibt ihre Werte zurück."""
+        values, state = self._step(float(high), float(low), float(close), float(volume))
+        (self.last_high, self.last_low, self.last_close, self.atr,
+         self.s_tr, self.s_pos, self.s_neg, self.adx, self.volumes) = state
+        self.times = (self.times + [int(time_ns)])[-self.history:]
+        for col, value in values.items():
+            self.values[col] = (self.values[col] + [value])[-self.history:]
+        return values
+
+    def sync(self, df):
+        """
+        Schreibt den Zustand bis zur vorletzten Kerze von df fort (die letzte ist die
+        laufende) und gibt {Spalte: np.ndarray} für alle Zeilen von df zurück. None,
+        wenn df nicht an den Zustand anschließt (Lücke, geänderte Kerze, zu kurze
+        Historie) — dann aus df neu aufbauen.
+        """
+        times = df.index.asi8
+        high, low, close, volume = (df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close', 'volume'))
+        closed = len(df) - 1
+        pos = int(np.searchsorted(times, self.last_time))
+        if closed < 1 or pos >= closed or times[pos] != self.last_time or close[pos] != self.last_close:
+            return None
+        for i in range(pos + 1, closed):
+            self.append(times[i], high[i], low[i], close[i], volume[i])
+
+        start = len(self.times) - closed
+        if start < 0 or self.times[start:] != times[:closed].tolist():
+            return None
+        running = self.peek(high[-1], low[-1], close[-1], volume[-1])
+        return {col: np.array(self.values[col][start:] + [running[col]]) for col in INDICATOR_COLUMNS}
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self._STATE_KEYS}
+
+    @classmethod
+    def from_dict(cls, state: dict):
+        stream = cls(None, state['adx_period'], state['volume_ma_period'], state['history'])
+        for key in cls._STATE_KEYS:
+            setattr(stream, key, state[key])
+        return stream
+
+
+def load_stream(path: str):
+    """IndicatorStream aus save_stream(), oder None (fehlt / unlesbar)."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return IndicatorStream.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_stream(stream: IndicatorStream, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stream.to_dict(), f)
+    os.replace(tmp_path, path)
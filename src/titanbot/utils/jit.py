@@ -0,0 +1,37 @@
+# /root/titanbot/src/titanbot/utils/jit.py
+"""
+Optionales Numba-Backend für numerische Kernels.
+
+Ist numba installiert, werden mit @njit dekorierte Funktionen beim ersten Aufruf
+kompiliert (Cache in __pycache__). Ohne numba — oder mit TITANBOT_DISABLE_JIT=1 —
+bleibt @njit ein No-op und die Kernels laufen als normales Python mit identischem
+Ergebnis. JIT_ENABLED sagt Aufrufern, ob sich float64-Arrays (JIT) oder
+Python-Listen (reines Python, schnellere Einzelzugriffe) als Eingabe lohnen.
+"""
+import os
+
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+JIT_ENABLED = NUMBA_AVAILABLE and os.environ.get('TITANBOT_DISABLE_JIT', '') in ('', '0')
+
+
+def njit(*args, **kwargs):
+    """numba.njit (cache=True) wenn JIT_ENABLED, sonst unveränderte Python-Funktion."""
+    def decorate(func):
+        if JIT_ENABLED:
+            return numba.njit(cache=True, **kwargs)(func)
+        return func
+
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return decorate(args[0])
+    return decorate
+
+
+def py_func(kernel):
+    """Python-Version eines Kernels (Referenz für Paritäts-Tests)."""
+    return getattr(kernel, 'py_func', kernel)
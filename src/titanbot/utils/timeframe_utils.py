@@ -1,6 +1,17 @@
 # /root/titanbot/src/titanbot/utils/timeframe_utils.py
 import math
 
+_UNIT_MS = {'m': 60_000, 'h': 3_600_000, 'd': 86_400_000, 'w': 604_800_000}
+
+
+def timeframe_to_ms(timeframe):
+    """Dauer einer Kerze in Millisekunden ('30m' → 1800000)."""
+    try:
+        return int(timeframe[:-1]) * _UNIT_MS[timeframe[-1]]
+    except (KeyError, ValueError, IndexError):
+        raise ValueError(f"Unbekannter Timeframe: {timeframe}")
+
+
 def determine_htf(timeframe):
     """
     Bestimmt den nächsthöheren Zeitrahmen (mindestens 4x größer) 
@@ -9,13 +9,13 @@ from datetime import datetime
 import ccxt
 import numpy as np
 import pandas as pd
-import ta # NEU: Für ATR/ADX-Berechnung im Live-Betrieb
 from sklearn.preprocessing import StandardScaler # BLEIBT ZUR KOMPATIBILITÄT
 import math
 
-from titanbot.strategy.smc_engine import SMCEngine, Bias # NEU: Import SMC Engine
+from titanbot.strategy.smc_engine import SMCEngine, Bias, smc_columns # NEU: Import SMC Engine
 from titanbot.strategy.trade_logic import get_titan_signal
 from titanbot.utils.exchange import Exchange
+from titanbot.utils.indicators import IndicatorStream, load_stream, save_stream
 from titanbot.utils.telegram import send_message, send_photo
 
 # --------------------------------------------------------------------------- #
@@ -35,6 +35,33 @@ def _get_global_risk_per_trade_pct() -> float:
         return float(settings.get('risk_settings', {}).get('risk_per_trade_pct', 1.0))
     except Exception:
         return 1.0
+# --------------------------------------------------------------------------- #
+# Live-Indikatoren: Wilder-Zustand zwischen den Läufen fortschreiben
+# --------------------------------------------------------------------------- #
+def _live_indicator_columns(symbol, timeframe, recent_data, adx_period, volume_ma_period):
+    """
+    ATR/ADX/volume_ma für recent_data (letzte Zeile = laufende Kerze). Der Zustand
+    nach der letzten abgeschlossenen Kerze liegt in artifacts/db/indicators/; pro
+    Lauf werden nur die seitdem abgeschlossenen Kerzen fortgeschrieben. Passt der
+    Zustand nicht (erster Lauf, Lücke, andere Perioden), wird er aus recent_data
+    neu aufgebaut.
+    """
+    safe_name = f"{symbol.replace('/', '').replace(':', '')}_{timeframe}"
+    state_path = os.path.join(DB_PATH, 'indicators', f"{safe_name}.json")
+    stream = load_stream(state_path)
+    columns = None
+    if stream is not None and (stream.adx_period, stream.volume_ma_period) == (adx_period, volume_ma_period):
+        columns = stream.sync(recent_data)
+    if columns is None:
+        stream = IndicatorStream(recent_data.iloc[:-1], adx_period, volume_ma_period, history=len(recent_data))
+        columns = stream.sync(recent_data)
+    try:
+        save_stream(stream, state_path)
+    except OSError:
+        pass
+    return columns
+
+
 # --------------------------------------------------------------------------- #
 # Housekeeper – säubert verwaiste Orders/Positionen (Unverändert)
 # --------------------------------------------------------------------------- #
@@ -324,24 +351,14 @@ def check_and_open_new_position(exchange, model, scaler, params, telegram_config
             logger.warning("Nicht genügend OHLCV-Daten für SMC/Indikatoren – überspringe.")
             return
 
-        # --- ATR/ADX Indikatoren im Live-Bot berechnen (Unverändert) ---
+        # --- ATR/ADX/volume_ma im Live-Bot (inkrementell, siehe _live_indicator_columns) ---
         smc_params = params.get('strategy', {})
         adx_period = smc_params.get('adx_period', 14)
         volume_ma_period = smc_params.get('volume_ma_period', 20)
 
-        # ATR
-        atr_indicator = ta.volatility.AverageTrueRange(high=recent_data['high'], low=recent_data['low'], close=recent_data['close'], window=14)
-        recent_data['atr'] = atr_indicator.average_true_range()
+        for col, values in _live_indicator_columns(symbol, timeframe, recent_data, adx_period, volume_ma_period).items():
+            recent_data[col] = values
 
-        # ADX
-        adx_indicator = ta.trend.ADXIndicator(high=recent_data['high'], low=recent_data['low'], close=recent_data['close'], window=adx_period)
-        recent_data['adx'] = adx_indicator.adx()
-        recent_data['adx_pos'] = adx_indicator.adx_pos()
-        recent_data['adx_neg'] = adx_indicator.adx_neg()
-        
-        # Volume MA (NEU für Volume-Filter)
-        recent_data['volume_ma'] = recent_data['volume'].rolling(window=volume_ma_period).mean()
-        
         recent_data.dropna(subset=['atr', 'adx'], inplace=True) # Zeilen ohne Indikatoren entfernen
 
         # Verwende die letzte GESCHLOSSENE Kerze für Signal-Berechnung (iloc[-2]).
@@ -356,11 +373,8 @@ def check_and_open_new_position(exchange, model, scaler, params, telegram_config
         smc_results_full = engine.process_dataframe(recent_data[['open', 'high', 'low', 'close']].copy())
 
         # SMC-Spalten (P/D, Sweep-State) in recent_data übertragen
-        enriched_df = smc_results_full.get('enriched_df')
-        if enriched_df is not None:
-            for col in enriched_df.columns:
-                if col.startswith('smc_'):
-                    recent_data[col] = enriched_df[col].values
+        for col, values in smc_columns(smc_results_full).items():
+            recent_data[col] = values
 
         # Signal auf letzter GESCHLOSSENER Kerze prüfen ([-2]), nicht der laufenden ([-1])
         current_candle = recent_data.iloc[-2]
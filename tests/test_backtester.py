@@ -0,0 +1,130 @@
+# tests/test_backtester.py
+# Backtest mit Optimizer-Cache (Strukturindex + Signal-Tabelle) gegen den Einzel-Backtest
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.analysis.backtester import run_smc_backtest, run_smc_backtest_batch
+from titanbot.strategy.smc_engine import SMCEngine
+from titanbot.strategy.smc_index import SMCStructureIndex
+from test_smc_engine import make_df
+
+BASE_PARAMS = {'swingsLength': 20, 'ob_mitigation': 'High/Low', 'liquidity_lookback': 15, '_timeframe': '1h'}
+RISK_PARAMS = {'risk_reward_ratio': 2.0, 'risk_per_trade_pct': 1.0, 'min_leverage': 3, 'max_leverage': 20,
+               'atr_multiplier_sl': 1.5}
+TRIALS = [
+    {'use_adx_filter': True, 'adx_threshold': 20, 'use_mtf_filter': True, 'min_fvg_size_pct': 0.1,
+     'min_ob_quality': 0.3, 'max_ob_touches': 1},
+    {'use_adx_filter': False, 'use_mtf_filter': False, 'min_fvg_size_pct': 0.05, 'min_ob_quality': 0.1,
+     'max_ob_touches': 2, 'use_liquidity_sweep_filter': False},
+    {'use_pd_filter': False, 'use_liquidity_sweep_filter': False, 'use_volume_filter': True,
+     'volume_threshold_multiplier': 1.0, 'use_mtf_filter': True},
+]
+
+
+def _precompute(data, smc_params):
+    """Cache-Eintrag wie optimizer._get_smc_precomputed()."""
+    engine = SMCEngine(settings=smc_params)
+    smc_results = engine.process_dataframe(data, bar_state_format='arrays')
+    return {
+        'smc_results': smc_results,
+        'smc_structures': {
+            'order_blocks': engine.swingOrderBlocks + engine.internalOrderBlocks,
+            'fair_value_gaps': engine.fairValueGaps,
+            'events': engine.event_log,
+            'data_times': engine.times,
+        },
+        'structure_index': SMCStructureIndex(smc_results),
+    }
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = make_df(n=3000, seed=61, freq='1h')
+    # Indikatoren wie im Optimizer vorberechnen, damit alle Läufe dieselben Kerzen sehen
+    run_smc_backtest(df, dict(BASE_PARAMS), RISK_PARAMS)
+    return df
+
+
+def test_signal_table_backtest_matches_single_run(data):
+    precomputed = _precompute(data.copy(), BASE_PARAMS)
+    for trial in TRIALS:
+        params = {**BASE_PARAMS, **trial}
+        expected = run_smc_backtest(data.copy(), dict(params), RISK_PARAMS)
+        actual = run_smc_backtest(data.copy(), {**params, '_precomputed_smc': precomputed}, RISK_PARAMS)
+        assert expected['trades_count'] > 0
+        for key in ('total_pnl_pct', 'trades_count', 'win_rate', 'max_drawdown_pct', 'end_capital',
+                    'trades_list', 'equity_curve'):
+            assert actual[key] == expected[key], (trial, key)
+    # Eine Tabelle für alle Trials desselben Cache-Eintrags
+    assert len(precomputed['signal_tables']) == 1
+
+
+def test_checkpoints_report_progress_without_changing_result(data):
+    params = {**BASE_PARAMS, **TRIALS[1]}
+    expected = run_smc_backtest(data.copy(), dict(params), RISK_PARAMS)
+    seen = []
+    actual = run_smc_backtest(data.copy(), dict(params), RISK_PARAMS,
+                              checkpoint_bars=[750, 1500, 2250], on_checkpoint=lambda k, s: seen.append((k, s)))
+    assert actual['trades_list'] == expected['trades_list']
+    assert [k for k, _ in seen] == [0, 1, 2]
+    assert [s['bar'] for _, s in seen] == sorted(s['bar'] for _, s in seen)
+    assert all(s['bar'] >= bar for (_, s), bar in zip(seen, [750, 1500, 2250]))
+    trades = [s['trades_count'] for _, s in seen]
+    assert trades == sorted(trades) and trades[-1] <= expected['trades_count']
+    assert seen[-1][1]['max_drawdown_pct'] <= expected['max_drawdown_pct']
+
+
+def test_checkpoint_callback_aborts_backtest(data):
+    class Stop(Exception):
+        pass
+
+    def _stop(step, stats):
+        raise Stop()
+
+    with pytest.raises(Stop):
+        run_smc_backtest(data.copy(), dict(BASE_PARAMS), RISK_PARAMS, checkpoint_bars=[100], on_checkpoint=_stop)
+
+
+def _risk_variants(n):
+    rng = np.random.default_rng(5)
+    return [{**RISK_PARAMS, 'risk_reward_ratio': rng.uniform(0.3, 4.0), 'atr_multiplier_sl': rng.uniform(0.2, 3.0),
+             'min_sl_pct': 0.05, 'structure_sl_buffer_pct': 0.0,
+             'risk_per_trade_pct': float(rng.choice([1.0, 10.0, 40.0]))} for _ in range(n)]
+
+
+def _fine_candles(data, seed=9):
+    """15m-Kerzen innerhalb der Stundenkerzen (für die SL/TP-Reihenfolge)."""
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(data.index[0], data.index[-1] + pd.Timedelta('45min'), freq='15min')
+    hours = np.repeat(np.arange(len(data)), 4)[:len(idx)]
+    span = (data['high'].to_numpy() - data['low'].to_numpy())[hours]
+    low = data['low'].to_numpy()[hours] + span * rng.uniform(0, 0.5, len(idx))
+    return pd.DataFrame({'high': low + span * rng.uniform(0, 0.5, len(idx)), 'low': low}, index=idx)
+
+
+@pytest.mark.parametrize('with_fine', [False, True])
+def test_risk_batch_matches_single_runs(data, with_fine):
+    params = {**BASE_PARAMS, **TRIALS[1]}
+    variants = _risk_variants(6)
+    fine = _fine_candles(data) if with_fine else None
+    checkpoints = [750, 1500, 2250]
+    batch = run_smc_backtest_batch(data.copy(), {**params, '_precomputed_smc': _precompute(data.copy(), params)},
+                                   variants, fine_data=fine, checkpoint_bars=checkpoints)
+    assert len(batch) == len(variants)
+    for risk, result in zip(variants, batch):
+        seen = []
+        expected = run_smc_backtest(data.copy(), dict(params), risk, fine_data=fine,
+                                    checkpoint_bars=checkpoints, on_checkpoint=lambda k, s: seen.append(s))
+        assert expected['trades_count'] > 0
+        for key in ('total_pnl_pct', 'trades_count', 'win_rate', 'max_drawdown_pct', 'end_capital'):
+            assert result[key] == expected[key], (risk, key)
+        assert result['checkpoints'] == seen
+    assert len({r['total_pnl_pct'] for r in batch}) > 1
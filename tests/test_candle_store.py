@@ -0,0 +1,159 @@
+# tests/test_candle_store.py
+# Monatspartitionierter Kerzen-Cache für load_data()
+import os
+import sys
+
+import ccxt
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.analysis import backtester
+from titanbot.utils.candle_store import CandleStore
+from titanbot.utils.exchange import Exchange
+from test_smc_engine import make_df
+
+SYMBOL, TF = 'BTC/USDT:USDT', '30m'
+
+
+@pytest.fixture
+def history():
+    df = make_df(n=4000, seed=21, freq='30min')  # 2025-01-01 .. 2025-03-25
+    df.index.name = 'timestamp'
+    return df
+
+
+def _is_mapped(arr) -> bool:
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = arr.base
+    return False
+
+
+def test_roundtrip_and_month_partitions(history, tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write(SYMBOL, TF, history.iloc[::-1])
+
+    manifest = store.manifest(SYMBOL, TF)
+    assert sorted(manifest['months']) == ['2025-01', '2025-02', '2025-03']
+    assert sum(n for _, _, n in manifest['months'].values()) == len(history)
+    assert store.span(SYMBOL, TF) == (history.index[0], history.index[-1])
+    pd.testing.assert_frame_equal(store.read(SYMBOL, TF), history, check_freq=False)
+
+
+def test_range_reads(history, tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write(SYMBOL, TF, history)
+
+    # Innerhalb eines Monats: View auf die gemappten Seiten
+    start, end = pd.Timestamp('2025-02-03', tz='UTC'), pd.Timestamp('2025-02-17', tz='UTC')
+    window = store.read(SYMBOL, TF, start, end)
+    pd.testing.assert_frame_equal(window, history.loc[start:end], check_freq=False)
+    assert _is_mapped(window['close'].to_numpy())
+
+    # Über die Monatsgrenze, naive Grenzen gelten als UTC
+    window = store.read(SYMBOL, TF, '2025-01-25', '2025-02-08 12:00')
+    pd.testing.assert_frame_equal(window, history.loc['2025-01-25':'2025-02-08 12:00'], check_freq=False)
+
+    assert store.read(SYMBOL, TF, '2026-01-01', '2026-02-01').empty
+    assert store.read('ETH/USDT:USDT', TF).empty
+
+
+def test_rewrite_drops_stale_months(history, tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.write(SYMBOL, TF, history)
+    store.write(SYMBOL, TF, history.loc['2025-02-10':])
+
+    files = os.listdir(tmp_path / 'BTC-USDT-USDT_30m')
+    assert not any(name.startswith('2025-01') for name in files)
+    pd.testing.assert_frame_equal(store.read(SYMBOL, TF), history.loc['2025-02-10':], check_freq=False)
+
+
+def test_load_data_migrates_csv_cache(history, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'data' / 'cache'
+    cache_dir.mkdir(parents=True)
+    csv_path = cache_dir / 'BTC-USDT-USDT_30m.csv'
+    history.to_csv(csv_path)
+    start, end = pd.to_datetime('2025-01-10', utc=True), pd.to_datetime('2025-03-01', utc=True)
+    expected = pd.read_csv(csv_path, index_col='timestamp', parse_dates=True).loc[start:end]
+    monkeypatch.setattr(backtester, 'PROJECT_ROOT', str(tmp_path))
+
+    data = backtester.load_data(SYMBOL, TF, '2025-01-10', '2025-03-01')
+
+    assert not csv_path.exists()
+    pd.testing.assert_frame_equal(data, expected, check_freq=False)
+    pd.testing.assert_frame_equal(backtester.load_data(SYMBOL, TF, '2025-01-10', '2025-03-01'), expected,
+                                  check_freq=False)
+
+
+class FakeCcxt:
+    """Stand-in für ccxt.bitget: fetch_ohlcv aus einem DataFrame, protokolliert die Abfragen."""
+
+    def __init__(self, market: pd.DataFrame):
+        self.rows = [[ts // 1_000_000, *values] for ts, values in zip(market.index.asi8, market.to_numpy().tolist())]
+        self.calls = []
+
+    @staticmethod
+    def parse_timeframe(timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=200):
+        self.calls.append(since)
+        return [row for row in self.rows if row[0] >= since][:limit]
+
+
+@pytest.fixture
+def exchange(history, tmp_path, monkeypatch):
+    # Börsenseitige Lücke: am 2025-02-05 fehlen 6 Stunden
+    market = history.drop(history.loc['2025-02-05 06:00':'2025-02-05 11:30'].index)
+    ex = Exchange.__new__(Exchange)
+    ex.exchange, ex.markets = FakeCcxt(market), {SYMBOL: {}}
+    monkeypatch.setattr(backtester, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(backtester, 'secrets_cache', {'titanbot': [{}]})
+    monkeypatch.setattr(backtester, 'Exchange', lambda api_setup: ex)
+    ex.market = market
+    return ex
+
+
+def _expected(market, start, end):
+    return market.loc[pd.to_datetime(start, utc=True):pd.to_datetime(end, utc=True)].astype(np.float64)
+
+
+def test_load_data_tops_up_only_missing_ranges(exchange):
+    fake, market = exchange.exchange, exchange.market
+    data = backtester.load_data(SYMBOL, TF, '2025-01-20', '2025-02-10')
+    pd.testing.assert_frame_equal(data, _expected(market, '2025-01-20', '2025-02-10'), check_freq=False)
+
+    # Erweitern: nur Anfang und Ende werden geladen, die börsenseitige Lücke nicht erneut
+    fake.calls.clear()
+    data = backtester.load_data(SYMBOL, TF, '2025-01-10', '2025-02-20')
+    pd.testing.assert_frame_equal(data, _expected(market, '2025-01-10', '2025-02-20'), check_freq=False)
+    since = pd.to_datetime(fake.calls, unit='ms', utc=True)
+    assert since.min() == pd.Timestamp('2025-01-10', tz='UTC')
+    assert not ((since > pd.Timestamp('2025-01-20', tz='UTC')) & (since < pd.Timestamp('2025-02-10', tz='UTC'))).any()
+
+    # Vollständig im Cache → keine Abfrage
+    fake.calls.clear()
+    backtester.load_data(SYMBOL, TF, '2025-01-15', '2025-02-15')
+    assert fake.calls == []
+
+
+def test_load_data_fills_internal_gap_and_replaces_running_candle(exchange, tmp_path):
+    fake, market = exchange.exchange, exchange.market
+    store = CandleStore(str(tmp_path / 'data' / 'cache' / 'candles'))
+    cached = market.loc[:'2025-03-01'].drop(market.loc['2025-01-12':'2025-01-14'].index).copy()
+    cached.iloc[-1, cached.columns.get_loc('close')] += 5.0  # beim Speichern noch laufende Kerze
+    store.write(SYMBOL, TF, cached)
+
+    data = backtester.load_data(SYMBOL, TF, '2025-01-05', '2025-03-03')
+
+    pd.testing.assert_frame_equal(data, _expected(market, '2025-01-05', '2025-03-03'), check_freq=False)
+    since = pd.to_datetime(fake.calls, unit='ms', utc=True)
+    assert since.min() >= pd.Timestamp('2025-01-12', tz='UTC')
+    assert len(fake.calls) == 3  # Lücke im Januar, börsenseitige Lücke im Februar, Ende
+    assert sorted(store.manifest(SYMBOL, TF)['months']) == ['2025-01', '2025-02', '2025-03']
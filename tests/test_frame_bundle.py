@@ -0,0 +1,54 @@
+# tests/test_frame_bundle.py
+# Memory-mapped DataFrame-Bundle für Worker-Prozesse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.analysis.backtester import run_smc_backtest
+from titanbot.utils.frame_bundle import publish_frame, attach_frame
+from test_backtester import BASE_PARAMS, RISK_PARAMS, TRIALS, _precompute
+from test_smc_engine import make_df
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = make_df(n=2000, seed=17, freq='1h')
+    run_smc_backtest(df, dict(BASE_PARAMS), RISK_PARAMS)
+    return df
+
+
+def test_roundtrip_is_read_only_view(data, tmp_path):
+    handle = publish_frame(data, str(tmp_path / 'bundle'))
+    attached = attach_frame(handle)
+
+    pd.testing.assert_frame_equal(attached, data.astype(np.float64), check_freq=False)
+    assert not attached['close'].to_numpy().flags.writeable
+    with pytest.raises(ValueError):
+        attached['close'].to_numpy()[0] = 0.0
+
+
+def test_publish_rejects_non_numeric(data, tmp_path):
+    df = data.copy()
+    df['label'] = 'x'
+    with pytest.raises(ValueError):
+        publish_frame(df, str(tmp_path / 'bundle'))
+
+
+def test_backtest_on_attached_frame(data, tmp_path):
+    attached = attach_frame(publish_frame(data, str(tmp_path / 'bundle')))
+    precomputed = _precompute(attached, BASE_PARAMS)
+    for trial in TRIALS:
+        params = {**BASE_PARAMS, **trial, '_precomputed_smc': precomputed}
+        expected = run_smc_backtest(data.copy(), dict(params), RISK_PARAMS)
+        actual = run_smc_backtest(attached, dict(params), RISK_PARAMS)
+        assert actual['trades_list'] == expected['trades_list']
+        assert actual['equity_curve'] == expected['equity_curve']
+    # Der Backtest schreibt nichts in die geteilten Daten
+    assert list(attached.columns) == list(data.columns)
@@ -0,0 +1,105 @@
+# tests/test_indicators.py
+# NumPy-Indikatoren: Parität mit ta, Cache und inkrementeller Live-Zustand
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import ta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.utils import indicators
+from titanbot.utils.indicators import IndicatorStream, compute_indicators, load_stream, save_stream
+from titanbot.utils.jit import py_func
+from test_smc_engine import make_df
+
+
+@pytest.mark.parametrize('n,window', [(28, 14), (300, 14), (3000, 14), (500, 7), (500, 20)])
+def test_matches_ta(n, window):
+    df = make_df(n=n, seed=n + window, freq='1h')
+    ref_atr = ta.volatility.AverageTrueRange(df['high'], df['low'], df['close'], window=14).average_true_range()
+    ref_adx = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=window)
+
+    values = compute_indicators(df, adx_period=window, volume_ma_period=20)
+
+    assert np.array_equal(values['atr'], ref_atr.to_numpy())
+    assert np.array_equal(values['adx'], ref_adx.adx().to_numpy())
+    assert np.array_equal(values['adx_pos'], ref_adx.adx_pos().to_numpy())
+    assert np.array_equal(values['adx_neg'], ref_adx.adx_neg().to_numpy())
+    np.testing.assert_array_equal(values['volume_ma'], df['volume'].rolling(window=20).mean().to_numpy())
+
+
+def test_python_kernels_match_jit():
+    df = make_df(n=1000, seed=3, freq='1h')
+    h, l, c = (df[col].to_numpy() for col in ('high', 'low', 'close'))
+    tr = np.abs(np.diff(c, prepend=c[0])) + (h - l)
+    assert np.array_equal(py_func(indicators._wilder_atr)(tr, 1.5, 14), indicators._wilder_atr(tr, 1.5, 14))
+    dx = np.abs(np.sin(np.arange(len(c)))) * 100
+    assert np.array_equal(py_func(indicators._wilder_adx)(dx, 20.0, 14), indicators._wilder_adx(dx, 20.0, 14))
+
+
+def test_too_short_raises():
+    df = make_df(n=27, seed=1, freq='1h')
+    with pytest.raises(ValueError):
+        compute_indicators(df, adx_period=14)
+
+
+def test_cache_returns_independent_copies():
+    indicators.clear_cache()
+    df = make_df(n=400, seed=5, freq='1h')
+    first = compute_indicators(df)
+    first['atr'][:] = 0.0
+    second = compute_indicators(df)
+
+    assert len(indicators._cache) == 3
+    assert second['atr'][-1] != 0.0
+
+    df.loc[df.index[-1], 'high'] += 1.0
+    third = compute_indicators(df, columns=('atr',))
+    assert list(third) == ['atr'] and third['atr'][-1] != second['atr'][-1]
+
+
+def test_stream_append_continues_full_computation():
+    df = make_df(n=600, seed=11, freq='1h')
+    full = compute_indicators(df, adx_period=10, volume_ma_period=20)
+
+    stream = IndicatorStream(df.iloc[:400], adx_period=10, volume_ma_period=20)
+    for i in range(400, 599):
+        row = df.iloc[i]
+        stream.append(df.index[i].value, row['high'], row['low'], row['close'], row['volume'])
+    last = df.iloc[599]
+    running = stream.peek(last['high'], last['low'], last['close'], last['volume'])
+
+    for col in ('atr', 'adx', 'adx_pos', 'adx_neg'):
+        assert stream.values[col][-1] == full[col][598]
+        assert running[col] == full[col][599]
+    assert running['volume_ma'] == pytest.approx(full['volume_ma'][599], rel=1e-12)
+
+
+def test_stream_sync_persists_between_runs(tmp_path):
+    df = make_df(n=400, seed=13, freq='1h')
+    path = str(tmp_path / 'state.json')
+    full = compute_indicators(df)
+
+    stream = IndicatorStream(df.iloc[:299], history=300)
+    first = stream.sync(df.iloc[:300])
+    save_stream(stream, path)
+
+    # Nächster Lauf: Fenster um 5 Kerzen weiter
+    restored = load_stream(path)
+    second = restored.sync(df.iloc[5:305])
+
+    assert np.array_equal(first['adx'], full['adx'][:300])
+    assert restored.last_time == df.index[303].value
+    assert np.array_equal(second['atr'], full['atr'][5:305])
+    assert np.array_equal(second['adx'], full['adx'][5:305])
+
+    # Lücke / geänderte Kerze → neu aufbauen
+    assert restored.sync(df.iloc[350:400]) is None
+    changed = df.iloc[5:306].copy()
+    changed.loc[changed.index[-3], 'close'] += 1.0
+    assert restored.sync(changed) is None
@@ -0,0 +1,70 @@
+# tests/test_jit.py
+# Numba-Backend: kompilierte Kernels müssen bitgleich zur Python-Referenz rechnen.
+# Ohne numba laufen dieselben Tests gegen die Python-Fassung der Kernels.
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+import titanbot.analysis.backtester as backtester
+from titanbot.strategy.smc_engine import SMCEngine, _fvg_lifecycle
+from titanbot.utils.jit import py_func
+from test_smc_engine import ReferenceSMCEngine, make_df, _config_strategy_params, _assert_same_results
+from test_backtester import BASE_PARAMS, RISK_PARAMS, TRIALS
+
+
+@pytest.mark.parametrize('strategy', _config_strategy_params())
+def test_precomputed_fvgs_match_reference(strategy):
+    """FVG-Lifecycle-Kernel: identische Events und Strukturen wie der Per-Bar-Pfad."""
+    ohlc = make_df(n=1500, seed=71)[['open', 'high', 'low', 'close']]
+    expected = ReferenceSMCEngine(settings=strategy).process_dataframe(ohlc.copy())
+    actual = SMCEngine(settings={**strategy, 'precompute_fvgs': True}).process_dataframe(ohlc.copy())
+    assert any(event['type'].endswith('FVG') for event in actual['events'])
+    _assert_same_results(expected, actual)
+
+
+def test_fvg_lifecycle_kernel_matches_python():
+    df = make_df(n=3000, seed=72)
+    args = [df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close')] + [0.0]
+    for compiled, reference in zip(_fvg_lifecycle(*args), py_func(_fvg_lifecycle)(*args)):
+        np.testing.assert_array_equal(compiled, reference)
+
+
+def test_scan_position_kernel_matches_python():
+    df = make_df(n=2000, seed=73)
+    highs, lows, closes = (df[col].to_numpy(dtype=np.float64) for col in ('high', 'low', 'close'))
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        start = int(rng.integers(1, len(closes) - 1))
+        entry = closes[start - 1]
+        is_long = bool(rng.integers(2))
+        dist = entry * rng.uniform(0.002, 0.05)
+        sl, tp = (entry - dist, entry + 2 * dist) if is_long else (entry + dist, entry - 2 * dist)
+        notional = float(rng.uniform(10, 50000))
+        eq_jit, eq_py = np.zeros(len(closes)), np.zeros(len(closes))
+        args = (start, is_long, entry, notional, 1000.0, sl, tp, 1200.0, 0.1)
+        res_jit = backtester._scan_position(highs, lows, closes, *args, eq_jit)
+        res_py = py_func(backtester._scan_position)(highs, lows, closes, *args, eq_py)
+        assert res_jit == res_py
+        np.testing.assert_array_equal(eq_jit, eq_py)
+
+
+def test_backtest_jit_matches_python(monkeypatch):
+    """run_smc_backtest: JIT-Pfad (Arrays) und Python-Pfad (Listen) liefern dieselben Trades."""
+    data = make_df(n=3000, seed=74, freq='1h')
+    for trial in TRIALS:
+        params = {**BASE_PARAMS, **trial}
+        jit_result = backtester.run_smc_backtest(data.copy(), dict(params), RISK_PARAMS)
+        with monkeypatch.context() as m:
+            m.setattr(backtester, 'JIT_ENABLED', False)
+            m.setattr(backtester, '_scan_position', py_func(backtester._scan_position))
+            py_result = backtester.run_smc_backtest(data.copy(), dict(params), RISK_PARAMS)
+        assert jit_result['trades_count'] > 0
+        for key in ('total_pnl_pct', 'trades_count', 'win_rate', 'max_drawdown_pct', 'end_capital',
+                    'trades_list', 'equity_curve'):
+            assert jit_result[key] == py_result[key], (trial, key)
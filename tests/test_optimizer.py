@@ -0,0 +1,136 @@
+# tests/test_optimizer.py
+# Prozess-Modus des Optimizers: mehrere Worker auf einer gemeinsamen SQLite-Study
+import glob
+import json
+import os
+import sys
+
+import optuna
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.analysis import optimizer
+from test_smc_engine import make_df
+
+
+@pytest.fixture
+def task_globals(monkeypatch):
+    df = make_df(n=1200, seed=7, freq='1h')
+    split = int(len(df) * 0.70)
+    for key, value in {
+        'TRAIN_DATA': df.iloc[:split].copy(), 'TEST_DATA': df.iloc[split:].copy(), 'TRAIN_SPLIT_IDX': split,
+        'FINE_DATA': None, 'CURRENT_SYMBOL': 'TEST/USDT:USDT', 'CURRENT_TIMEFRAME': '1h',
+        'MAX_DRAWDOWN_CONSTRAINT': 1.0, 'MIN_TRADES_PER_YEAR': 1, 'OPTIM_MODE': 'best_profit',
+    }.items():
+        monkeypatch.setattr(optimizer, key, value)
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'journal'])
+def test_worker_processes_share_study(task_globals, tmp_path, backend):
+    storage_spec = optimizer._storage_spec(backend, str(tmp_path))
+    study = optuna.create_study(storage=optimizer._make_storage(storage_spec), study_name='smc_test', direction='maximize')
+    reporter = optimizer._ProgressReporter('TEST/USDT:USDT', '1h', 6, str(tmp_path / 'progress.log'),
+                                           str(tmp_path / 'status.json'), 0.0)
+
+    optimizer._run_worker_processes(2, storage_spec, 'smc_test', 6, reporter, poll_interval=0.5)
+
+    finished = [t for t in study.trials if t.state != optuna.trial.TrialState.RUNNING]
+    assert 6 <= len(finished) <= 7
+    assert all(t.state != optuna.trial.TrialState.FAIL for t in finished)
+    with open(tmp_path / 'status.json', encoding='utf-8') as f:
+        status = json.load(f)
+    assert status['trials_done'] == 6 and status['trials_total'] == 6
+    complete = [t for t in finished if t.state == optuna.trial.TrialState.COMPLETE]
+    if complete:
+        best = max(complete, key=lambda t: t.value)
+        assert status['best_trial_no'] == best.number and status['best_value'] == round(best.value, 4)
+    with open(tmp_path / 'progress.log', encoding='utf-8') as f:
+        assert 'trials=6/6' in f.read()
+
+
+def test_progress_reporter_tracks_best_incrementally(tmp_path):
+    complete, pruned = optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED
+    reporter = optimizer._ProgressReporter('TEST/USDT:USDT', '1h', 10, str(tmp_path / 'progress.log'),
+                                           str(tmp_path / 'status.json'), 0.0, prior_best=(1.5, 3, 4.0))
+    reporter.poll([(10, complete, 1.0, 9.0), (11, pruned, None, None)])
+    reporter.poll([])  # keine neuen Trials → kein Bericht nötig
+    reporter.poll([(12, complete, 2.5, 2.0)])
+
+    with open(tmp_path / 'status.json', encoding='utf-8') as f:
+        status = json.load(f)
+    assert status['trials_done'] == 3
+    assert (status['best_value'], status['best_trial_no'], status['best_test_pnl']) == (2.5, 12, 2.0)
+    assert reporter._max_test_pnl == 9.0
+
+
+def test_warm_start_from_saved_config(task_globals, tmp_path):
+    config_path = sorted(glob.glob(os.path.join(PROJECT_ROOT, 'src', 'titanbot', 'strategy', 'configs', 'config_*.json')))[0]
+    params = optimizer._saved_config_params(config_path)
+    assert set(params) <= set(optimizer._STRATEGY_SEARCH_KEYS + optimizer._RISK_SEARCH_KEYS)
+    assert 'swingsLength' in params and 'risk_reward_ratio' in params
+    assert optimizer._saved_config_params(str(tmp_path / 'missing.json')) == {}
+
+    study = optuna.create_study(direction='maximize', pruner=optimizer._make_pruner('hyperband', 4))
+    study.enqueue_trial(params, skip_if_exists=True)
+    study.optimize(optimizer.objective, n_trials=1)
+    trial = study.trials[0]
+    for key, value in params.items():
+        assert trial.params[key] == value, key
+
+
+def _pair_context(symbol, n, seed):
+    df = make_df(n=n, seed=seed, freq='1h')
+    split = int(len(df) * 0.70)
+    return optimizer.PairContext(symbol, '1h', df, df.iloc[:split].copy(), df.iloc[split:].copy(), split,
+                                 study_name=f"smc_{symbol.split('/')[0]}")
+
+
+def test_schedule_longest_first_and_worker_split():
+    short, long_, mid = _pair_context('A/USDT:USDT', 300, 1), _pair_context('B/USDT:USDT', 900, 2), _pair_context('C/USDT:USDT', 600, 3)
+    assert [ctx.symbol for ctx in optimizer._schedule_order([short, long_, mid])] == ['B/USDT:USDT', 'C/USDT:USDT', 'A/USDT:USDT']
+    assert optimizer._workers_for_next_pair(8, 3, 100) == 3   # 8 Kerne / 3 Paare → das längste bekommt den Rest
+    assert optimizer._workers_for_next_pair(2, 5, 100) == 1
+    assert optimizer._workers_for_next_pair(8, 1, 4) == 4     # nie mehr Worker als Trials
+
+
+def test_pair_scheduler_runs_pairs_concurrently(task_globals, tmp_path):
+    contexts = [_pair_context('A/USDT:USDT', 800, 1), _pair_context('B/USDT:USDT', 1200, 2)]
+    storage_url = f"sqlite:///{tmp_path / 'study.db'}?timeout=60"
+    status_file = str(tmp_path / 'status.json')
+
+    results = list(optimizer._run_pairs(contexts, storage_url, 3, 2, warm_start=False,
+                                        progress_log=str(tmp_path / 'progress.log'),
+                                        status_file=status_file, poll_interval=0.5))
+
+    assert sorted(ctx.symbol for ctx, _, _ in results) == ['A/USDT:USDT', 'B/USDT:USDT']
+    for ctx, study, error in results:
+        assert error is None
+        assert study.study_name == ctx.study_name
+        assert len([t for t in study.trials if t.state.is_finished()]) >= 3
+    with open(status_file, encoding='utf-8') as f:
+        status = json.load(f)
+    assert set(status['pairs']) == {'A/USDT:USDT (1h)', 'B/USDT:USDT (1h)'}
+    assert all(p['trials_done'] == 3 for p in status['pairs'].values())
+
+
+def test_risk_batch_ask_tell_matches_objective(task_globals):
+    study = optuna.create_study(direction='maximize', sampler=optuna.samplers.RandomSampler(seed=3),
+                                pruner=optimizer._make_pruner('none', 4))
+    optimizer._optimize_batched(study, 6, 3)
+
+    assert len(study.trials) == 6 and all(t.state.is_finished() for t in study.trials)
+    for batch in (study.trials[:3], study.trials[3:]):
+        strategy = [{k: t.params[k] for k in optimizer._STRATEGY_SEARCH_KEYS} for t in batch]
+        assert strategy[1:] == strategy[:-1]
+        assert len({t.params['risk_reward_ratio'] for t in batch}) == 3
+
+    # Gleiches Ergebnis wie objective() je Trial
+    single = optuna.create_study(direction='maximize', pruner=optimizer._make_pruner('none', 4))
+    for trial in study.trials:
+        single.enqueue_trial(trial.params)
+    single.optimize(optimizer.objective, n_trials=len(study.trials))
+    for batched, ref in zip(study.trials, single.trials):
+        assert (batched.state, batched.value, batched.user_attrs) == (ref.state, ref.value, ref.user_attrs)
@@ -0,0 +1,210 @@
+# tests/test_portfolio_streams.py
+# Vorberechnete Strategie-Streams + Kombinierer: Parität mit run_portfolio_simulation
+import contextlib
+import glob
+import io
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.analysis import portfolio_optimizer
+from titanbot.analysis.portfolio_simulator import run_portfolio_simulation
+from titanbot.analysis.portfolio_streams import build_strategy_streams, _combine
+from titanbot.strategy.smc_engine import Bias
+from titanbot.utils.jit import py_func
+from test_smc_engine import make_df
+
+SUMMARY_KEYS = ('end_capital', 'total_pnl_pct', 'trade_count', 'win_rate', 'max_drawdown_pct',
+                'max_drawdown_date', 'min_equity', 'liquidation_date')
+
+
+def _strategies(seeds=(41, 44, 49, 69, 75)):
+    configs = sorted(glob.glob(os.path.join(PROJECT_ROOT, 'src', 'titanbot', 'strategy', 'configs', '*.json')))
+    strategies = {}
+    for i, seed in enumerate(seeds):
+        with open(configs[seed % len(configs)]) as f:
+            config = json.load(f)
+        risk = dict(config['risk'], risk_per_trade_pct=[1.0, 4.0, 2.0][i % 3])
+        strategies[f'config_S{i}USDTUSDT_1h.json'] = {
+            'symbol': f'S{i}/USDT:USDT', 'timeframe': '1h', 'htf': '4h',
+            'market_bias': [Bias.NEUTRAL, Bias.BULLISH, Bias.BEARISH][i % 3],
+            'data': make_df(n=1000 + 200 * (i % 2), seed=seed, freq=['1h', '50min'][i % 2]),
+            'smc_params': dict(config['strategy']), 'risk_params': risk,
+        }
+    strategies['config_S1USDTUSDT_1h.json']['fine_data'] = make_df(n=15000, seed=99, freq='5min')
+    return strategies
+
+
+def _silent(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return func(*args)
+
+
+@pytest.fixture(scope='module')
+def strategies():
+    return _strategies()
+
+
+@pytest.fixture(scope='module')
+def streams(strategies):
+    return _silent(build_strategy_streams, strategies, None, None)
+
+
+def test_combinations_match_full_simulation(strategies, streams):
+    keys = list(strategies)
+    combos = [keys[:1], keys[1:2], keys[:3], keys[::-1], [keys[4], keys[0], keys[2]]]
+    for combo in combos:
+        reference = _silent(run_portfolio_simulation, 1000, {k: strategies[k] for k in combo}, None, None)
+        summary = streams.simulate(combo, 1000)
+        assert {k: summary[k] for k in SUMMARY_KEYS} == {k: reference[k] for k in SUMMARY_KEYS}, combo
+
+
+def test_python_kernel_matches_jit(streams):
+    members = np.array([0, 2, 3], dtype=np.int64)
+    lane_members = np.array([[0, 1, 2], [2, 0, 0]], dtype=np.int64)
+    lane_size = np.array([3, 1], dtype=np.int64)
+    lane_risk = np.array([streams.risk_pct[members], [0.03] * 3])
+    args = (members, lane_members, lane_size, lane_risk, streams.offsets, streams.times, streams.close,
+            streams.signal, streams.is_long, streams.entry, streams.sl_pct, streams.exit_bar, streams.exit_price,
+            streams.min_leverage, streams.max_leverage, 1000.0, 0.0005, 5.0, 1e6, np.inf)
+    jit_pnl, py_pnl = np.zeros((2, len(streams.entry) + 1)), np.zeros((2, len(streams.entry) + 1))
+    result = _combine(*args, jit_pnl)
+    expected = py_func(_combine)(*args, py_pnl)
+    assert all(np.array_equal(a, b) for a, b in zip(result, expected))
+    assert result[-1].min() > 0 and np.array_equal(jit_pnl, py_pnl)
+
+
+def test_lanes_match_single_simulations(strategies, streams):
+    keys = list(strategies)
+    lanes = [keys[:3], keys[::-1], [keys[1]], keys[2:], ['missing.json']]
+    risks = [None, 2.5, 1.0, 4.0, 3.0]
+    results = streams.simulate_lanes(lanes, 1000, risks)
+    for keys_r, risk, result in zip(lanes, risks, results):
+        assert result == streams.simulate(keys_r, 1000, risk_pct=risk)
+    assert results[-1] is None
+
+    # Risiko-Override entspricht geänderten risk_params in der vollen Simulation
+    sd_risk = {k: dict(strategies[k], risk_params=dict(strategies[k]['risk_params'], risk_per_trade_pct=2.5))
+               for k in lanes[1]}
+    reference = _silent(run_portfolio_simulation, 1000, sd_risk, None, None)
+    assert {k: results[1][k] for k in SUMMARY_KEYS} == {k: reference[k] for k in SUMMARY_KEYS}
+
+    # Abbruch einer Lane beendet die anderen nicht
+    calm, risky = streams.simulate_lanes([keys[:3], keys[:3]], 1000, [1.0, 5.0])
+    assert calm['max_drawdown_pct'] < risky['max_drawdown_pct']
+    limit = (calm['max_drawdown_pct'] + risky['max_drawdown_pct']) / 200.0
+    mixed = streams.simulate_lanes([keys[:3], keys[:3]], 1000, [1.0, 5.0], abort_drawdown=limit)
+    assert mixed[0] == calm and mixed[1]['aborted']
+
+
+def test_unknown_keys_are_ignored(streams, strategies):
+    key = list(strategies)[0]
+    assert streams.simulate(['missing.json'], 1000) is None
+    assert streams.simulate([key, 'missing.json'], 1000) == streams.simulate([key], 1000)
+
+
+def test_optimizer_finds_exhaustive_optimum(strategies, monkeypatch, tmp_path):
+    monkeypatch.setattr(portfolio_optimizer, 'PROJECT_ROOT', str(tmp_path))
+    result = _silent(portfolio_optimizer.run_portfolio_optimizer, 1000, strategies, None, None, 60.0)
+
+    def simulate(combo):
+        return _silent(run_portfolio_simulation, 1000, {k: strategies[k] for k in combo}, None, None)
+
+    def admissible(res):
+        return res and not res['liquidation_date'] and res['max_drawdown_pct'] <= 60.0
+
+    candidates = [k for k in strategies if admissible(simulate([k])) and simulate([k])['end_capital'] > 1000]
+    best_capital, best_files = -1, None
+    for size in range(1, len(candidates) + 1):
+        for combo in itertools.combinations(candidates, size):
+            res = simulate(combo)
+            if admissible(res) and res['end_capital'] > best_capital:
+                best_capital, best_files = res['end_capital'], list(combo)
+
+    assert set(result['optimal_portfolio']) == set(best_files)
+    assert result['final_result']['end_capital'] == pytest.approx(best_capital, rel=1e-9)
+    assert len(result['final_result']['trade_history']) == result['final_result']['trade_count']
+
+
+def test_abort_drawdown_only_stops_rejected_combinations(strategies, streams):
+    keys = list(strategies)
+    for combo in (keys, keys[:2], keys[2:]):
+        full = streams.simulate(combo, 1000)
+        limit = full['max_drawdown_pct'] / 100.0
+        assert streams.simulate(combo, 1000, abort_drawdown=limit) == full
+        aborted = streams.simulate(combo, 1000, abort_drawdown=limit * 0.5)
+        assert aborted['aborted'] and aborted['max_drawdown_pct'] / 100.0 > limit * 0.5
+
+
+def test_collision_free_subsets_match_filtered_combinations():
+    coins = ['BTC', 'ETH', 'BTC', 'SOL', 'ETH', 'XRP']
+    expected = [sum(1 << i for i in combo)
+                for size in range(1, len(coins) + 1)
+                for combo in itertools.combinations(range(len(coins)), size)
+                if len({coins[i] for i in combo}) == size]
+    found = [mask for size in range(1, len(coins) + 1)
+             for mask in portfolio_optimizer._collision_free_subsets(coins, size)]
+    assert found == expected
+    assert portfolio_optimizer._count_collision_free(coins) == len(expected)
+
+
+def test_greedy_reuses_subset_results(strategies, streams, monkeypatch, tmp_path):
+    caches = []
+
+    class RecordingCache(portfolio_optimizer._SubsetCache):
+        def __init__(self, *args):
+            super().__init__(*args)
+            caches.append(self)
+
+    monkeypatch.setattr(portfolio_optimizer, '_SubsetCache', RecordingCache)
+    monkeypatch.setattr(portfolio_optimizer, 'EXHAUSTIVE_MAX_COMBOS', 0)
+    monkeypatch.setattr(portfolio_optimizer, 'PROJECT_ROOT', str(tmp_path))
+    result = _silent(portfolio_optimizer.run_portfolio_optimizer, 1000, strategies, None, None, 60.0)
+
+    cache = caches[0]
+    best = result['optimal_portfolio']
+    assert cache.hits > 0  # Startpunkte und gleiche Teams aus verschiedenen Richtungen
+    assert best == cache.files_of(cache.mask(best))  # Kandidaten-Reihenfolge
+    assert result['final_result']['end_capital'] == streams.simulate(best, 1000)['end_capital']
+
+
+@pytest.mark.parametrize('max_combos', [portfolio_optimizer.EXHAUSTIVE_MAX_COMBOS, 0])
+def test_process_pool_matches_serial_search(strategies, monkeypatch, tmp_path, max_combos):
+    monkeypatch.setattr(portfolio_optimizer, 'EXHAUSTIVE_MAX_COMBOS', max_combos)
+    monkeypatch.setattr(portfolio_optimizer, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(portfolio_optimizer, 'EVAL_BATCH', 4)  # mehrere Aufträge je Größe
+    serial = _silent(portfolio_optimizer.run_portfolio_optimizer, 1000, strategies, None, None, 60.0)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        pooled = portfolio_optimizer.run_portfolio_optimizer(1000, strategies, None, None, 60.0, jobs=2)
+
+    assert 'Bewertung in 2 Prozessen' in output.getvalue()
+    assert pooled['optimal_portfolio'] == serial['optimal_portfolio']
+    assert pooled['final_result']['end_capital'] == serial['final_result']['end_capital']
+
+
+@pytest.mark.parametrize('max_combos', [portfolio_optimizer.EXHAUSTIVE_MAX_COMBOS, 0])
+def test_risk_sweep_matches_single_level_runs(strategies, monkeypatch, tmp_path, max_combos):
+    monkeypatch.setattr(portfolio_optimizer, 'EXHAUSTIVE_MAX_COMBOS', max_combos)
+    monkeypatch.setattr(portfolio_optimizer, 'PROJECT_ROOT', str(tmp_path))
+    risk_levels = [1.0, 2.5, 5.0]
+    sweep = _silent(portfolio_optimizer.run_risk_sweep, 1000, strategies, None, None, 40.0, risk_levels)
+
+    assert list(sweep) == risk_levels
+    assert not (tmp_path / 'artifacts').exists()
+    for risk in risk_levels:
+        sd_risk = {k: dict(sd, risk_params=dict(sd['risk_params'], risk_per_trade_pct=risk))
+                   for k, sd in strategies.items()}
+        single = _silent(portfolio_optimizer.run_portfolio_optimizer, 1000, sd_risk, None, None, 40.0)
+        assert sweep[risk]['optimal_portfolio'] == single['optimal_portfolio'], risk
+        if single['final_result'] is not None:
+            summary = sweep[risk]['final_result']
+            assert {k: summary[k] for k in SUMMARY_KEYS} == {k: single['final_result'][k] for k in SUMMARY_KEYS}
@@ -0,0 +1,83 @@
+# tests/test_smc_cache.py
+# Persistenter SMC-Ergebnis-Cache: identische Ergebnisse, Key-Trennung, LRU-Eviction
+import os
+import sys
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.analysis.backtester import run_smc_backtest
+from titanbot.strategy.smc_cache import SMCDiskCache, process_dataframe_cached
+from titanbot.strategy.smc_engine import SMCEngine
+from test_backtester import BASE_PARAMS, RISK_PARAMS, TRIALS
+from test_smc_engine import make_df
+
+RESULT_KEYS = ('events', 'unmitigated_swing_obs', 'unmitigated_internal_obs', 'unmitigated_fvgs',
+               'liquidity_levels', 'all_swing_obs', 'all_internal_obs', 'all_fvgs')
+
+
+def test_cached_result_matches_engine(tmp_path):
+    df = make_df(n=1500, seed=5, freq='1h')
+    cache = SMCDiskCache(str(tmp_path))
+    expected = SMCEngine(settings=BASE_PARAMS).process_dataframe(df, bar_state_format='arrays')
+
+    first = process_dataframe_cached(df, BASE_PARAMS, cache, 'BTC/USDT:USDT', '1h')
+    assert len(os.listdir(tmp_path)) == 1
+    second = process_dataframe_cached(df, BASE_PARAMS, cache, 'BTC/USDT:USDT', '1h')
+
+    for result in (first, second):
+        for key in RESULT_KEYS:
+            assert result[key] == expected[key], key
+        for name, arr in expected['bar_arrays'].items():
+            np.testing.assert_array_equal(result['bar_arrays'][name], arr)
+            assert result['bar_arrays'][name].dtype == arr.dtype
+
+
+def test_key_depends_on_data_and_settings(tmp_path):
+    df = make_df(n=500, seed=5, freq='1h')
+    cache = SMCDiskCache(str(tmp_path))
+    key = cache.key(df, BASE_PARAMS, 'BTC/USDT:USDT', '1h')
+    assert cache.key(df.copy(), dict(BASE_PARAMS), 'BTC/USDT:USDT', '1h') == key
+    assert cache.key(df, {**BASE_PARAMS, 'swingsLength': 21}, 'BTC/USDT:USDT', '1h') != key
+    assert cache.key(df, BASE_PARAMS, 'ETH/USDT:USDT', '1h') != key
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc('close')] += 0.01
+    assert cache.key(changed, BASE_PARAMS, 'BTC/USDT:USDT', '1h') != key
+    # Filter-Parameter der Signal-Logik ändern die Strukturen nicht
+    assert cache.key(df, {**BASE_PARAMS, 'min_ob_quality': 0.4}, 'BTC/USDT:USDT', '1h') == key
+
+
+def test_lru_eviction(tmp_path):
+    df = make_df(n=800, seed=9, freq='1h')
+    cache = SMCDiskCache(str(tmp_path))
+    keys = []
+    for length in (20, 21):
+        settings = {**BASE_PARAMS, 'swingsLength': length}
+        keys.append(cache.key(df, settings))
+        process_dataframe_cached(df, settings, cache)
+        os.utime(cache._path(keys[-1]), (len(keys) * 10.0, len(keys) * 10.0))
+    cache.max_bytes = int(os.path.getsize(cache._path(keys[0])) * 2.5)
+
+    assert cache.load(keys[0]) is not None   # zuletzt benutzt -> bleibt
+    process_dataframe_cached(df, {**BASE_PARAMS, 'swingsLength': 22}, cache)
+    remaining = set(os.listdir(tmp_path))
+    assert len(remaining) == 2
+    assert keys[0] + '.npz' in remaining
+    assert keys[1] + '.npz' not in remaining
+
+
+def test_backtest_with_disk_cache(tmp_path):
+    df = make_df(n=2000, seed=23, freq='1h')
+    run_smc_backtest(df, dict(BASE_PARAMS), RISK_PARAMS)
+    cache = SMCDiskCache(str(tmp_path))
+    for trial in TRIALS:
+        params = {**BASE_PARAMS, **trial}
+        expected = run_smc_backtest(df.copy(), dict(params), RISK_PARAMS)
+        for _ in range(2):
+            actual = run_smc_backtest(df.copy(), {**params, '_smc_cache': cache}, RISK_PARAMS)
+            assert actual['trades_list'] == expected['trades_list']
+            assert actual['equity_curve'] == expected['equity_curve']
+            assert actual['smc_structures'] == expected['smc_structures']
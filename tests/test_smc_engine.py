@@ -0,0 +1,343 @@
+# tests/test_smc_engine.py
+# Paritäts-Tests für die beschleunigten Pfade der SMC-Engine gegen die Referenz-Implementierung
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+
+from titanbot.strategy.smc_engine import (SMCEngine, Bias, LiquidityLevel,
+                                          bar_states_from_arrays, smc_columns,
+                                          structures_from_arrays)
+
+CONFIGS_DIR = os.path.join(PROJECT_ROOT, 'src', 'titanbot', 'strategy', 'configs')
+
+
+# ==================== REFERENZ ====================
+
+class ReferenceSMCEngine(SMCEngine):
+    """
+    Ursprüngliche Full-Scan-Implementierung (Mitigation, Liquidity, Sweep-State):
+    jede Kerze prüft alle jemals erzeugten Strukturen. Dient als Paritäts-Referenz
+    für die Active-Set-Indizierung der Engine.
+    """
+
+    def __init__(self, settings: dict):
+        super().__init__({**settings, 'precompute_legs': False, 'precompute_fvgs': False})
+
+    def _deleteOrderBlocks(self, index: int):
+        c_high = self.highs[index]
+        c_low = self.lows[index]
+        c_close = self.closes[index]
+        bearish_source = c_close if self.ob_mitigation == 'Close' else c_high
+        bullish_source = c_close if self.ob_mitigation == 'Close' else c_low
+        for ob in self.internalOrderBlocks + self.swingOrderBlocks:
+            if ob.mitigated:
+                continue
+            if ob.bias == Bias.BEARISH and bearish_source > ob.barHigh:
+                ob.mitigated = True
+                ob.mitigated_bar = index
+            elif ob.bias == Bias.BULLISH and bullish_source < ob.barLow:
+                ob.mitigated = True
+                ob.mitigated_bar = index
+            else:
+                if ob.bias == Bias.BULLISH and c_low <= ob.barHigh and c_close >= ob.barLow:
+                    ob.touch_count += 1
+                elif ob.bias == Bias.BEARISH and c_high >= ob.barLow and c_close <= ob.barHigh:
+                    ob.touch_count += 1
+
+    def _deleteFairValueGaps(self, index: int):
+        c_low = self.lows[index]
+        c_high = self.highs[index]
+        for fvg in self.fairValueGaps:
+            if fvg.mitigated:
+                continue
+            if fvg.bias == Bias.BULLISH and c_low < fvg.bottom:
+                fvg.mitigated = True
+                fvg.mitigated_bar = index
+            elif fvg.bias == Bias.BEARISH and c_high > fvg.top:
+                fvg.mitigated = True
+                fvg.mitigated_bar = index
+
+    def _addLiquidityLevel(self, price: float, bias: str, bar_index: int, bar_time: int):
+        threshold = price * self.equal_level_threshold
+        is_equal = False
+        for lvl in self.liquidityLevels:
+            if not lvl.swept and lvl.bias == bias and abs(lvl.price - price) <= threshold:
+                is_equal = True
+                lvl.is_equal = True
+                break
+        self.liquidityLevels.append(LiquidityLevel(
+            price=price, bias=bias, bar_index=bar_index, bar_time=bar_time, is_equal=is_equal,
+        ))
+
+    def _checkLiquiditySweep(self, index: int):
+        c_high = self.highs[index]
+        c_low = self.lows[index]
+        c_close = self.closes[index]
+        c_time = self.times[index]
+        for lvl in self.liquidityLevels:
+            if lvl.swept or lvl.bar_index >= index:
+                continue
+            if lvl.bias == 'bsl' and c_high > lvl.price and c_close < lvl.price:
+                lvl.swept = True
+                lvl.sweep_bar = index
+                self.event_log.append({"time": c_time, "index": index, "type": "BSL Sweep",
+                                       "level": lvl.price, "is_equal": lvl.is_equal})
+            elif lvl.bias == 'ssl' and c_low < lvl.price and c_close > lvl.price:
+                lvl.swept = True
+                lvl.sweep_bar = index
+                self.event_log.append({"time": c_time, "index": index, "type": "SSL Sweep",
+                                       "level": lvl.price, "is_equal": lvl.is_equal})
+
+    def _build_bar_state(self, index: int) -> dict:
+        state = super()._build_bar_state(index)
+        lb = self.liquidity_lookback
+        state['recent_bsl_sweep'] = any(
+            l.swept and l.bias == 'bsl' and 0 <= index - l.sweep_bar <= lb for l in self.liquidityLevels)
+        state['recent_ssl_sweep'] = any(
+            l.swept and l.bias == 'ssl' and 0 <= index - l.sweep_bar <= lb for l in self.liquidityLevels)
+        return state
+
+
+# ==================== FIXTURES ====================
+
+def make_df(n=1500, seed=42, freq='30min'):
+    """Synthetischer OHLCV-DataFrame (Random Walk mit Volatilitäts-Clustern)."""
+    rng = np.random.default_rng(seed)
+    vol = 0.4 + 0.3 * np.abs(np.sin(np.arange(n) / 60.0))
+    prices = 100 + np.cumsum(rng.standard_normal(n) * vol)
+    df = pd.DataFrame({
+        'open':   prices + rng.standard_normal(n) * 0.1,
+        'high':   prices + np.abs(rng.standard_normal(n) * 0.5),
+        'low':    prices - np.abs(rng.standard_normal(n) * 0.5),
+        'close':  prices + rng.standard_normal(n) * 0.2,
+        'volume': rng.integers(200, 2000, n).astype(float),
+    }, index=pd.date_range('2025-01-01', periods=n, freq=freq, tz='UTC'))
+    df['high'] = df[['open', 'close', 'high']].max(axis=1)
+    df['low'] = df[['open', 'close', 'low']].min(axis=1)
+    return df
+
+
+def _config_strategy_params():
+    """SMC-Parameter aller gespeicherten Configs (swingsLength, ob_mitigation, liquidity_lookback)."""
+    params = []
+    for path in sorted(glob.glob(os.path.join(CONFIGS_DIR, 'config_*.json'))):
+        with open(path, 'r') as f:
+            strategy = json.load(f).get('strategy', {})
+        params.append(pytest.param(strategy, id=os.path.basename(path)))
+    return params
+
+
+def _assert_same_results(expected: dict, actual: dict):
+    """Vergleicht zwei process_dataframe()-Ergebnisse feldweise (NaN-tolerant für bar_states)."""
+    assert actual['events'] == expected['events']
+    assert actual['all_swing_obs'] == expected['all_swing_obs']
+    assert actual['all_internal_obs'] == expected['all_internal_obs']
+    assert actual['all_fvgs'] == expected['all_fvgs']
+    assert actual['liquidity_levels'] == expected['liquidity_levels']
+    assert actual['unmitigated_swing_obs'] == expected['unmitigated_swing_obs']
+    assert actual['unmitigated_internal_obs'] == expected['unmitigated_internal_obs']
+    assert actual['unmitigated_fvgs'] == expected['unmitigated_fvgs']
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(actual['bar_states']), pd.DataFrame(expected['bar_states']))
+
+
+# ==================== LEG DETECTION ====================
+
+@pytest.mark.parametrize('size', [1, 5, 15, 50])
+def test_leg_flags_match_window_scan(size):
+    """Vektorisierte Leg-Flags entsprechen dem max()/min()-Scan über das Fenster."""
+    df = make_df(n=400, seed=3)
+    highs = df['high'].to_numpy()
+    lows = df['low'].to_numpy()
+    new_leg_high, new_leg_low = SMCEngine._compute_leg_flags(highs, lows, size)
+    for i in range(len(df)):
+        if i < size:
+            assert not new_leg_high[i] and not new_leg_low[i]
+            continue
+        assert new_leg_high[i] == (highs[i - size] > max(highs[i - size + 1: i + 1]))
+        assert new_leg_low[i] == (lows[i - size] < min(lows[i - size + 1: i + 1]))
+
+
+def test_leg_flags_short_history():
+    """Weniger Kerzen als swingsLength → keine Pivots, keine Exception."""
+    df = make_df(n=10)
+    new_leg_high, new_leg_low = SMCEngine._compute_leg_flags(
+        df['high'].to_numpy(), df['low'].to_numpy(), 50)
+    assert not new_leg_high.any() and not new_leg_low.any()
+
+
+@pytest.mark.parametrize('strategy', _config_strategy_params())
+def test_precomputed_legs_match_reference(strategy):
+    """Engine mit vorberechneten Legs liefert exakt dieselben Strukturen wie der Referenz-Pfad."""
+    df = make_df(seed=strategy.get('swingsLength', 50))
+    ohlc = df[['open', 'high', 'low', 'close']]
+
+    reference = SMCEngine(settings={**strategy, 'precompute_legs': False})
+    expected = reference.process_dataframe(ohlc.copy())
+
+    engine = SMCEngine(settings=strategy)
+    actual = engine.process_dataframe(ohlc.copy())
+
+    assert len(expected['events']) > 0
+    _assert_same_results(expected, actual)
+
+
+# ==================== ACTIVE SETS ====================
+
+@pytest.mark.parametrize('strategy', _config_strategy_params())
+def test_active_sets_match_full_scan(strategy):
+    """Active-Set-Mitigation/Sweeps liefern dieselben Strukturen wie der Full-Scan über die Historie."""
+    df = make_df(n=3000, seed=strategy.get('swingsLength', 50) + 1)
+    ohlc = df[['open', 'high', 'low', 'close']]
+
+    expected = ReferenceSMCEngine(settings=strategy).process_dataframe(ohlc.copy())
+    actual = SMCEngine(settings=strategy).process_dataframe(ohlc.copy())
+
+    assert any(ob.mitigated for ob in expected['all_internal_obs'])
+    assert any(ob.touch_count > 0 for ob in expected['all_internal_obs'] + expected['all_swing_obs'])
+    assert any(lvl.swept for lvl in expected['liquidity_levels'])
+    _assert_same_results(expected, actual)
+
+
+def test_equal_levels_mark_oldest_unswept_match():
+    """Equal-High-Erkennung markiert (wie der Full-Scan) nur das älteste ungesweepte Level."""
+    engine = SMCEngine(settings={'swingsLength': 5})
+    engine._addLiquidityLevel(100.00, 'bsl', 1, 1)
+    engine._addLiquidityLevel(100.20, 'bsl', 2, 2)   # außerhalb 0.1%
+    engine._addLiquidityLevel(100.05, 'bsl', 3, 3)   # innerhalb → markiert Level 1, nicht 2
+    engine._addLiquidityLevel(100.05, 'ssl', 4, 4)   # anderer Bias → kein Equal
+
+    first, second, third, ssl = engine.liquidityLevels
+    assert first.is_equal and third.is_equal
+    assert not second.is_equal
+    assert not ssl.is_equal
+
+
+# ==================== INCREMENTAL API ====================
+
+def _append_all(engine, df):
+    for ts, row in df.iterrows():
+        engine.append_bar(row['open'], row['high'], row['low'], row['close'], ts)
+
+
+@pytest.mark.parametrize('settings', [
+    {'swingsLength': 15, 'ob_mitigation': 'High/Low', 'liquidity_lookback': 20},
+    {'swingsLength': 41, 'ob_mitigation': 'Close', 'liquidity_lookback': 25},
+])
+def test_append_bar_matches_process_dataframe(settings):
+    """Kerze für Kerze per append_bar() ergibt dieselben Ergebnisse wie process_dataframe()."""
+    df = make_df(n=1200, seed=11)
+    ohlc = df[['open', 'high', 'low', 'close']]
+    expected = SMCEngine(settings=settings).process_dataframe(ohlc.copy())
+
+    engine = SMCEngine(settings=settings)
+    _append_all(engine, ohlc)
+    _assert_same_results(expected, engine.get_results())
+    assert engine.times == expected['enriched_df'].index.astype(np.int64).tolist()
+
+
+def test_append_after_process_dataframe():
+    """Historie per process_dataframe(), Rest per append_bar() → identisch zum Komplettlauf."""
+    settings = {'swingsLength': 19, 'liquidity_lookback': 20}
+    ohlc = make_df(n=1200, seed=12)[['open', 'high', 'low', 'close']]
+    expected = SMCEngine(settings=settings).process_dataframe(ohlc.copy())
+
+    engine = SMCEngine(settings=settings)
+    engine.process_dataframe(ohlc.iloc[:900].copy())
+    _append_all(engine, ohlc.iloc[900:])
+    actual = engine.get_results(ohlc)
+    _assert_same_results(expected, actual)
+    pd.testing.assert_frame_equal(actual['enriched_df'], expected['enriched_df'])
+
+
+def test_snapshot_restore_roundtrip():
+    """restore(snapshot) setzt die Engine exakt zurück; Snapshot ist picklebar und wiederverwendbar."""
+    import pickle
+
+    settings = {'swingsLength': 16, 'liquidity_lookback': 25}
+    ohlc = make_df(n=1000, seed=13)[['open', 'high', 'low', 'close']]
+    expected = SMCEngine(settings=settings).process_dataframe(ohlc.copy())
+
+    engine = SMCEngine(settings=settings)
+    engine.process_dataframe(ohlc.iloc[:700].copy())
+    snap = pickle.loads(pickle.dumps(engine.snapshot()))
+
+    # Laufende (unfertige) Kerze probeweise anhängen und wieder verwerfen
+    engine.append_bar(1e6, 1e6, 1e-6, 1e-6, ohlc.index[700])
+    engine.restore(snap)
+    _append_all(engine, ohlc.iloc[700:])
+    _assert_same_results(expected, engine.get_results())
+
+    restored = SMCEngine(settings=settings).restore(snap)
+    _append_all(restored, ohlc.iloc[700:])
+    _assert_same_results(expected, restored.get_results())
+
+
+@pytest.mark.parametrize('strategy', _config_strategy_params())
+def test_bar_arrays_match_dict_states(strategy):
+    """bar_state_format='arrays' liefert dieselben Zustände und smc_*-Spalten wie der Dict-Modus."""
+    df = make_df(n=1500, seed=21)
+    expected = SMCEngine(settings=strategy).process_dataframe(df.copy())
+
+    before = df.copy()
+    actual = SMCEngine(settings=strategy).process_dataframe(df, bar_state_format='arrays')
+    pd.testing.assert_frame_equal(df, before)  # Input bleibt unverändert
+    assert actual['bar_states'] is None and actual['enriched_df'] is None
+
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(bar_states_from_arrays(actual['bar_arrays'])),
+        pd.DataFrame(expected['bar_states']),
+    )
+    cols = smc_columns(actual)
+    assert set(cols) == {c for c in expected['enriched_df'].columns if c.startswith('smc_')}
+    for col, values in cols.items():
+        pd.testing.assert_series_equal(pd.Series(values, index=df.index, name=col),
+                                       expected['enriched_df'][col], check_dtype=False)
+    assert actual['all_swing_obs'] == expected['all_swing_obs']
+
+
+def test_bar_arrays_grow_on_append():
+    """append_bar() im Array-Modus vergrößert die Puffer und bleibt identisch zum Komplettlauf."""
+    ohlc = make_df(n=1200, seed=22)[['open', 'high', 'low', 'close']]
+    expected = SMCEngine(settings={}).process_dataframe(ohlc.copy(), bar_state_format='arrays')
+
+    engine = SMCEngine(settings={})
+    engine.process_dataframe(ohlc.iloc[:300].copy(), bar_state_format='arrays')
+    _append_all(engine, ohlc.iloc[300:])
+    actual = engine.get_results()
+    for key, values in expected['bar_arrays'].items():
+        np.testing.assert_array_equal(actual['bar_arrays'][key], values, err_msg=key)
+
+
+def test_unknown_bar_state_format():
+    with pytest.raises(ValueError):
+        SMCEngine(settings={}).process_dataframe(make_df(n=50), bar_state_format='parquet')
+
+
+def test_structures_as_arrays_roundtrip():
+    """Record-Array-Export: kompakt, picklebar und verlustfrei zurück in Dataclasses wandelbar."""
+    import pickle
+
+    engine = SMCEngine(settings={'swingsLength': 20, 'liquidity_lookback': 20})
+    results = engine.process_dataframe(make_df(n=2000, seed=31), bar_state_format='arrays')
+    arrays = pickle.loads(pickle.dumps(engine.structures_as_arrays()))
+
+    assert len(arrays['fvgs']) == len(results['all_fvgs']) > 0
+    assert arrays['swing_obs']['bias'].dtype == np.int8
+    np.testing.assert_array_equal(arrays['fvgs']['bias'],
+                                  [fvg.bias.value for fvg in results['all_fvgs']])
+    assert not hasattr(results['all_fvgs'][0], '__dict__')
+
+    restored = structures_from_arrays(arrays)
+    assert restored['swing_obs'] == results['all_swing_obs']
+    assert restored['internal_obs'] == results['all_internal_obs']
+    assert restored['fvgs'] == results['all_fvgs']
+    assert restored['liquidity_levels'] == results['liquidity_levels']
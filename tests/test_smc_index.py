@@ -0,0 +1,50 @@
+# tests/test_smc_index.py
+# Intervall-Index der SMC-Strukturen gegen den bisherigen Full-Scan im Backtester
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.strategy.smc_engine import SMCEngine, FVG, Bias
+from titanbot.strategy.smc_index import IntervalIndex, SMCStructureIndex
+from test_smc_engine import make_df
+
+
+def _full_scan(smc_results, i, window):
+    start = i - window
+    alive = lambda end: end == -1 or end > i
+    return {
+        'unmitigated_internal_obs': [ob for ob in smc_results['all_internal_obs']
+                                     if start <= ob.bar_index <= i and alive(ob.mitigated_bar)],
+        'unmitigated_swing_obs': [ob for ob in smc_results['all_swing_obs']
+                                  if start <= ob.bar_index <= i and alive(ob.mitigated_bar)],
+        'unmitigated_fvgs': [fvg for fvg in smc_results['all_fvgs']
+                             if start <= fvg.start_bar_index <= i and alive(fvg.mitigated_bar)],
+        'liquidity_levels': smc_results['liquidity_levels'],
+    }
+
+
+@pytest.mark.parametrize('window', [0, 50, 300])
+def test_query_matches_full_scan(window):
+    smc_results = SMCEngine(settings={'swingsLength': 15}).process_dataframe(
+        make_df(n=1500, seed=41), bar_state_format='arrays')
+    index = SMCStructureIndex(smc_results)
+    for i in range(len(smc_results['bar_arrays']['pd_pct'])):
+        expected = _full_scan(smc_results, i, window)
+        actual = index.query(i, window)
+        for key in expected:
+            assert [id(s) for s in actual[key]] == [id(s) for s in expected[key]], (i, key)
+
+
+def test_unsorted_starts_keep_creation_order():
+    fvgs = [FVG(top=2, bottom=1, bias=Bias.BULLISH, startTime=0, start_bar_index=s, mitigated_bar=e)
+            for s, e in [(5, -1), (2, 9), (7, 8), (2, -1), (6, 6)]]
+    index = IntervalIndex(fvgs, 'start_bar_index')
+    assert index.alive(7, 10) == [fvgs[0], fvgs[1], fvgs[2], fvgs[3]]
+    assert index.alive(8, 3) == [fvgs[0]]
+    assert index.alive(8, 2) == []
+    assert IntervalIndex([], 'start_bar_index').alive(3, 10) == []
@@ -0,0 +1,315 @@
+# tests/test_trade_logic.py
+# Parität des Signal-Kernels (compile_signal_params + titan_signal) gegen die bisherige get_titan_signal-Logik
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'src'))
+sys.path.append(os.path.dirname(__file__))
+
+from titanbot.strategy.smc_engine import SMCEngine, Bias, smc_columns
+from titanbot.strategy.smc_index import SMCStructureIndex
+from titanbot.strategy.signal_table import CandidateSignalTable
+from titanbot.strategy.trade_logic import (compile_signal_params, titan_signal, signal_from_candle,
+                                           get_titan_signal, _is_rejection_candle, _ob_quality_ok,
+                                           _get_strategy_params)
+from test_smc_engine import make_df
+
+
+def reference_signal(
+    smc_results: dict,
+    current_candle: pd.Series,
+    params: dict,
+    market_bias: Bias,
+    prev_candle: pd.Series = None,
+):
+    """Unveränderte Signal-Logik vor dem Kernel (pandas-Series-Kerze, Params pro Aufruf)."""
+    strategy_params = _get_strategy_params(params)
+
+    # --- Settings ---
+    use_adx_filter = strategy_params.get('use_adx_filter', False)
+    adx_threshold = strategy_params.get('adx_threshold', 25)
+    use_entry_confirmation = strategy_params.get('use_entry_confirmation', True)
+    use_rejection_candle = strategy_params.get('use_rejection_candle', True)
+    use_volume_filter = strategy_params.get('use_volume_filter', False)
+    volume_threshold_multiplier = strategy_params.get('volume_threshold_multiplier', 1.5)
+    use_pd_filter = strategy_params.get('use_pd_filter', True)
+    use_liquidity_sweep_filter = strategy_params.get('use_liquidity_sweep_filter', True)
+    min_ob_quality = strategy_params.get('min_ob_quality', 0.2)
+    max_ob_touches = strategy_params.get('max_ob_touches', 1)
+    use_swing_ob = strategy_params.get('use_swing_ob', True)
+
+    # --- Per-candle SMC state (from enriched df) ---
+    pd_zone = current_candle.get('smc_pd_zone', 'equilibrium')
+    pd_pct = current_candle.get('smc_pd_pct', 0.5)
+    recent_bsl_sweep = current_candle.get('smc_recent_bsl_sweep', False)
+    recent_ssl_sweep = current_candle.get('smc_recent_ssl_sweep', False)
+
+    # --- Fast exits ---
+    # Volume filter
+    if use_volume_filter:
+        try:
+            volume_ma = current_candle.get('volume_ma', np.nan)
+            current_volume = current_candle.get('volume', 0)
+            if not (pd.isna(volume_ma) or volume_ma == 0):
+                if current_volume < volume_ma * volume_threshold_multiplier:
+                    return None, None, None
+        except Exception:
+            pass
+
+    # ADX strength filter (directional filter applied later)
+    if use_adx_filter:
+        try:
+            adx = current_candle.get('adx', np.nan)
+            if pd.isna(adx) or adx < adx_threshold:
+                return None, None, None
+        except Exception:
+            return None, None, None
+
+    # --- Candle character ---
+    is_bullish_candle = current_candle['close'] > current_candle['open']
+    is_bearish_candle = current_candle['close'] < current_candle['open']
+
+    # --- SMC structures ---
+    unmitigated_fvgs = smc_results.get("unmitigated_fvgs", [])
+    unmitigated_internal_obs = smc_results.get("unmitigated_internal_obs", [])
+    unmitigated_swing_obs = smc_results.get("unmitigated_swing_obs", [])
+    all_obs = unmitigated_internal_obs + (unmitigated_swing_obs if use_swing_ob else [])
+
+    signal_side = None
+    signal_price = None
+    signal_context = {}
+
+    min_fvg_size = params.get('strategy', params).get('min_fvg_size_pct', 0.05) / 100.0
+
+    # ==================== LONG SETUP ====================
+    # Gate 1: P/D zone — must be in discount (price below midpoint of range)
+    long_pd_ok = (not use_pd_filter) or (pd_pct <= 0.5)
+    # Gate 2: SSL liquidity sweep — stops below were taken, reversal up expected
+    long_sweep_ok = (not use_liquidity_sweep_filter) or recent_ssl_sweep
+
+    if long_pd_ok and long_sweep_ok:
+        # Priority 1: FVG long (tighter zone, cleaner entry)
+        for fvg in unmitigated_fvgs:
+            if fvg.bias != Bias.BULLISH:
+                continue
+            if fvg.size_pct < min_fvg_size:
+                continue
+            if current_candle['low'] <= fvg.top and current_candle['close'] >= fvg.bottom:
+                if use_entry_confirmation:
+                    candle_ok = is_bullish_candle or (
+                        use_rejection_candle and _is_rejection_candle(current_candle, 'buy')
+                    )
+                    if not candle_ok:
+                        continue
+                signal_side = "buy"
+                signal_price = current_candle['close']
+                signal_context = {
+                    'type': 'fvg',
+                    'level_low': fvg.bottom,
+                    'level_high': fvg.top,
+                    'bias': 'bullish',
+                    'fvg_size_pct': fvg.size_pct,
+                    'pd_zone': pd_zone,
+                    'pd_pct': pd_pct,
+                    'ssl_swept': recent_ssl_sweep,
+                }
+                break
+
+        # Priority 2: OB long
+        if not signal_side:
+            for ob in all_obs:
+                if ob.bias != Bias.BULLISH:
+                    continue
+                if current_candle['low'] <= ob.barHigh and current_candle['close'] >= ob.barLow:
+                    if not _ob_quality_ok(ob, min_ob_quality, max_ob_touches):
+                        continue
+                    if use_entry_confirmation:
+                        candle_ok = is_bullish_candle or (
+                            use_rejection_candle and _is_rejection_candle(current_candle, 'buy')
+                        )
+                        if not candle_ok:
+                            continue
+                    signal_side = "buy"
+                    signal_price = current_candle['close']
+                    signal_context = {
+                        'type': 'order_block',
+                        'level_low': ob.barLow,
+                        'level_high': ob.barHigh,
+                        'bias': 'bullish',
+                        'ob_quality': ob.quality,
+                        'ob_touches': ob.touch_count,
+                        'pd_zone': pd_zone,
+                        'pd_pct': pd_pct,
+                        'ssl_swept': recent_ssl_sweep,
+                    }
+                    break
+
+    # ==================== SHORT SETUP ====================
+    if not signal_side:
+        # Gate 1: P/D zone — must be in premium (price above midpoint)
+        short_pd_ok = (not use_pd_filter) or (pd_pct >= 0.5)
+        # Gate 2: BSL liquidity sweep — stops above were taken, reversal down expected
+        short_sweep_ok = (not use_liquidity_sweep_filter) or recent_bsl_sweep
+
+        if short_pd_ok and short_sweep_ok:
+            # Priority 1: FVG short
+            for fvg in unmitigated_fvgs:
+                if fvg.bias != Bias.BEARISH:
+                    continue
+                if fvg.size_pct < min_fvg_size:
+                    continue
+                if current_candle['high'] >= fvg.bottom and current_candle['close'] <= fvg.top:
+                    if use_entry_confirmation:
+                        candle_ok = is_bearish_candle or (
+                            use_rejection_candle and _is_rejection_candle(current_candle, 'sell')
+                        )
+                        if not candle_ok:
+                            continue
+                    signal_side = "sell"
+                    signal_price = current_candle['close']
+                    signal_context = {
+                        'type': 'fvg',
+                        'level_low': fvg.bottom,
+                        'level_high': fvg.top,
+                        'bias': 'bearish',
+                        'fvg_size_pct': fvg.size_pct,
+                        'pd_zone': pd_zone,
+                        'pd_pct': pd_pct,
+                        'bsl_swept': recent_bsl_sweep,
+                    }
+                    break
+
+            # Priority 2: OB short
+            if not signal_side:
+                for ob in all_obs:
+                    if ob.bias != Bias.BEARISH:
+                        continue
+                    if current_candle['high'] >= ob.barLow and current_candle['close'] <= ob.barHigh:
+                        if not _ob_quality_ok(ob, min_ob_quality, max_ob_touches):
+                            continue
+                        if use_entry_confirmation:
+                            candle_ok = is_bearish_candle or (
+                                use_rejection_candle and _is_rejection_candle(current_candle, 'sell')
+                            )
+                            if not candle_ok:
+                                continue
+                        signal_side = "sell"
+                        signal_price = current_candle['close']
+                        signal_context = {
+                            'type': 'order_block',
+                            'level_low': ob.barLow,
+                            'level_high': ob.barHigh,
+                            'bias': 'bearish',
+                            'ob_quality': ob.quality,
+                            'ob_touches': ob.touch_count,
+                            'pd_zone': pd_zone,
+                            'pd_pct': pd_pct,
+                            'bsl_swept': recent_bsl_sweep,
+                        }
+                        break
+
+    if not signal_side:
+        return None, None, None
+
+    # ==================== FINAL FILTERS ====================
+
+    # ADX directional filter
+    if use_adx_filter:
+        try:
+            adx_pos = current_candle.get('adx_pos', np.nan)
+            adx_neg = current_candle.get('adx_neg', np.nan)
+            if not (pd.isna(adx_pos) or pd.isna(adx_neg)):
+                if signal_side == "buy" and adx_pos < adx_neg:
+                    return None, None, None
+                if signal_side == "sell" and adx_neg < adx_pos:
+                    return None, None, None
+        except Exception:
+            return None, None, None
+
+    # MTF bias filter
+    use_mtf_filter = strategy_params.get('use_mtf_filter', False)
+    if use_mtf_filter and market_bias is not None and market_bias != Bias.NEUTRAL:
+        if signal_side == 'buy' and market_bias == Bias.BEARISH:
+            return None, None, None
+        if signal_side == 'sell' and market_bias == Bias.BULLISH:
+            return None, None, None
+
+    return signal_side, signal_price, signal_context
+
+
+
+PARAM_SETS = [
+    {},
+    {'use_pd_filter': False, 'use_liquidity_sweep_filter': False, 'min_ob_quality': 0.0, 'max_ob_touches': 5},
+    {'use_pd_filter': False, 'use_liquidity_sweep_filter': False, 'use_entry_confirmation': False,
+     'use_swing_ob': False, 'min_fvg_size_pct': 0.2},
+    {'use_liquidity_sweep_filter': False, 'use_rejection_candle': False, 'use_adx_filter': True,
+     'adx_threshold': 20, 'use_volume_filter': True, 'volume_threshold_multiplier': 1.0},
+    {'use_pd_filter': False, 'use_liquidity_sweep_filter': False, 'use_mtf_filter': True},
+]
+
+
+@pytest.fixture(scope='module')
+def bars():
+    df = make_df(n=1200, seed=51)
+    df['adx'] = np.random.default_rng(1).uniform(10, 40, len(df))
+    df['adx_pos'] = np.random.default_rng(2).uniform(5, 30, len(df))
+    df['adx_neg'] = np.random.default_rng(3).uniform(5, 30, len(df))
+    df['volume_ma'] = df['volume'].rolling(20).mean()
+    smc_results = SMCEngine(settings={'swingsLength': 12}).process_dataframe(
+        df[['open', 'high', 'low', 'close']], bar_state_format='arrays')
+    for col, values in smc_columns(smc_results).items():
+        df[col] = values
+    return df, SMCStructureIndex(smc_results)
+
+
+@pytest.mark.parametrize('strategy', PARAM_SETS)
+def test_kernel_matches_reference(bars, strategy):
+    df, index = bars
+    params = {'strategy': dict(strategy), 'risk': {}}
+    sp = compile_signal_params(params)
+    biases = [Bias.NEUTRAL, Bias.BULLISH, Bias.BEARISH]
+    signals = 0
+    for i, (_, candle) in enumerate(df.iterrows()):
+        bar_smc = index.query(i, 300)
+        bias = biases[i % 3]
+        expected = reference_signal(bar_smc, candle, params, bias)
+        assert signal_from_candle(sp, bar_smc, candle, bias) == expected, i
+        assert get_titan_signal(bar_smc, candle.to_dict(), params, bias) == expected, i
+        signals += expected[0] is not None
+    assert signals > 0
+
+
+def test_compiled_params_defaults():
+    sp = compile_signal_params({})
+    assert sp == compile_signal_params({'strategy': {}})
+    assert sp.min_fvg_size == pytest.approx(0.0005)
+    with pytest.raises(AttributeError):
+        sp.use_pd_filter = False
+
+
+@pytest.mark.parametrize('strategy', PARAM_SETS)
+def test_signal_table_matches_kernel(bars, strategy):
+    """Kandidaten-Tabelle + Masken liefern pro Kerze dasselbe Signal wie titan_signal()."""
+    df, index = bars
+    sp = compile_signal_params({'strategy': dict(strategy)})
+    biases = [(Bias.NEUTRAL, Bias.BULLISH, Bias.BEARISH)[i % 3] for i in range(len(df))]
+    cols = {col: df[col].tolist() for col in df.columns}
+    table = CandidateSignalTable(
+        index, 300, cols['open'], cols['high'], cols['low'], cols['close'],
+        cols['smc_pd_pct'], cols['smc_pd_zone'], cols['smc_recent_bsl_sweep'], cols['smc_recent_ssl_sweep'],
+        cols['volume'], cols['volume_ma'], cols['adx'], cols['adx_pos'], cols['adx_neg'], biases)
+    sides, rows = table.signals(sp)
+
+    for i, (_, candle) in enumerate(df.iterrows()):
+        expected = signal_from_candle(sp, index.query(i, 300), candle, biases[i])
+        if expected[0] is None:
+            assert sides[i] == 0 and rows[i] == -1, i
+        else:
+            assert sides[i] == (1 if expected[0] == 'buy' else -1), i
+            assert table.context(rows[i]) == expected[2], i